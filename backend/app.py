@@ -1,60 +1,121 @@
 
 # backend/app.py
+#
+# Application factory. Importing this module is cheap: no database work, no
+# model loading, no log files. create_app(config) builds an app; the schema
+# is created by an explicit step (`flask --app backend.app init-db`, or
+# run() for the dev server); the stress model loads on the first score and
+# Swagger UI on the first docs request.
 
 import os
+import atexit
 import uuid
-import time
 import logging
 from datetime import datetime, timedelta
-from functools import wraps
 
 import numpy as np
-import joblib
-import jwt
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, request, jsonify
 from flask_cors import CORS
-from werkzeug.security import check_password_hash
 
 # Database
-from backend.database.base import engine, SessionLocal, Base
+from backend.database.base import engine, SessionLocal
 from backend.database import models as db
-
-# Swagger
-from flasgger import Swagger
+from backend.middlewares.db_session import get_db, register_db_session, release_db
+from backend.middlewares.lazy_docs import LazyDocs
+from backend.middlewares.logging_middleware import register_request_logging
+from backend.middlewares.metrics import instrument_engine, register_metrics
+from backend.core.auth import (
+  bearer_token, create_admin_jwt, require_admin,
+  resolve_session, revoke_admin_token, revoke_session
+)
+from backend.services.stress_inference import feature_row
+from backend.services.model_registry import ModelRegistry
+from backend.services.hrv_stream import HRVStreamStore
+from backend.services.stress_state import StressStateCache
+from backend.services.rr_binary import (
+  CONTENT_TYPE as RR_PACKET_TYPE, SEQ_DUPLICATE, SEQ_GAP,
+  RRPacketError, SequenceTracker, decode_rr_packet
+)
+from backend.services.difficulty_controller import DifficultyController
+from backend.services.participants import participant_counts
+from backend.services.password_pool import password_pool, PasswordPoolBusy
+from backend.services import metrics
+from backend.services.log_pipeline import pipelines, start_pipeline, stop_pipelines
+from backend.services.realtime_events import emit_monitor_update
 
 ###############################################################
 # CONFIG
 ###############################################################
 
 BASE_DIR = os.path.dirname(__file__)
-STATIC_FOLDER = os.path.join(BASE_DIR, "static")
-os.makedirs(STATIC_FOLDER, exist_ok=True)
 
-LOG_DIR = os.path.join(BASE_DIR, "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-LOG_FILE = os.path.join(LOG_DIR, "app.log")
+def default_config():
+  return {
+    "STATIC_FOLDER": os.path.join(BASE_DIR, "static"),
+    "LOG_FILE": os.path.join(BASE_DIR, "logs", "app.log"),   # None: no file handler
+
+    # JSON-line log pipeline (see services/log_pipeline.py)
+    "LOG_MAX_BYTES": int(os.environ.get("LOG_MAX_BYTES", 10_000_000)),
+    "LOG_BACKUPS": int(os.environ.get("LOG_BACKUPS", 5)),
+    "LOG_QUEUE_SIZE": int(os.environ.get("LOG_QUEUE_SIZE", 10_000)),
+    # access log: fraction of requests logged per URL rule (errors and slow
+    # requests are always logged), see middlewares/logging_middleware.py
+    "LOG_REQUESTS": True,
+    "LOG_SAMPLE_RATES": {
+      "/api/stress": float(os.environ.get("LOG_SAMPLE_STRESS", 0.05)),
+      "/api/task/event": float(os.environ.get("LOG_SAMPLE_TASK_EVENTS", 0.1)),
+      "/api/task/events": float(os.environ.get("LOG_SAMPLE_TASK_EVENTS", 0.1)),
+    },
+    "LOG_SLOW_MS": float(os.environ.get("LOG_SLOW_MS", 500)),
+    "SWAGGER": True,
+    "METRICS": True,    # request / SQL instrumentation and GET /metrics
+    "INIT_DB": False,   # create/upgrade the schema inside create_app()
+
+    "EMA_ALPHA": 0.3,
+    # smoothed stress label thresholds on ema_high (low / medium / high)
+    "STRESS_LEVELS": (0.33, 0.66),
+
+    # micro-batching of stress inference (see services/stress_inference.py)
+    "STRESS_BATCH_MAX_SIZE": int(os.environ.get("STRESS_BATCH_MAX_SIZE", 32)),
+    "STRESS_BATCH_MAX_WAIT_MS": float(os.environ.get("STRESS_BATCH_MAX_WAIT_MS", 2)),
+    "STRESS_MODEL_BACKEND": os.environ.get("STRESS_MODEL_BACKEND", "compiled"),
+
+    # stress model registry (see services/model_registry.py)
+    "MODELS_DIR": os.path.join(BASE_DIR, "models"),
+    "MODEL_POLL_SECONDS": float(os.environ.get("MODEL_POLL_SECONDS", 10)),
+
+    # rolling window for streamed RR beats (see services/hrv_stream.py)
+    "HRV_WINDOW_BEATS": int(os.environ.get("HRV_WINDOW_BEATS", 64)),
+    "HRV_STREAM_IDLE_SECONDS": float(os.environ.get("HRV_STREAM_IDLE_SECONDS", 600)),
+
+    # write-behind of live stress state (see services/stress_state.py)
+    "STRESS_FLUSH_INTERVAL_SECONDS": float(os.environ.get("STRESS_FLUSH_INTERVAL_SECONDS", 1.0)),
+    "STRESS_FLUSH_MAX_ROWS": int(os.environ.get("STRESS_FLUSH_MAX_ROWS", 256)),
+
+    # adaptive difficulty PID (see services/difficulty_controller.py)
+    "DIFFICULTY_SETPOINT": float(os.environ.get("DIFFICULTY_SETPOINT", 0.5)),
+    "DIFFICULTY_GAINS": (4.0, 0.5, 1.0),   # kp, ki, kd
+    "DIFFICULTY_LEVELS": (1, 10),
+    "DIFFICULTY_INITIAL": 5,
+    "DIFFICULTY_TICK_SECONDS": float(os.environ.get("DIFFICULTY_TICK_SECONDS", 1.0)),
+
+    # Socket.IO server and coalesced admin monitor frames
+    # (see routes/socket_events.py, services/realtime_events.py)
+    "SOCKETIO": True,
+    "SOCKETIO_ASYNC_MODE": os.environ.get("SOCKETIO_ASYNC_MODE") or None,   # None: eventlet if installed
+    "MONITOR_TICK_HZ": float(os.environ.get("MONITOR_TICK_HZ", 4)),
+    "MONITOR_ENCODING": os.environ.get("MONITOR_ENCODING", "json"),
+  }
 
-JWT_SECRET = os.environ.get("JWT_SECRET", "change_this_secret")
-JWT_EXP_MINUTES = 720
-EMA_ALPHA = 0.3
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
+def init_db(bind=engine):
+  # create tables, then the columns / indexes create_all() skips on
+  # existing tables
+  db.Base.metadata.create_all(bind=bind)
+  db.ensure_columns(bind)
+  db.ensure_indexes(bind)
 
-# Optional ML model
-MODEL_RF_PATH = os.path.join(BASE_DIR, "models", "stress_rf_model.pkl")
-clf_rf = joblib.load(MODEL_RF_PATH) if os.path.exists(MODEL_RF_PATH) else None
-
-###############################################################
-# LOGGING
-###############################################################
-
-logger = logging.getLogger("backend")
-logger.setLevel(logging.INFO)
-fh = logging.FileHandler(LOG_FILE)
-fh.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
-logger.addHandler(fh)
 
 ###############################################################
 # HELPERS
@@ -63,134 +124,230 @@ logger.addHandler(fh)
 def gen_token():
   return uuid.uuid4().hex
 
-def create_admin_jwt(username: str):
-  payload = {
-    "sub": username,
-    "role": "admin",
-    "exp": datetime.utcnow() + timedelta(minutes=JWT_EXP_MINUTES)
-  }
-  return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
-
-def decode_jwt(token: str):
-  return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-
-def require_admin(f):
-  @wraps(f)
-  def wrapper(*args, **kwargs):
-    auth = request.headers.get("Authorization", "")
-    if not auth.startswith("Bearer "):
-      return jsonify({"ok": False, "error": "missing token"}), 401
-
-    token = auth.split(" ", 1)[1]
-    try:
-      payload = decode_jwt(token)
-    except Exception:
-      return jsonify({"ok": False, "error": "invalid or expired token"}), 401
-
-    if payload.get("role") != "admin":
-      return jsonify({"ok": False, "error": "admin required"}), 403
-
-    request.admin_user = payload["sub"]
-    return f(*args, **kwargs)
-  return wrapper
-
 
 ###############################################################
 # HRV FEATURE EXTRACTION
 ###############################################################
 
 def rr_features(rr):
-  rr = np.array(rr, dtype=float)
+  # arrays (e.g. the uint16 / float32 view of a binary packet) are used as
+  # they are; the reductions below accumulate in float64 without copying
+  # them first
+  rr = rr if isinstance(rr, np.ndarray) else np.array(rr, dtype=float)
+  if not (np.isfinite(rr).all() and (rr > 0).all()):
+    # JSON null becomes NaN, which would come back as invalid JSON
+    raise ValueError("RR intervals must be positive finite numbers")
   if len(rr) < 2:
     return {"rmssd": None, "sdnn": None, "mean_rr": None, "mean_hr": None}
 
-  diff = np.diff(rr)
+  diff = np.subtract(rr[1:], rr[:-1], dtype=float)
   rmssd = float(np.sqrt(np.mean(diff**2)))
-  sdnn = float(np.std(rr))
-  mean_rr = float(np.mean(rr))
+  sdnn = float(np.std(rr, dtype=float))
+  mean_rr = float(np.mean(rr, dtype=float))
   mean_hr = float(60000.0 / mean_rr) if mean_rr > 0 else None
 
   return {"rmssd": rmssd, "sdnn": sdnn, "mean_rr": mean_rr, "mean_hr": mean_hr}
 
-def infer_stress(rr):
-  feat = rr_features(rr)
-  out = {"features": feat, "label": 0, "proba": [1, 0, 0]}
-
-  if clf_rf:
-    X = [[feat["rmssd"] or 0, feat["sdnn"] or 0, feat["mean_rr"] or 0, feat["mean_hr"] or 0]]
-    proba = clf_rf.predict_proba(X)[0].tolist()
-    out["proba"] = proba
-    out["label"] = int(np.argmax(proba))
 
-  return out
+def is_rr_list(rr):
+  # a JSON array of plain numbers; strings, booleans and nested arrays would
+  # otherwise be coerced by NumPy into nonsense features
+  return isinstance(rr, list) and all(
+    isinstance(v, (int, float)) and not isinstance(v, bool) for v in rr
+  )
 
 
 ###############################################################
-# FLASK INIT
+# STRESS SERVICES (one set per app)
 ###############################################################
 
-app = Flask(__name__, static_folder=STATIC_FOLDER, static_url_path="/")
-CORS(app, resources={r"/api/*": {"origins": "*"}})
-swagger = Swagger(app)
+class StressServices:
+  def __init__(self, config):
+    self.levels = config["STRESS_LEVELS"]
+    self.hrv_streams = HRVStreamStore(
+      capacity=config["HRV_WINDOW_BEATS"],
+      idle_seconds=config["HRV_STREAM_IDLE_SECONDS"]
+    )
+    # last sequence number per token, for binary RR packets
+    self.rr_sequences = SequenceTracker()
+    # the model itself is loaded on the first score
+    self.models = ModelRegistry(
+      config["MODELS_DIR"],
+      backend=config["STRESS_MODEL_BACKEND"],
+      max_batch=config["STRESS_BATCH_MAX_SIZE"],
+      max_wait_ms=config["STRESS_BATCH_MAX_WAIT_MS"],
+      poll_seconds=config["MODEL_POLL_SECONDS"]
+    )
+    self.state = StressStateCache(
+      SessionLocal,
+      alpha=config["EMA_ALPHA"],
+      label_fn=self.smooth_label,
+      flush_interval=config["STRESS_FLUSH_INTERVAL_SECONDS"],
+      max_pending=config["STRESS_FLUSH_MAX_ROWS"]
+    )
+    kp, ki, kd = config["DIFFICULTY_GAINS"]
+    self.controller = DifficultyController(
+      SessionLocal,
+      setpoint=config["DIFFICULTY_SETPOINT"],
+      kp=kp, ki=ki, kd=kd,
+      levels=config["DIFFICULTY_LEVELS"],
+      initial=config["DIFFICULTY_INITIAL"],
+      tick_seconds=config["DIFFICULTY_TICK_SECONDS"],
+      on_decisions=self.state.set_difficulty
+    )
+
+  def infer(self, rr):
+    return self.score_features(rr_features(rr))
+
+  def infer_stream(self, token, beats):
+    # beats are appended to the session's rolling window; O(1) per beat.
+    # None while the window holds fewer than 2 beats
+    feat = self.hrv_streams.push(token, beats)
+    if feat["mean_rr"] is None:
+      return None
+    return self.score_features(feat)
+
+  def score_features(self, feat):
+    out = {"features": feat, "label": 0, "proba": [1, 0, 0], "model_version": None}
+
+    scored = self.models.predict(feature_row(feat))
+    if scored:
+      proba, out["model_version"] = scored
+      out["proba"] = proba
+      out["label"] = int(np.argmax(proba))
+
+    return out
+
+  def smooth_label(self, ema_high):
+    low, high = self.levels
+    if ema_high >= high:
+      return 2
+    if ema_high >= low:
+      return 1
+    return 0
+
+  def close(self):
+    self.controller.close()
+    self.state.close()
+    self.models.close()
+
+
+def stress_services():
+  return current_app.extensions["stress"]
+
+
+bp = Blueprint("api", __name__)
 
 
 ###############################################################
 # HEALTH
 ###############################################################
 
-@app.route("/healthz")
+@bp.route("/healthz")
 def health():
   return jsonify({"ok": True})
 
 
+def scrape_gauges(services):
+  # queue depths and Socket.IO counters are read here, at scrape time, so
+  # the hot paths don't pay for them
+  from backend.routes.admin_extra import reports
+  from backend.routes.task import event_writer
+  from backend.services.realtime_events import broadcasters
+
+  report_stats = reports.stats()
+  queues = {
+    ("stress_inference",): services.models.pending_count,
+    ("stress_state",): services.state.pending_count,
+    ("difficulty_history",): services.controller.pending_count,
+    ("task_events",): event_writer.pending_count,
+    ("password_pool",): password_pool.waiting,
+    ("reports",): report_stats["inflight"],
+    ("log_records",): sum(p.pending_count for p in pipelines()),
+  }
+  monitor = {}
+  for b in broadcasters():
+    for k, v in b.stats().items():
+      monitor[(k,)] = monitor.get((k,), 0) + v
+  queues[("monitor_broadcast",)] = monitor.pop(("pending",), 0)
+
+  return [
+    metrics.Gauge("queue_depth", "Items waiting in a background queue.", ("queue",), queues),
+    metrics.Gauge("difficulty_sessions", "Sessions tracked by the difficulty controller.",
+                  samples={(): len(services.controller)}),
+    metrics.Gauge("log_records_dropped_total", "Log records dropped because the log queue was full.",
+                  samples={(): sum(p.dropped for p in pipelines())}, type="counter"),
+    metrics.Gauge("rr_packet_sequence_total", "Binary RR packets after a gap / duplicates, and packets missed.",
+                  ("event",), {("gap",): services.rr_sequences.gaps,
+                               ("duplicate",): services.rr_sequences.duplicates,
+                               ("missed",): services.rr_sequences.missing}, type="counter"),
+    metrics.Gauge("stress_model_reloads_total", "Stress model hot reloads.",
+                  samples={(): services.models.reloads}, type="counter"),
+    metrics.Gauge("report_requests_total", "PDF report requests by outcome.", ("outcome",),
+                  {("rendered",): report_stats["renders"], ("cached",): report_stats["hits"]}, type="counter"),
+    # rate(socketio_monitor_events_total{event="sent"}) is the emit rate
+    metrics.Gauge("socketio_monitor_events_total", "Monitor broadcaster counters.", ("event",), monitor,
+                  type="counter"),
+  ]
+
+
+@bp.route("/metrics")
+def metrics_endpoint():
+  if not current_app.config["METRICS"]:
+    return jsonify({"ok": False, "error": "metrics disabled"}), 404
+  body = metrics.REGISTRY.render(scrape_gauges(stress_services()))
+  return Response(body, mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+
 ###############################################################
 # ADMIN LOGIN
 ###############################################################
 
-@app.route("/api/admin/login", methods=["POST"])
+@bp.route("/api/admin/login", methods=["POST"])
 def admin_login():
   data = request.get_json() or {}
   username = data.get("username")
   password = data.get("password")
 
-  dbs = SessionLocal()
+  user = get_db().query(db.AdminUser).filter_by(username=username).first()
+  # the KDF runs in the password pool, off the eventlet hub; don't hold a
+  # pooled connection while it waits
+  release_db()
   try:
-    user = dbs.query(db.AdminUser).filter_by(username=username).first()
-    if not user or not check_password_hash(user.password_hash, password):
-      return jsonify({"ok": False, "error": "invalid credentials"}), 401
+    valid = user is not None and password_pool.verify(user.password_hash, password)
+  except PasswordPoolBusy as e:
+    return jsonify({"ok": False, "error": str(e)}), 503
+  if not valid:
+    return jsonify({"ok": False, "error": "invalid credentials"}), 401
 
-    return jsonify({"ok": True, "token": create_admin_jwt(username)})
-  finally:
-    dbs.close()
+  return jsonify({"ok": True, "token": create_admin_jwt(username)})
 
 
 ###############################################################
 # PARTICIPANT REGISTRATION
 ###############################################################
 
-@app.route("/api/register", methods=["POST"])
+@bp.route("/api/register", methods=["POST"])
 def register():
   data = request.get_json() or {}
   pid = data.get("participant_id") or f"P_{uuid.uuid4().hex[:8]}"
 
-  dbs = SessionLocal()
-  try:
-    p = dbs.query(db.Participant).filter_by(participant_id=pid).first()
-    if not p:
-      p = db.Participant(participant_id=pid, assignment_group="control")
-      dbs.add(p)
-      dbs.commit()
+  dbs = get_db()
+  p = dbs.query(db.Participant).filter_by(participant_id=pid).first()
+  if not p:
+    p = db.Participant(participant_id=pid, assignment_group="control")
+    dbs.add(p)
+    dbs.commit()
+    participant_counts.invalidate()
 
-    return jsonify({"ok": True, "participant_id": p.participant_id, "group": p.assignment_group})
-  finally:
-    dbs.close()
+  return jsonify({"ok": True, "participant_id": p.participant_id, "group": p.assignment_group})
 
 
 ###############################################################
 # SESSION CREATION
 ###############################################################
 
-@app.route("/api/session", methods=["POST"])
+@bp.route("/api/session", methods=["POST"])
 def new_session():
   data = request.get_json() or {}
   pid = data.get("participant_id")
@@ -198,38 +355,249 @@ def new_session():
   if not pid:
     return jsonify({"ok": False, "error": "participant_id required"}), 400
 
-  dbs = SessionLocal()
+  dbs = get_db()
+  sess = db.Session(
+    participant_id=pid,
+    token=gen_token(),
+    expires_at=datetime.utcnow() + timedelta(hours=12),
+    ema_high=0.0
+  )
+  dbs.add(sess)
+  dbs.commit()
+  return jsonify({"ok": True, "data": {"token": sess.token}})
+
+
+@bp.route("/api/session/revoke", methods=["POST"])
+def end_session():
+  token = bearer_token() or (request.get_json(silent=True) or {}).get("token")
+  if not token:
+    return jsonify({"ok": False, "error": "missing token"}), 401
+  revoke_session(token)
+  return jsonify({"ok": True})
+
+
+@bp.route("/api/admin/logout", methods=["POST"])
+@require_admin
+def admin_logout():
+  revoke_admin_token(bearer_token())
+  return jsonify({"ok": True})
+
+
+###############################################################
+# STRESS INFERENCE
+###############################################################
+
+def stress_update(token, rr, stream=False, seq=None):
+  # shared by the JSON and binary bodies of POST /api/stress and the
+  # Socket.IO "rr" event (routes/socket_events.py); returns (body, status)
+  if not token:
+    return {"ok": False, "error": "missing token"}, 401
+
+  # both the token check and the live EMA state are cached in memory; a
+  # cache hit doesn't touch the database at all
+  svc = stress_services()
+  info = resolve_session(token)
+  if info is None or svc.state.get(token) is None:
+    return {"ok": False, "error": "invalid session"}, 401
+
+  if not stream and len(rr) < 2:
+    return {"ok": False, "error": "rr_intervals_ms needs at least 2 beats"}, 400
+
+  missed = 0
+  if seq is not None:
+    status, missed = svc.rr_sequences.check(token, seq)
+    if status == SEQ_DUPLICATE:
+      return {"ok": False, "error": "duplicate sequence", "seq": seq}, 409
+    if status == SEQ_GAP and stream:
+      # successive differences must not span the lost beats
+      svc.hrv_streams.drop(token)
+
   try:
-    sess = db.Session(
-      participant_id=pid,
-      token=gen_token(),
-      expires_at=datetime.utcnow() + timedelta(hours=12),
-      ema_high=0.0
-    )
-    dbs.add(sess)
-    dbs.commit()
-    return jsonify({"ok": True, "data": {"token": sess.token}})
-  finally:
-    dbs.close()
+    out = svc.infer_stream(token, rr) if stream else svc.infer(rr)
+  except (TypeError, ValueError):
+    if seq is not None:
+      # not scored: the client may resend this packet with the same seq
+      svc.rr_sequences.revert(token, seq)
+    return {"ok": False, "error": "rr_intervals_ms must be positive numbers"}, 400
+  except Exception:
+    if seq is not None:
+      svc.rr_sequences.revert(token, seq)
+    raise
+  if out is None:
+    # streamed window still shorter than 2 beats: nothing to score yet
+    data = {"scored": False, "features": svc.hrv_streams.features(token)}
+    if seq is not None:
+      data["seq"] = seq
+      data["missed"] = missed
+    return {"ok": True, "data": data}, 202
+
+  state = svc.state.observe(token, out["proba"], out["features"], out["model_version"])
+  # the controller steps all sessions together on its own tick; this only
+  # records the measurement and reads the last decided level
+  difficulty = svc.controller.observe(token, state["ema_high"], state["difficulty"])
+
+  socketio = current_app.extensions.get("socketio")
+  if socketio is not None:
+    # coalesced into the next monitor_frame, not sent per sample
+    emit_monitor_update(socketio, info.participant_id, {
+      "proba_high": float(out["proba"][-1]),
+      "ema_high": state["ema_high"],
+      "label": out["label"],
+      "smoothed_label": state["smoothed_label"],
+      "difficulty": difficulty,
+    })
+
+  data = {
+    "proba": out["proba"],
+    "label": out["label"],
+    "ema_high": state["ema_high"],
+    "smoothed_label": state["smoothed_label"],
+    "difficulty": difficulty,
+    "features": out["features"],
+    "model_version": out["model_version"]
+  }
+  if seq is not None:
+    data["seq"] = seq
+    data["missed"] = missed
+  return {"ok": True, "data": data}, 200
 
 
+@bp.route("/api/stress", methods=["POST"])
+def stress():
+  if request.mimetype in (RR_PACKET_TYPE, "application/octet-stream"):
+    # binary packet (services/rr_binary.py); the beats stay a view over
+    # the request body
+    try:
+      token, seq, rr, stream = decode_rr_packet(request.get_data(cache=False))
+    except RRPacketError as e:
+      return jsonify({"ok": False, "error": str(e)}), 400
+    body, status = stress_update(token or bearer_token(), rr, stream, seq)
+    return jsonify(body), status
+
+  data = request.get_json() or {}
+  rr = data.get("rr_intervals_ms")
+  if not rr:
+    return jsonify({"ok": False, "error": "rr_intervals_ms required"}), 400
+  if not is_rr_list(rr):
+    return jsonify({"ok": False, "error": "rr_intervals_ms must be an array of numbers"}), 400
+
+  body, status = stress_update(bearer_token() or data.get("token"), rr, bool(data.get("stream")))
+  return jsonify(body), status
+
+
+###############################################################
+# FACTORY
 ###############################################################
 
-from backend.routes.admin_extra import bp as admin_bp
-from backend.routes.auth import bp as auth_bp
-app.register_blueprint(auth_bp)
-app.register_blueprint(admin_bp)
+def configure_logging(cfg):
+  logger = logging.getLogger("backend")
+  logger.setLevel(logging.INFO)
+  if not cfg["LOG_FILE"]:
+    return
+  # records go through a bounded queue to a writer thread; the file is
+  # never touched on a request thread
+  start_pipeline(
+    logger, cfg["LOG_FILE"],
+    max_bytes=cfg["LOG_MAX_BYTES"],
+    backups=cfg["LOG_BACKUPS"],
+    queue_size=cfg["LOG_QUEUE_SIZE"]
+  )
+  logger.propagate = False
+
+
+def create_app(config=None):
+  cfg = default_config()
+  cfg.update(config or {})
+
+  os.makedirs(cfg["STATIC_FOLDER"], exist_ok=True)
+  app = Flask(__name__, static_folder=cfg["STATIC_FOLDER"], static_url_path="/")
+  app.config.update(cfg)
+  CORS(app, resources={r"/api/*": {"origins": "*"}})
+  if cfg["METRICS"]:
+    register_metrics(app)
+    instrument_engine(engine)
+  if cfg["LOG_REQUESTS"]:
+    register_request_logging(app, cfg["LOG_SAMPLE_RATES"], cfg["LOG_SLOW_MS"])
+  register_db_session(app)
+  configure_logging(cfg)
+
+  if cfg["INIT_DB"]:
+    init_db()
+
+  # atexit is LIFO: the services flush (and may log) before the log
+  # pipeline drains
+  atexit.register(stop_pipelines)
+  services = app.extensions["stress"] = StressServices(cfg)
+  atexit.register(services.close)
+
+  # route modules carry their own background writers / pools, so they're
+  # only imported when an app is actually built
+  from backend.routes.admin_extra import bp as admin_bp
+  from backend.routes.auth import bp as auth_bp
+  from backend.routes.task import bp as task_bp
+  from backend.routes.admin import admin_bp as admin_export_bp
+  app.register_blueprint(bp)
+  app.register_blueprint(auth_bp)
+  app.register_blueprint(admin_bp)
+  app.register_blueprint(task_bp)
+  # only /export/json and /export/csv are reachable here; /login and
+  # /participants are shadowed by the routes registered above
+  app.register_blueprint(admin_export_bp, url_prefix="/api/admin", name="admin_exports")
+
+  @app.cli.command("init-db")
+  def init_db_command():
+    """Create or upgrade the database schema."""
+    init_db()
+    print("database schema ready")
+
+  @app.cli.command("rebuild-rollups")
+  def rebuild_rollups_command():
+    """Recompute the dashboard rollups from the raw logs."""
+    from backend.services.rollups import rebuild_rollups
+    dbs = SessionLocal()
+    try:
+      n = rebuild_rollups(dbs)
+      dbs.commit()
+    finally:
+      dbs.close()
+    print(f"{n} rollup upserts")
+
+  if cfg["SOCKETIO"]:
+    from backend.routes.socket_events import init_socketio
+    _, broadcaster = init_socketio(app, cfg)
+    atexit.register(broadcaster.close)
+
+  if cfg["SWAGGER"]:
+    app.wsgi_app = LazyDocs(app.wsgi_app)
+  return app
+
+
+_app = None
+
+def __getattr__(name):
+  # `backend.app:app` (gunicorn, flask --app) builds the default app on first
+  # access rather than at import
+  global _app
+  if name == "app":
+    if _app is None:
+      _app = create_app()
+    return _app
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 ###############################################################
 # APPLICATION ENTRYPOINT
 ###############################################################
 
 def run():
-    app.run(
-        host="0.0.0.0",
-        port=5000,
-        debug=False
-    )
-
-if __name__ in ("__main__", "backend.app"):
-    run()
+  init_db()
+  app = create_app()
+  socketio = app.extensions.get("socketio")
+  if socketio is not None:
+    # serves the Socket.IO endpoint as well as the HTTP routes
+    socketio.run(app, host="0.0.0.0", port=5000, debug=False)
+  else:
+    app.run(host="0.0.0.0", port=5000, debug=False)
+
+if __name__ == "__main__":
+  run()
@@ -0,0 +1,217 @@
+# backend/core/auth.py
+#
+# Shared authentication for admin JWTs and participant session tokens.
+#
+# Every admin request used to re-verify its JWT (HMAC + claims) and every
+# participant request looked its Session row up by token. Verified tokens
+# are now kept in a bounded LRU cache until they expire -- the JWT's `exp`,
+# or the session's `expires_at` -- so a hit costs a dict lookup: no HMAC, no
+# database query. Revoking a token removes it from the cache; revoked admin
+# JWTs stay on a deny list until their `exp`.
+#
+# Session entries are also capped at SESSION_CACHE_TTL seconds so that
+# revocations made by another worker process are picked up within that time.
+
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+
+import jwt
+from flask import request, jsonify
+
+from backend.database.base import SessionLocal
+from backend.database import models as db
+
+JWT_SECRET = os.environ.get("JWT_SECRET", "change_this_secret")
+JWT_ALGO = "HS256"
+JWT_EXP_MINUTES = 720
+
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", 60))
+
+SessionInfo = namedtuple("SessionInfo", ["session_id", "participant_id", "token"])
+
+
+class AuthError(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens; each entry expires at its own deadline."""
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = int(maxsize)
+        self._entries = OrderedDict()   # token -> (value, expires_at epoch)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= now:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token, value, expires_at):
+        with self._lock:
+            self._entries[token] = (value, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+admin_tokens = TokenCache()
+session_tokens = TokenCache()
+revoked_admin_tokens = TokenCache()
+
+
+def bearer_token():
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        return auth.split(" ", 1)[1]
+    return None
+
+
+###############################################################
+# ADMIN JWTs
+###############################################################
+
+def create_admin_jwt(username):
+    payload = {
+        "sub": username,
+        "role": "admin",
+        "exp": datetime.utcnow() + timedelta(minutes=JWT_EXP_MINUTES)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
+
+
+def decode_jwt(token):
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+
+
+def verify_admin_token(token):
+    """Return the admin JWT payload, raising AuthError when it isn't valid."""
+    payload = admin_tokens.get(token)
+    if payload is not None:
+        return payload
+
+    if revoked_admin_tokens.get(token) is not None:
+        raise AuthError("token revoked")
+    try:
+        payload = decode_jwt(token)
+    except jwt.PyJWTError:
+        raise AuthError("invalid or expired token")
+    if payload.get("role") != "admin":
+        raise AuthError("admin required", 403)
+
+    # tokens without exp are re-verified every SESSION_CACHE_TTL seconds
+    admin_tokens.put(token, payload, float(payload.get("exp", time.time() + SESSION_CACHE_TTL)))
+    return payload
+
+
+def revoke_admin_token(token):
+    # a JWT stays valid until exp, so remember the revocation until then
+    try:
+        payload = decode_jwt(token)
+    except jwt.PyJWTError:
+        return
+    revoked_admin_tokens.put(token, True, float(payload.get("exp", float("inf"))))
+    admin_tokens.discard(token)
+
+
+def require_admin(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        if not token:
+            return jsonify({"ok": False, "error": "missing token"}), 401
+        try:
+            payload = verify_admin_token(token)
+        except AuthError as e:
+            return jsonify({"ok": False, "error": e.message}), e.status
+        request.admin_user = payload.get("sub")
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+###############################################################
+# PARTICIPANT SESSION TOKENS
+###############################################################
+
+def resolve_session(token):
+    """Return SessionInfo for a live session token, or None."""
+    now = time.time()
+    info = session_tokens.get(token, now)
+    if info is not None:
+        return info
+
+    dbs = SessionLocal()
+    try:
+        sess = dbs.query(db.Session).filter_by(token=token).first()
+        if not sess:
+            return None
+        deadline = now + SESSION_CACHE_TTL
+        if sess.expires_at is not None:
+            # expires_at is naive UTC
+            expires = (sess.expires_at - datetime(1970, 1, 1)).total_seconds()
+            if expires <= now:
+                return None
+            deadline = min(deadline, expires)
+        info = SessionInfo(sess.id, sess.participant_id, token)
+    finally:
+        dbs.close()
+
+    session_tokens.put(token, info, deadline)
+    return info
+
+
+def revoke_session(token):
+    dbs = SessionLocal()
+    try:
+        sess = dbs.query(db.Session).filter_by(token=token).first()
+        if sess:
+            sess.expires_at = datetime.utcnow()
+            dbs.commit()
+    finally:
+        dbs.close()
+    session_tokens.discard(token)
+
+
+def require_session(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        if not token:
+            data = request.get_json(silent=True) or {}
+            token = data.get("token")
+        if not token:
+            return jsonify({"ok": False, "error": "missing token"}), 401
+        info = resolve_session(token)
+        if info is None:
+            return jsonify({"ok": False, "error": "invalid session"}), 401
+        request.session_token = token
+        request.participant_id = info.participant_id
+        return fn(*args, **kwargs)
+    return wrapper
@@ -1,14 +1,54 @@
 # backend/database/base.py
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///backend/app.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///backend/app.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False
-)
+# connection pool (server databases; SQLite uses SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+# SQLite connect-time pragmas
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers run alongside the single writer, NORMAL skips the
+    # fsync per commit (still durable at checkpoints), and busy_timeout makes
+    # a second writer wait for the lock instead of failing "database is locked"
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cur.close()
+
+
+def make_engine(url=DATABASE_URL, **kwargs):
+    """create_engine() with this app's pool settings / SQLite pragmas."""
+    if url.startswith("sqlite"):
+        kwargs.setdefault("connect_args", {"check_same_thread": False,
+                                           "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0})
+        eng = create_engine(url, **kwargs)
+        event.listen(eng, "connect", _sqlite_pragmas)
+        return eng
+
+    kwargs.setdefault("pool_size", DB_POOL_SIZE)
+    kwargs.setdefault("max_overflow", DB_MAX_OVERFLOW)
+    kwargs.setdefault("pool_timeout", DB_POOL_TIMEOUT)
+    kwargs.setdefault("pool_recycle", DB_POOL_RECYCLE)
+    kwargs.setdefault("pool_pre_ping", True)
+    return create_engine(url, **kwargs)
+
+
+engine = make_engine(DATABASE_URL, echo=False)
 
 SessionLocal = sessionmaker(
     autocommit=False,
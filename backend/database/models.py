@@ -1,10 +1,11 @@
 # backend/database/models.py
 
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Boolean, Float, JSON, ForeignKey
+    Column, Integer, SmallInteger, String, DateTime, Boolean, Float, JSON, ForeignKey, Index,
+    UniqueConstraint, inspect, select, text
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.mutable import MutableList
+from sqlalchemy.orm import object_session, relationship
+from collections.abc import Sequence
 from datetime import datetime
 
 from .base import Base
@@ -32,6 +33,12 @@ class Participant(Base):
 
     sessions = relationship("Session", back_populates="participant")
 
+    # keyset pagination (services/participants.py)
+    __table_args__ = (
+        Index("ix_participants_created", "created_at", "id"),
+        Index("ix_participants_group_created", "assignment_group", "created_at", "id"),
+    )
+
 
 # -------------------------
 # Session
@@ -70,6 +77,9 @@ class TaskLog(Base):
 
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
+    # per-participant timeline reads (services/timeline.py)
+    __table_args__ = (Index("ix_task_logs_participant_ts", "participant_id", "timestamp"),)
+
 
 # -------------------------
 # StressLog
@@ -86,13 +96,115 @@ class StressLog(Base):
     smoothed_label = Column(Integer, nullable=True)
     difficulty = Column(Integer, nullable=True)
     features = Column(JSON, nullable=True)
+    model_version = Column(String(128), nullable=True)
 
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (Index("ix_stress_logs_participant_ts", "participant_id", "timestamp"),)
+
+
+# -------------------------
+# MetricRollup
+# -------------------------
+class MetricRollup(Base):
+    # time-bucket aggregates of StressLog / TaskLog values, maintained on
+    # insert (services/rollups.py)
+    __tablename__ = "metric_rollups"
+    id = Column(Integer, primary_key=True)
+
+    series = Column(String(32), nullable=False)
+    participant_id = Column(String(64), nullable=False)
+    resolution = Column(Integer, nullable=False)      # bucket width, seconds
+    bucket_start = Column(DateTime, nullable=False)
+
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("series", "participant_id", "resolution", "bucket_start",
+                         name="uq_metric_rollups_bucket"),
+    )
+
 
 # -------------------------
 # TaskSession
 # -------------------------
+HISTORY_DIFFICULTY = 1
+HISTORY_STRESS = 2
+
+
+class HistoryList(Sequence):
+    """A session's difficulty or stress history, oldest first.
+
+    Reads like the JSON list it replaces; the values are loaded with one
+    indexed query on first read. append()/extend() insert one
+    TaskSessionHistory row per value without reading anything (O(1));
+    other mutations don't exist because the history is append-only.
+    `timestamps` runs parallel to the values (None for legacy entries).
+    """
+
+    def __init__(self, owner, kind, legacy=None):
+        self._owner = owner
+        self._kind = kind
+        self._legacy = list(legacy or [])
+        self._values = None
+        self._timestamps = None
+
+    def _load(self):
+        if self._values is None:
+            values, times = list(self._legacy), [None] * len(self._legacy)
+            sess = object_session(self._owner)
+            if sess is not None and self._owner.id is not None:
+                rows = sess.execute(
+                    select(TaskSessionHistory.value, TaskSessionHistory.timestamp)
+                    .where(TaskSessionHistory.session_id == self._owner.id,
+                           TaskSessionHistory.kind == self._kind)
+                    .order_by(TaskSessionHistory.id)
+                ).all()
+                if self._kind == HISTORY_DIFFICULTY:
+                    values += [int(v) if v.is_integer() else v for v, _ in rows]
+                else:
+                    values += [v for v, _ in rows]
+                times += [t for _, t in rows]
+            self._values, self._timestamps = values, times
+        return self._values
+
+    @property
+    def timestamps(self):
+        self._load()
+        return self._timestamps
+
+    def __getitem__(self, i):
+        return self._load()[i]
+
+    def __len__(self):
+        return len(self._load())
+
+    def __eq__(self, other):
+        return self._load() == list(other) if isinstance(other, (list, Sequence)) else NotImplemented
+
+    def __repr__(self):
+        return repr(self._load())
+
+    def tolist(self):
+        return list(self._load())
+
+    def append(self, value, timestamp=None):
+        timestamp = timestamp or datetime.utcnow()
+        self._owner.history_rows.add(
+            TaskSessionHistory(kind=self._kind, value=float(value), timestamp=timestamp)
+        )
+        if self._values is not None:
+            self._values.append(value)
+            self._timestamps.append(timestamp)
+
+    def extend(self, values):
+        for v in values:
+            self.append(v)
+
+
 class TaskSession(Base):
     __tablename__ = "task_sessions"
 
@@ -104,12 +216,41 @@ class TaskSession(Base):
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
 
-    difficulty_history = Column(MutableList.as_mutable(JSON), default=list)
-    stress_history = Column(MutableList.as_mutable(JSON), default=list)
+    # histories written before TaskSessionHistory existed; read-only, new
+    # entries are rows in task_session_history
+    legacy_difficulty_history = Column("difficulty_history", JSON, nullable=True)
+    legacy_stress_history = Column("stress_history", JSON, nullable=True)
 
     config = Column(JSON, default=dict)
 
     participant = relationship("Participant", backref="task_sessions")
+    history_rows = relationship("TaskSessionHistory", lazy="write_only",
+                                order_by="TaskSessionHistory.id", passive_deletes=True)
+
+    @property
+    def difficulty_history(self):
+        return HistoryList(self, HISTORY_DIFFICULTY, self.legacy_difficulty_history)
+
+    @property
+    def stress_history(self):
+        return HistoryList(self, HISTORY_STRESS, self.legacy_stress_history)
+
+
+# -------------------------
+# TaskSessionHistory
+# -------------------------
+class TaskSessionHistory(Base):
+    # one row per difficulty / stress history entry of a TaskSession;
+    # appends are single inserts and reads need no JSON parsing
+    __tablename__ = "task_session_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(Integer, ForeignKey("task_sessions.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(SmallInteger, nullable=False)      # HISTORY_DIFFICULTY / HISTORY_STRESS
+    value = Column(Float, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_task_session_history_session", "session_id", "kind", "id"),)
 
 
 # -------------------------
@@ -134,5 +275,59 @@ class TaskTrial(Base):
 
     session = relationship("TaskSession", backref="trials")
 
+    # summary rebuilds read one session's trials (services/task_summary.py)
+    __table_args__ = (Index("ix_task_trials_session", "session_id", "trial_index"),)
+
+
+# -------------------------
+# TaskSummary
+# -------------------------
+class TaskSummary(Base):
+    # running per-session aggregates, updated with every trial insert
+    # (services/task_summary.py)
+    __tablename__ = "task_summaries"
+
+    session_id = Column(Integer, ForeignKey("task_sessions.id"), primary_key=True)
+    participant_id = Column(String(64), nullable=True)
+    task_name = Column(String(128), nullable=True)
+
+    trials = Column(Integer, nullable=False, default=0)
+    scored = Column(Integer, nullable=False, default=0)       # trials with correct set
+    correct = Column(Integer, nullable=False, default=0)
+
+    rt_count = Column(Integer, nullable=False, default=0)
+    rt_mean = Column(Float, nullable=False, default=0.0)
+    rt_m2 = Column(Float, nullable=False, default=0.0)        # Welford sum of squares
+    rt_min = Column(Float, nullable=True)
+    rt_max = Column(Float, nullable=True)
+    rt_digest = Column(JSON, nullable=True)                   # t-digest centroids
+
+    by_difficulty = Column(JSON, nullable=True)
+
+    last_trial_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+def ensure_columns(bind):
+    # create_all() doesn't alter existing tables either; add nullable columns
+    # introduced later (e.g. StressLog.model_version)
+    insp = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in have or not col.nullable:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(bind.dialect)}"
+            with bind.begin() as conn:
+                conn.execute(text(ddl))
+
+def ensure_indexes(bind):
+    # create_all() skips indexes on tables that already exist, so indexes
+    # added after a database was created are created here
+    for table in Base.metadata.sorted_tables:
+        for idx in table.indexes:
+            idx.create(bind=bind, checkfirst=True)
+
 # --- Phase 1: Users ---
 from backend.database.user import User
@@ -0,0 +1,77 @@
+# backend/loadtest/bench_controller.py
+#
+# One difficulty-controller tick over N active sessions: the vectorised
+# DifficultyController (services/difficulty_controller.py) against a plain
+# Python PID object per session, both stepping every session once.
+#
+#   python -m backend.loadtest.bench_controller --sessions 100 1000 10000
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.services.difficulty_controller import DifficultyController
+
+
+class PythonPID:
+    # the per-session object the controller replaces
+    def __init__(self, setpoint=0.5, kp=4.0, ki=0.5, kd=1.0, base=5, levels=(1, 10), windup=4.0):
+        self.setpoint, self.kp, self.ki, self.kd = setpoint, kp, ki, kd
+        self.base, self.levels, self.windup = base, levels, windup
+        self.integral = 0.0
+        self.prev_error = None
+        self.level = base
+
+    def step(self, measurement, dt):
+        error = measurement - self.setpoint
+        self.integral = min(max(self.integral + error * dt, -self.windup), self.windup)
+        deriv = 0.0 if self.prev_error is None else (error - self.prev_error) / dt
+        self.prev_error = error
+        u = self.kp * error + self.ki * self.integral + self.kd * deriv
+        self.level = int(round(min(max(self.base - u, self.levels[0]), self.levels[1])))
+        return self.level
+
+
+def bench(n, ticks):
+    rng = np.random.default_rng(n)
+    samples = rng.random((ticks, n))
+    keys = [f"s{i}" for i in range(n)]
+
+    ctl = DifficultyController(tick_seconds=0)
+    t_obs = t_tick = 0.0
+    now = time.monotonic()
+    for t in range(ticks):
+        t0 = time.perf_counter()
+        for k, v in zip(keys, samples[t].tolist()):
+            ctl.observe(k, v)
+        t1 = time.perf_counter()
+        ctl.tick(now + t + 1)
+        t_tick += time.perf_counter() - t1
+        t_obs += t1 - t0
+
+    pids = [PythonPID() for _ in range(n)]
+    t0 = time.perf_counter()
+    for t in range(ticks):
+        for pid, v in zip(pids, samples[t].tolist()):
+            pid.step(v, 1.0)
+    t_py = time.perf_counter() - t0
+
+    agree = np.mean([pid.level == ctl.level_of(k) for pid, k in zip(pids, keys)])
+    return t_tick / ticks, t_obs / ticks / n, t_py / ticks, agree
+
+
+def main():
+    ap = argparse.ArgumentParser(description="vectorised PID tick vs per-session objects")
+    ap.add_argument("--sessions", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--ticks", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"{'sessions':>8} {'tick':>10} {'observe':>10} {'python loop':>12} {'same level':>11}")
+    for n in args.sessions:
+        tick, obs, py, agree = bench(n, args.ticks)
+        print(f"{n:>8} {tick * 1e3:8.2f}ms {obs * 1e6:8.2f}us {py * 1e3:10.2f}ms {agree:10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# backend/loadtest/bench_forest.py
+#
+# Parity and latency of the compiled forest (services/forest.py) against
+# sklearn's predict_proba, for 1-row and 1000-row inputs.
+#
+#   python -m backend.loadtest.bench_forest --rows 1 1000 --parity 100000
+#
+# Uses backend/models/stress_rf_model.pkl when present (see
+# bench_stress_batching.load_model).
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.loadtest.bench_stress_batching import load_model
+from backend.services.forest import check_parity, compile_forest, random_rows
+
+
+def timeit(fn, X, min_time=1.0):
+    fn(X)
+    times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time or len(times) < 20:
+        t0 = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1e6, np.percentile(times, 99) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="compiled forest vs sklearn predict_proba")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1, 1000])
+    ap.add_argument("--parity", type=int, default=100000, help="random rows for the parity check")
+    args = ap.parse_args()
+
+    model = load_model()
+    t0 = time.perf_counter()
+    compiled = compile_forest(model)
+    print(f"compiled {compiled.n_trees} trees / {compiled.n_nodes} nodes, depth {compiled.depth} "
+          f"in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    diff = check_parity(model, compiled, n=args.parity)
+    print(f"parity on {args.parity} random rows: max |diff| = {diff:g}")
+
+    print(f"{'rows':>6} {'sklearn p50':>12} {'p99':>9} {'compiled p50':>13} {'p99':>9} {'speedup':>8}")
+    for n in args.rows:
+        X = random_rows(compiled, n, seed=n)
+        sk50, sk99 = timeit(model.predict_proba, X)
+        cf50, cf99 = timeit(compiled.predict_proba, X)
+        print(f"{n:>6} {sk50:10.0f}us {sk99:7.0f}us {cf50:11.0f}us {cf99:7.0f}us {sk50 / cf50:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# backend/loadtest/bench_logging.py
+#
+# Cost of one log call on the caller's thread: a plain FileHandler (what
+# app.py used before) against the queued pipeline (services/log_pipeline.py),
+# with a healthy disk and with a disk that stalls for --stall-ms per write.
+#
+#   python -m backend.loadtest.bench_logging --records 20000 --stall-ms 5
+
+import argparse
+import logging
+import tempfile
+import time
+
+from backend.loadtest import harness
+from backend.services.log_pipeline import JsonLinesFileHandler, LogPipeline
+
+
+class StallingFileHandler(logging.FileHandler):
+    stall = 0.0
+
+    def emit(self, record):
+        time.sleep(self.stall)
+        super().emit(record)
+
+
+class StallingJsonLinesHandler(JsonLinesFileHandler):
+    stall = 0.0
+
+    def emit(self, record):
+        time.sleep(self.stall)
+        super().emit(record)
+
+
+def run(logger, n):
+    times = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        logger.info("POST /api/stress 200", extra={"route": "/api/stress", "status": 200, "latency_ms": 3.1, "i": i})
+        times.append(time.perf_counter() - t0)
+    return harness.latency_stats(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="log call latency: direct file handler vs queued pipeline")
+    ap.add_argument("--records", type=int, default=20000)
+    ap.add_argument("--stall-ms", type=float, default=5.0)
+    ap.add_argument("--queue-size", type=int, default=10000)
+    args = ap.parse_args()
+    tmp = tempfile.mkdtemp(prefix="bench-logs-")
+
+    for stall in (0.0, args.stall_ms / 1000.0):
+        # stalled direct writes are limited to a few hundred calls
+        n = args.records if stall == 0 else min(args.records, 200)
+        direct = logging.getLogger(f"bench.direct.{stall}")
+        direct.propagate = False
+        direct.setLevel(logging.INFO)
+        fh = StallingFileHandler(f"{tmp}/direct.log")
+        fh.stall = stall
+        direct.addHandler(fh)
+        d = run(direct, n)
+        fh.close()
+
+        queued = logging.getLogger(f"bench.queued.{stall}")
+        queued.propagate = False
+        queued.setLevel(logging.INFO)
+        p = LogPipeline(f"{tmp}/queued.log", queue_size=args.queue_size)
+        p.file_handler.__class__ = StallingJsonLinesHandler
+        p.file_handler.stall = stall
+        queued.addHandler(p.handler)
+        p.start()
+        q = run(queued, args.records)
+        p.stop()
+
+        print(f"stall {stall * 1e3:4.1f} ms  direct p50 {d['p50_ms'] * 1e3:9.1f} us  p99 {d['p99_ms'] * 1e3:9.1f} us"
+              f"   queued p50 {q['p50_ms'] * 1e3:6.1f} us  p99 {q['p99_ms'] * 1e3:6.1f} us  dropped {p.dropped}")
+
+
+if __name__ == "__main__":
+    main()
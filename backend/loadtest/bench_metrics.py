@@ -0,0 +1,76 @@
+# backend/loadtest/bench_metrics.py
+#
+# Cost of the /metrics instrumentation (middlewares/metrics.py):
+#
+#   hooks      before_request + after_request of one /api/stress request,
+#              called directly inside a request context
+#   sql        the two cursor listeners around one statement
+#   stress     POST /api/stress end to end, METRICS on vs off
+#
+#   python -m backend.loadtest.bench_metrics --requests 2000
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.loadtest import harness
+
+
+def per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def stress_latency(app, n, rr):
+    client = app.test_client()
+    pid = client.post("/api/register", json={}).get_json()["participant_id"]
+    token = client.post("/api/session", json={"participant_id": pid}).get_json()["data"]["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    body = {"rr_intervals_ms": rr}
+    client.post("/api/stress", json=body, headers=auth)   # model load
+    return harness.latency_stats(harness.repeat(
+        lambda: client.post("/api/stress", json=body, headers=auth), 0, min_runs=n, max_runs=n))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="overhead of request / SQL metrics")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--calls", type=int, default=200000)
+    args = ap.parse_args()
+
+    harness.isolated_database()
+    from backend.middlewares import metrics as mw
+
+    on = harness.bench_app()
+    off = harness.bench_app(METRICS=False)
+    rr = np.random.default_rng(0).normal(800, 50, 8).round().tolist()
+
+    before = on.before_request_funcs[None][0]
+    after = on.after_request_funcs[None][-1]
+    response = on.response_class("{}")
+    with on.test_request_context("/api/stress", method="POST"):
+        on.url_map.bind("localhost").match("/api/stress", "POST")
+        hooks = per_call(lambda: after(before() or response), args.calls)
+
+    class Conn:
+        info = {}
+    conn = Conn()
+    sql = per_call(lambda: (mw._before_cursor(conn, None, "", None, None, False),
+                            mw._after_cursor(conn, None, "", None, None, False)), args.calls)
+
+    stress_on = stress_latency(on, args.requests, rr)
+    stress_off = stress_latency(off, args.requests, rr)
+    for app in (on, off):
+        app.extensions["stress"].close()
+
+    print(f"request hooks   {hooks * 1e6:8.2f} us / request")
+    print(f"sql listeners   {sql * 1e6:8.2f} us / statement")
+    print(f"/api/stress p50 {stress_off['p50_ms'] * 1e3:8.1f} us off  {stress_on['p50_ms'] * 1e3:8.1f} us on")
+    print(f"/api/stress p99 {stress_off['p99_ms'] * 1e3:8.1f} us off  {stress_on['p99_ms'] * 1e3:8.1f} us on")
+
+
+if __name__ == "__main__":
+    main()
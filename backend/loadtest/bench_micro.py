@@ -0,0 +1,120 @@
+# backend/loadtest/bench_micro.py
+#
+# Microbenchmarks of the hot paths at several input sizes:
+#
+#   rr_features      HRV features of N beats
+#   infer_stress     features + model score (StressServices.infer)
+#   collect_logs     merged timeline of a participant with N task + N stress rows
+#   export_*         the admin export routes for that participant, and
+#                    export_all over every participant seeded so far
+#
+# Runs against a throwaway SQLite database (unless DATABASE_URL is set) and
+# prints JSON (see harness.py):
+#
+#   python -m backend.loadtest.bench_micro --beats 8 64 512 --rows 100 1000 10000 --out micro.json
+
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.loadtest import harness
+
+
+def seed_participant(SessionLocal, pid, rows):
+    from sqlalchemy import insert
+    from backend.database import models as db
+
+    t0 = datetime(2026, 1, 1)
+    rng = np.random.default_rng(rows)
+    dbs = SessionLocal()
+    try:
+        dbs.add(db.Participant(participant_id=pid, assignment_group="control"))
+        dbs.execute(insert(db.TaskLog), [
+            {"participant_id": pid, "task_name": "nback", "trial_index": i, "event": "trial",
+             "correct": bool(c), "reaction_time_ms": float(rt), "extra": {"difficulty_level": 3},
+             "timestamp": t0 + timedelta(seconds=i)}
+            for i, (c, rt) in enumerate(zip(rng.random(rows) < 0.8, rng.lognormal(6, 0.3, rows)))
+        ])
+        dbs.execute(insert(db.StressLog), [
+            {"participant_id": pid, "raw_proba": [0.2, 0.3, 0.5], "ema_high": float(e),
+             "smoothed_label": 1, "timestamp": t0 + timedelta(seconds=i + 0.5)}
+            for i, e in enumerate(rng.random(rows))
+        ])
+        dbs.commit()
+    finally:
+        dbs.close()
+
+
+def entry(name, size, times, **extra):
+    stats = harness.latency_stats(times)
+    stats["throughput_rps"] = round(len(times) / sum(times), 1) if times else 0.0
+    return {"name": f"{name}[{size}]", "bench": name, "size": size, **stats, **extra}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="microbenchmarks of the hot paths")
+    ap.add_argument("--beats", type=int, nargs="+", default=[8, 64, 512])
+    ap.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000],
+                    help="task rows and stress rows per seeded participant")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    harness.isolated_database()
+    app = harness.bench_app()
+    from backend.app import rr_features
+    from backend.database.base import SessionLocal
+    from backend.routes.admin_extra import collect_logs
+
+    svc = app.extensions["stress"]
+    client = app.test_client()
+    admin = harness.admin_headers()
+    rng = np.random.default_rng(0)
+    out = []
+
+    for n in args.beats:
+        rr = rng.normal(800, 50, n).tolist()
+        out.append(entry("rr_features", n, harness.repeat(lambda: rr_features(rr), args.min_time)))
+        svc.infer(rr)   # loads the model outside the timing
+        out.append(entry("infer_stress", n, harness.repeat(lambda: svc.infer(rr), args.min_time)))
+
+    seeded = 0
+    for n in args.rows:
+        pid = f"BENCH_{n}"
+        seed_participant(SessionLocal, pid, n)
+        seeded += 2 * n
+
+        def collect():
+            dbs = SessionLocal()
+            try:
+                collect_logs(dbs, pid)
+            finally:
+                dbs.close()
+        out.append(entry("collect_logs", n, harness.repeat(collect, args.min_time)))
+
+        for name, url in (("export_csv", f"/api/admin/export?participant_id={pid}"),
+                          ("export_json", f"/api/admin/export/json/{pid}"),
+                          ("export_csv_legacy", f"/api/admin/export/csv/{pid}")):
+            def fetch(url=url):
+                r = client.get(url, headers=admin)
+                assert r.status_code == 200, (url, r.status_code)
+                return len(r.data)
+            size = fetch()
+            out.append(entry(name, n, harness.repeat(fetch, args.min_time), bytes=size))
+
+        def export_all():
+            r = client.get("/api/admin/export_all", headers=admin)
+            assert r.status_code == 200, r.status_code
+            return len(r.data)
+        size = export_all()
+        out.append(entry("export_all", n, harness.repeat(export_all, args.min_time, min_runs=3),
+                         bytes=size, cohort_rows=seeded))
+
+    svc.close()
+    harness.emit(harness.result("micro", out, beats=args.beats, rows=args.rows,
+                                min_time=args.min_time), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# backend/loadtest/bench_password_pool.py
+#
+# Stream latency during a burst of logins, under eventlet.
+#
+# A set of green threads stands in for live stress streams: each wakes every
+# --interval ms, does a little HRV work and records how late it woke up.
+# Half a second in, --logins green threads verify a password at once (a
+# cohort's session start). With inline check_password_hash the KDF holds the
+# hub and every stream stalls for the length of the burst; through
+# PasswordPool the KDF runs on OS threads and stream lateness stays flat.
+#
+#   python -m backend.loadtest.bench_password_pool --logins 50 --streams 40
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import time
+
+import numpy as np
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from backend.services.password_pool import PasswordPool
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def run(verify, pwhash, streams, logins, interval_ms, duration):
+    interval = interval_ms / 1000.0
+    lateness = []
+    login_ms = []
+    stop = time.monotonic() + duration
+    rng = np.random.default_rng(0)
+    rr = rng.uniform(700, 900, 64)
+
+    def stream():
+        next_at = time.monotonic() + interval
+        while next_at < stop:
+            eventlet.sleep(max(next_at - time.monotonic(), 0))
+            lateness.append((time.monotonic() - next_at) * 1000.0)
+            np.sqrt(np.mean(np.diff(rr) ** 2))
+            next_at += interval
+
+    def login():
+        t0 = time.monotonic()
+        assert verify(pwhash, "s3cret")
+        login_ms.append((time.monotonic() - t0) * 1000.0)
+
+    pool = eventlet.GreenPool(streams + logins)
+    for _ in range(streams):
+        pool.spawn(stream)
+    eventlet.sleep(0.5)
+    for _ in range(logins):
+        pool.spawn(login)
+    pool.waitall()
+    return lateness, login_ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--logins", type=int, default=50)
+    ap.add_argument("--streams", type=int, default=40)
+    ap.add_argument("--interval-ms", type=float, default=50.0)
+    ap.add_argument("--duration", type=float, default=6.0)
+    ap.add_argument("--workers", type=int, default=2)
+    args = ap.parse_args()
+
+    pwhash = generate_password_hash("s3cret")
+    t0 = time.perf_counter()
+    check_password_hash(pwhash, "s3cret")
+    print(f"single verify: {(time.perf_counter() - t0) * 1000:.1f} ms ({pwhash.split('$')[0]})")
+
+    pool = PasswordPool(max_workers=args.workers, queue_timeout=30.0)
+    modes = {"inline": check_password_hash, f"pool[{args.workers}]": pool.verify}
+    print(f"{args.streams} streams every {args.interval_ms:g} ms, burst of {args.logins} logins")
+    print(f"{'mode':>10} {'late p50':>9} {'late p99':>9} {'late max':>9} {'login p50':>10} {'login max':>10}")
+    for name, verify in modes.items():
+        late, logins = run(verify, pwhash, args.streams, args.logins, args.interval_ms, args.duration)
+        print(f"{name:>10} {percentile(late, 50):8.1f}ms {percentile(late, 99):8.1f}ms {max(late):8.1f}ms "
+              f"{percentile(logins, 50):9.0f}ms {max(logins):9.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# backend/loadtest/bench_reports.py
+#
+# PDF report render time for a long synthetic session: every raw point vs
+# LTTB-downsampled to the plot's pixel budget (reports/report_generator.py).
+#
+#   python -m backend.loadtest.bench_reports --trials 20000 --stress 100000
+
+import argparse
+import math
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.reports.report_generator import MAX_POINTS, lttb_indices, render_report
+
+
+def session(trials, stress, seed=0):
+    rng = np.random.default_rng(seed)
+    t0 = datetime(2026, 1, 1)
+    task_logs = [{"timestamp": t0 + timedelta(seconds=i), "correct": bool(c)}
+                 for i, c in enumerate(rng.random(trials) < 0.7)]
+    noise = rng.normal(0, 0.03, stress)
+    stress_logs = [{"timestamp": t0 + timedelta(seconds=i * trials / stress),
+                    "ema_high": 0.5 + 0.4 * math.sin(i / 500) + noise[i]}
+                   for i in range(stress)]
+    return task_logs, stress_logs
+
+
+def best_of(fn, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="report render: raw vs LTTB")
+    ap.add_argument("--trials", type=int, default=20000)
+    ap.add_argument("--stress", type=int, default=100000)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    task_logs, stress_logs = session(args.trials, args.stress)
+    render_report("warmup", task_logs[:10], stress_logs[:10])
+
+    x = np.arange(args.stress, dtype=float)
+    y = np.array([s["ema_high"] for s in stress_logs])
+    t, _ = best_of(lambda: lttb_indices(x, y, MAX_POINTS), args.runs)
+    print(f"lttb {args.stress} -> {MAX_POINTS} points: {t * 1000:.1f} ms")
+
+    print(f"{'series':>10} {'render':>10} {'pdf size':>10}")
+    for label, max_points in (("raw", None), (f"lttb {MAX_POINTS}", MAX_POINTS)):
+        t, pdf = best_of(lambda: render_report("P", task_logs, stress_logs, max_points=max_points),
+                         args.runs)
+        print(f"{label:>10} {t * 1000:8.0f}ms {len(pdf) / 1024:8.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
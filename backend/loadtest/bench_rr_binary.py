@@ -0,0 +1,65 @@
+# backend/loadtest/bench_rr_binary.py
+#
+# JSON RR arrays against binary RR packets (services/rr_binary.py):
+#
+#   parse      json.loads of the body vs decode_rr_packet()
+#   features   parse + rr_features()
+#   stress     POST /api/stress end to end (model included)
+#
+#   python -m backend.loadtest.bench_rr_binary --beats 8 64 512 4096
+
+import argparse
+import json
+
+import numpy as np
+
+from backend.loadtest import harness
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON vs binary RR ingestion")
+    ap.add_argument("--beats", type=int, nargs="+", default=[8, 64, 512, 4096])
+    ap.add_argument("--min-time", type=float, default=0.5)
+    args = ap.parse_args()
+
+    harness.isolated_database()
+    app = harness.bench_app()
+    from backend.app import rr_features
+    from backend.services.rr_binary import CONTENT_TYPE, decode_rr_packet, encode_rr_packet
+
+    client = app.test_client()
+    pid = client.post("/api/register", json={}).get_json()["participant_id"]
+    token = client.post("/api/session", json={"participant_id": pid}).get_json()["data"]["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    rng = np.random.default_rng(0)
+    seq = iter(range(1, 2 ** 32))   # one sequence for the session across sizes
+    p50 = lambda times: harness.latency_stats(times)["p50_ms"] * 1e3
+
+    print(f"{'beats':>6} {'body json/bin':>14} {'parse json/bin us':>20} {'+features json/bin us':>24}"
+          f" {'/api/stress json/bin us':>26}")
+    for n in args.beats:
+        rr = rng.normal(800, 50, n).round().tolist()
+        body = json.dumps({"rr_intervals_ms": rr}).encode()
+        packet = encode_rr_packet(token, 0, rr)
+
+        parse_j = p50(harness.repeat(lambda: json.loads(body), args.min_time))
+        parse_b = p50(harness.repeat(lambda: decode_rr_packet(packet), args.min_time))
+        feat_j = p50(harness.repeat(lambda: rr_features(json.loads(body)["rr_intervals_ms"]), args.min_time))
+        feat_b = p50(harness.repeat(lambda: rr_features(decode_rr_packet(packet)[2]), args.min_time))
+
+        client.post("/api/stress", data=body, content_type="application/json", headers=auth)
+        http_j = p50(harness.repeat(
+            lambda: client.post("/api/stress", data=body, content_type="application/json", headers=auth),
+            args.min_time))
+        def post_packet():
+            r = client.post("/api/stress", data=encode_rr_packet(token, next(seq), rr), content_type=CONTENT_TYPE)
+            assert r.status_code == 200, r.get_json()
+        http_b = p50(harness.repeat(post_packet, args.min_time))
+
+        print(f"{n:>6} {len(body):>7}/{len(packet):<6} {parse_j:>9.1f}/{parse_b:<10.1f} {feat_j:>11.1f}/{feat_b:<12.1f}"
+              f" {http_j:>12.1f}/{http_b:<12.1f}")
+    app.extensions["stress"].close()
+
+
+if __name__ == "__main__":
+    main()
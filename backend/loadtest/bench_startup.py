@@ -0,0 +1,71 @@
+# backend/loadtest/bench_startup.py
+#
+# Cold-start cost of a worker: `import backend.app`, create_app(), the first
+# request (GET /healthz) and the first stress score (which loads the model).
+# Every run is a fresh interpreter against a throwaway SQLite database.
+#
+#   python -m backend.loadtest.bench_startup --runs 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import backend.app as A
+t1 = time.perf_counter()
+app = A.create_app({"LOG_FILE": None, "MODEL_POLL_SECONDS": 0})
+t2 = time.perf_counter()
+c = app.test_client()
+c.get("/healthz")
+t3 = time.perf_counter()
+A.init_db()
+t4 = time.perf_counter()
+pid = c.post("/api/register", json={}).get_json()["participant_id"]
+tok = c.post("/api/session", json={"participant_id": pid}).get_json()["data"]["token"]
+t5 = time.perf_counter()
+r = c.post("/api/stress", json={"rr_intervals_ms": [800, 810, 790, 820]},
+           headers={"Authorization": "Bearer " + tok})
+t6 = time.perf_counter()
+heavy = [m for m in ("flasgger", "joblib", "sklearn", "matplotlib") if m in sys.modules]
+print(json.dumps({
+    "import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2,
+    "init_db": t4 - t3, "first_stress": t6 - t5,
+    "model": r.get_json()["data"]["model_version"], "heavy_modules": heavy,
+}))
+"""
+
+STEPS = ("import", "create_app", "first_request", "init_db", "first_stress")
+
+
+def run_once(repo_root):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db", PYTHONPATH=repo_root)
+        out = subprocess.run([sys.executable, "-c", CHILD], cwd=repo_root, env=env,
+                             capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="worker cold-start timing")
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    runs = [run_once(repo_root) for _ in range(args.runs)]
+
+    print(f"median of {args.runs} fresh interpreters (model: {runs[0]['model']})")
+    for step in STEPS:
+        print(f"  {step:>14}: {statistics.median(r[step] for r in runs) * 1000:7.0f} ms")
+    ready = statistics.median(r["import"] + r["create_app"] + r["first_request"] for r in runs)
+    print(f"  {'ready to serve':>14}: {ready * 1000:7.0f} ms")
+    print(f"  heavy modules loaded by the end: {', '.join(runs[0]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# backend/loadtest/bench_stress_batching.py
+#
+# Compares per-request predict_proba calls against the micro-batched
+# StressBatcher with N concurrent senders.
+#
+#   python -m backend.loadtest.bench_stress_batching --senders 20 100 500
+#
+# Uses backend/models/stress_rf_model.pkl when present, otherwise a forest of
+# the same shape trained on synthetic HRV features.
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.services.stress_inference import StressBatcher
+
+MODEL_RF_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "stress_rf_model.pkl")
+
+
+def load_model(n_estimators=100):
+    if os.path.exists(MODEL_RF_PATH):
+        import joblib
+        return joblib.load(MODEL_RF_PATH)
+
+    from sklearn.ensemble import RandomForestClassifier
+    rng = np.random.default_rng(0)
+    X = synthetic_rows(rng, 3000)
+    y = 2 - np.digitize(X[:, 0], [25, 45])  # low rmssd -> class 2 (high stress)
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=0).fit(X, y)
+
+
+def synthetic_rows(rng, n):
+    rmssd = rng.uniform(10, 80, n)
+    sdnn = rng.uniform(20, 120, n)
+    mean_rr = rng.uniform(600, 1100, n)
+    mean_hr = 60000.0 / mean_rr
+    return np.column_stack([rmssd, sdnn, mean_rr, mean_hr])
+
+
+def run(predict, senders, per_sender, rows):
+    latencies = [[] for _ in range(senders)]
+    start_evt = threading.Event()
+
+    def sender(i):
+        out = latencies[i]
+        start_evt.wait()
+        for j in range(per_sender):
+            row = rows[(i * per_sender + j) % len(rows)]
+            t0 = time.perf_counter()
+            predict(row)
+            out.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=sender, args=(i,)) for i in range(senders)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    start_evt.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1000.0
+    return {
+        "senders": senders,
+        "requests": int(lat.size),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "throughput_rps": round(lat.size / elapsed, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--senders", type=int, nargs="+", default=[20, 100, 500])
+    ap.add_argument("--requests", type=int, default=4000, help="total requests per run")
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    model = load_model()
+    rows = synthetic_rows(np.random.default_rng(1), 1024).tolist()
+
+    results = []
+    for n in args.senders:
+        per_sender = max(1, args.requests // n)
+
+        unbatched = run(lambda r: model.predict_proba([r])[0].tolist(), n, per_sender, rows)
+        unbatched["mode"] = "unbatched"
+        results.append(unbatched)
+
+        batcher = StressBatcher(model, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        batched = run(batcher.predict, n, per_sender, rows)
+        batched["mode"] = "batched"
+        batched["mean_batch"] = round(batcher.rows / max(batcher.batches, 1), 1)
+        batcher.stop()
+        results.append(batched)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<10}{'senders':>8}{'reqs':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['senders']:>8}{r['requests']:>8}"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['throughput_rps']:>10}")
+
+
+if __name__ == "__main__":
+    main()
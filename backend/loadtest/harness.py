@@ -0,0 +1,169 @@
+# backend/loadtest/harness.py
+#
+# Shared plumbing for the Python benchmark suite (bench_micro.py,
+# load_flow.py): a throwaway database, an app built for benchmarking,
+# latency statistics, peak RSS and a result envelope that records the commit
+# and machine, so JSON results from two commits on the same box can be
+# compared:
+#
+#   python -m backend.loadtest.harness compare before.json after.json
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def isolated_database():
+    """Point DATABASE_URL at a fresh SQLite file unless one is set.
+
+    Must run before anything imports backend.database.base.
+    """
+    if "backend.database.base" in sys.modules:
+        raise RuntimeError("isolated_database() must run before the app is imported")
+    if os.environ.get("DATABASE_URL"):
+        return os.environ["DATABASE_URL"]
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ.setdefault("EXPORT_DIR", os.path.join(tmp, "exports"))
+    return os.environ["DATABASE_URL"]
+
+
+def bench_app(**config):
+    """create_app() with the schema created, no log file and a stress model."""
+    from backend.app import BASE_DIR, create_app
+
+    cfg = {"INIT_DB": True, "LOG_FILE": None, "SWAGGER": False, "MODEL_POLL_SECONDS": 0}
+    models_dir = os.path.join(BASE_DIR, "models")
+    if not any(n.startswith("stress_rf_model") and n.endswith(".pkl")
+               for n in (os.listdir(models_dir) if os.path.isdir(models_dir) else [])):
+        # no trained model in the tree: use a synthetic forest of the same shape
+        import joblib
+        from backend.loadtest.bench_stress_batching import load_model
+        models_dir = tempfile.mkdtemp(prefix="bench-models-")
+        joblib.dump(load_model(), os.path.join(models_dir, "stress_rf_model.pkl"))
+    cfg["MODELS_DIR"] = models_dir
+    cfg.update(config)
+    return create_app(cfg)
+
+
+def admin_headers():
+    from backend.core.auth import create_admin_jwt
+    return {"Authorization": "Bearer " + create_admin_jwt("bench")}
+
+
+def repeat(fn, min_time=0.5, min_runs=5, max_runs=10000):
+    """Call fn() until min_time has passed (at least min_runs times); returns seconds per call."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def latency_stats(seconds):
+    ms = np.asarray(seconds, dtype=float) * 1000.0
+    if not ms.size:
+        return {"n": 0}
+    return {
+        "n": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux (bytes on macOS)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def result(suite, data, **params):
+    return {"suite": suite, "env": environment(), "params": params,
+            "peak_rss_mb": peak_rss_mb(), "results": data}
+
+
+def emit(res, out=None):
+    text = json.dumps(res, indent=2)
+    if out:
+        with open(out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+###############################################################
+# COMPARING TWO RESULT FILES
+###############################################################
+
+def _flatten(obj, prefix=""):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from _flatten(v, f"{prefix}{k}.")
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            key = v.get("name", i) if isinstance(v, dict) else i
+            yield from _flatten(v, f"{prefix}{key}.")
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix[:-1], obj
+
+
+def compare(old, new, keys=("p50_ms", "p99_ms", "throughput_rps", "peak_rss_mb")):
+    a = dict(_flatten(old["results"]))
+    b = dict(_flatten(new["results"]))
+    a["peak_rss_mb"], b["peak_rss_mb"] = old["peak_rss_mb"], new["peak_rss_mb"]
+    rows = []
+    for k in a:
+        if k in b and k.rsplit(".", 1)[-1] in keys:
+            change = (b[k] - a[k]) / a[k] * 100 if a[k] else float("nan")
+            rows.append((k, a[k], b[k], change))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="compare two benchmark result files")
+    ap.add_argument("command", choices=("compare",))
+    ap.add_argument("old")
+    ap.add_argument("new")
+    args = ap.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"{old['suite']}: {old['env'].get('commit')} -> {new['env'].get('commit')}")
+    for k, a, b, change in compare(old, new):
+        print(f"  {k:<60} {a:>12.3f} {b:>12.3f} {change:+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
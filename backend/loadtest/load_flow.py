@@ -0,0 +1,133 @@
+# backend/loadtest/load_flow.py
+#
+# In-process load harness: N concurrent virtual participants each run the
+# study flow against the WSGI app (no server, no k6):
+#
+#   register -> session -> task start -> { task events, stress samples } x I -> finish
+#
+# Every request is timed per route; the output (JSON, see harness.py) has
+# latency percentiles per route and overall, throughput, error counts and
+# peak RSS.
+#
+#   python -m backend.loadtest.load_flow --participants 10 50 --iterations 20 --out flow.json
+
+import argparse
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from backend.loadtest import harness
+
+
+class VirtualParticipant(threading.Thread):
+    def __init__(self, app, n, args, start_evt):
+        super().__init__(name=f"vp-{n}", daemon=True)
+        self.client = app.test_client()
+        self.args = args
+        self.start_evt = start_evt
+        self.rng = np.random.default_rng(n)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failed = None
+
+    def call(self, route, method, url, **kw):
+        t0 = time.perf_counter()
+        r = getattr(self.client, method)(url, **kw)
+        self.latencies[route].append(time.perf_counter() - t0)
+        if r.status_code >= 400:
+            self.errors[f"{route} {r.status_code}"] += 1
+        return r
+
+    def run(self):
+        a = self.args
+        self.start_evt.wait()
+        try:
+            pid = self.call("register", "post", "/api/register", json={}).get_json()["participant_id"]
+            token = self.call("session", "post", "/api/session",
+                              json={"participant_id": pid}).get_json()["data"]["token"]
+            auth = {"Authorization": f"Bearer {token}"}
+            sid = self.call("task_start", "post", "/api/task/start",
+                            json={"task": "nback"}, headers=auth).get_json()["session_id"]
+
+            trial = 0
+            for _ in range(a.iterations):
+                events = [{"trial_index": trial + j, "correct": bool(self.rng.random() < 0.8),
+                           "reaction_time_ms": float(self.rng.lognormal(6, 0.3)), "difficulty_level": 3}
+                          for j in range(a.events)]
+                trial += a.events
+                if a.events == 1:
+                    self.call("task_event", "post", "/api/task/event",
+                              json={"session_id": sid, **events[0]}, headers=auth)
+                elif events:
+                    self.call("task_events", "post", "/api/task/events",
+                              json={"session_id": sid, "events": events}, headers=auth)
+                for _ in range(a.stress):
+                    rr = self.rng.normal(800, 50, a.beats).round().tolist()
+                    self.call("stress", "post", "/api/stress",
+                              json={"rr_intervals_ms": rr, "stream": a.stream}, headers=auth)
+                if a.think_ms:
+                    time.sleep(a.think_ms / 1000.0)
+
+            self.call("task_summary", "get", f"/api/task/summary/{sid}", headers=auth)
+            self.call("task_finish", "post", "/api/task/finish", json={"session_id": sid}, headers=auth)
+        except Exception as e:   # a broken flow is reported, not raised
+            self.failed = repr(e)
+
+
+def run_flow(app, n, args):
+    start_evt = threading.Event()
+    vps = [VirtualParticipant(app, i, args, start_evt) for i in range(n)]
+    for vp in vps:
+        vp.start()
+    t0 = time.perf_counter()
+    start_evt.set()
+    for vp in vps:
+        vp.join()
+    elapsed = time.perf_counter() - t0
+
+    routes = defaultdict(list)
+    errors = defaultdict(int)
+    for vp in vps:
+        for route, lat in vp.latencies.items():
+            routes[route].extend(lat)
+        for k, v in vp.errors.items():
+            errors[k] += v
+    total = [x for lat in routes.values() for x in lat]
+    return {
+        "name": f"flow[{n}]",
+        "participants": n,
+        "requests": len(total),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(total) / elapsed, 1),
+        "overall": harness.latency_stats(total),
+        "routes": {route: harness.latency_stats(lat) for route, lat in sorted(routes.items())},
+        "errors": dict(errors),
+        "failed_flows": [vp.failed for vp in vps if vp.failed],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="in-process study-flow load harness")
+    ap.add_argument("--participants", type=int, nargs="+", default=[10, 50])
+    ap.add_argument("--iterations", type=int, default=20, help="event/stress rounds per participant")
+    ap.add_argument("--events", type=int, default=5, help="task events per round (1 = single /event)")
+    ap.add_argument("--stress", type=int, default=1, help="stress samples per round")
+    ap.add_argument("--beats", type=int, default=8, help="RR intervals per stress sample")
+    ap.add_argument("--stream", action="store_true", help="send stress samples as streamed beats")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between rounds")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    harness.isolated_database()
+    app = harness.bench_app()
+    runs = [run_flow(app, n, args) for n in args.participants]
+    app.extensions["stress"].close()
+
+    harness.emit(harness.result("flow", runs, **{k: v for k, v in vars(args).items() if k != "out"}),
+                 args.out)
+
+
+if __name__ == "__main__":
+    main()
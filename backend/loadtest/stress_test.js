@@ -3,9 +3,20 @@ import { sleep } from 'k6';
 
 export const options = { vus: 20, duration: "20s" };
 
-export default function () {
+const JSON_HEADERS = { "Content-Type": "application/json" };
+
+export function setup() {
+  const reg = http.post("http://localhost:5000/api/register", "{}", { headers: JSON_HEADERS });
+  const pid = JSON.parse(reg.body).participant_id;
+  const sess = http.post("http://localhost:5000/api/session", JSON.stringify({ participant_id: pid }), {
+    headers: JSON_HEADERS
+  });
+  return { token: JSON.parse(sess.body).data.token };
+}
+
+export default function (data) {
   http.post("http://localhost:5000/api/stress", JSON.stringify({
     rr_intervals_ms: [750, 780, 790]
-  }), { headers: { "Content-Type": "application/json" } });
+  }), { headers: { ...JSON_HEADERS, Authorization: `Bearer ${data.token}` } });
   sleep(1);
 }
@@ -1,13 +1,40 @@
-# backend/middlewares/logging_middleware.py
+# backend/middlewares/db_session.py
+#
+# Request-scoped database session.
+#
+# get_db() opens one session per request on first use; the teardown hook
+# rolls it back if the request raised and always closes it, so the
+# connection goes back to the pool even when a route forgets or errors out.
+# Streaming responses outlive the request and keep opening their own
+# SessionLocal() inside the generator.
 
-from flask import request
+from flask import g
 
-def register_request_logging(app):
-    @app.before_request
-    def log_request():
+from backend.database.base import SessionLocal
+
+
+def get_db():
+    db = g.get("db")
+    if db is None:
+        db = g.db = SessionLocal()
+    return db
+
+
+def release_db():
+    # hand the connection back early, e.g. before a route blocks on other work
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+
+def register_db_session(app):
+    @app.teardown_request
+    def close_db(exc):
+        db = g.pop("db", None)
+        if db is None:
+            return
         try:
-            # lightweight log to stdout for dev; file logging handled in app.py
-            print(f"[REQ] {request.method} {request.path}")
-        except Exception:
-            # be defensive: don't break requests on logging failure
-            pass
+            if exc is not None:
+                db.rollback()
+        finally:
+            db.close()
@@ -0,0 +1,44 @@
+# backend/middlewares/lazy_docs.py
+#
+# Swagger UI without importing flasgger at startup.
+#
+# flasgger (and the jsonschema / yaml stack behind it) is only needed when
+# someone opens the API docs. LazyDocs wraps the app's WSGI callable and
+# answers the docs paths from a small Flask app that is built -- importing
+# flasgger and loading docs/swagger.yaml -- on the first docs request.
+
+import os
+import threading
+
+from flask import Flask
+
+DOCS_PREFIXES = ("/apidocs", "/apispec", "/flasgger_static")
+SWAGGER_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "docs", "swagger.yaml")
+
+
+def build_docs_app(template_file=SWAGGER_FILE):
+    from flasgger import Swagger
+
+    docs = Flask("backend.docs")
+    Swagger(docs, template_file=template_file)
+    return docs
+
+
+class LazyDocs:
+    def __init__(self, wsgi_app, factory=build_docs_app):
+        self.wsgi_app = wsgi_app
+        self.factory = factory
+        self._docs = None
+        self._lock = threading.Lock()
+
+    def docs_app(self):
+        if self._docs is None:
+            with self._lock:
+                if self._docs is None:
+                    self._docs = self.factory()
+        return self._docs
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(DOCS_PREFIXES):
+            return self.docs_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
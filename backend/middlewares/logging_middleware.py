@@ -1,13 +1,68 @@
 # backend/middlewares/logging_middleware.py
+#
+# One structured access-log record per request, through the "backend"
+# logger (and so through the queue in services/log_pipeline.py).
+#
+# Each request gets an id -- the client's X-Request-ID if it sent one, else a
+# random one -- stored on g.request_id, echoed in the X-Request-ID response
+# header and attached to every record logged while the request runs.
+#
+# High-volume routes are sampled: `sample_rates` maps a URL rule to the
+# fraction of its requests that are logged (1 by default). Errors (status
+# >= 400) and requests slower than `slow_ms` are always logged, with the
+# sample rate recorded so counts can be scaled back up.
 
-from flask import request
+import logging
+import os
+import random
+import time
+
+from flask import g, request
+
+logger = logging.getLogger("backend.access")
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def register_request_logging(app, sample_rates=None, slow_ms=500.0):
+    rates = dict(sample_rates or {})
+    slow = float(slow_ms) / 1000.0
+    rand = random.random
 
-def register_request_logging(app):
     @app.before_request
-    def log_request():
-        try:
-            # lightweight log to stdout for dev; file logging handled in app.py
-            print(f"[REQ] {request.method} {request.path}")
-        except Exception:
-            # be defensive: don't break requests on logging failure
-            pass
+    def start_request():
+        rid = request.headers.get(REQUEST_ID_HEADER)
+        g.request_id = rid[:64] if rid else os.urandom(8).hex()
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        start = g.pop("request_start", None)
+        rid = g.get("request_id")
+        if rid is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = rid
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+
+        req = request._get_current_object()
+        route = req.url_rule.rule if req.url_rule is not None else None
+        rate = rates.get(route, 1.0)
+        status = response.status_code
+        if rate < 1.0 and status < 400 and elapsed < slow and rand() >= rate:
+            return response
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+
+        logger.info("%s %s %s", req.method, req.path, status, extra={
+            "request_id": rid,
+            "method": req.method,
+            "path": req.path,
+            "route": route,
+            "status": status,
+            "latency_ms": round(elapsed * 1000.0, 3),
+            "sample_rate": rate,
+            "remote_addr": req.remote_addr,
+        })
+        return response
@@ -0,0 +1,78 @@
+# backend/middlewares/metrics.py
+#
+# Request and SQL instrumentation feeding services/metrics.py.
+#
+# register_metrics() times every request from before_request to
+# after_request and records it under the matched URL rule (so
+# /api/task/summary/<int:session_id> is one series, not one per id).
+# instrument_engine() hooks SQLAlchemy's cursor events: every statement
+# counts towards the process totals and, when it runs on a thread that is
+# handling a request, towards that request's statement count and DB time.
+# Background writers (stress flush, task events, controller history) show up
+# as context="background".
+
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+
+from backend.services import metrics
+
+_local = threading.local()
+_instrumented = set()
+
+UNMATCHED = "<unmatched>"
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_t0")
+    if not starts:
+        return
+    dt = time.perf_counter() - starts.pop()
+    acc = getattr(_local, "sql", None)
+    if acc is not None:
+        acc[0] += 1
+        acc[1] += dt
+        ctx = ("request",)
+    else:
+        ctx = ("background",)
+    metrics.db_statements.inc(ctx)
+    metrics.db_seconds.inc(ctx, dt)
+
+
+def instrument_engine(engine):
+    if id(engine) in _instrumented:
+        return
+    _instrumented.add(id(engine))
+    event.listen(engine, "before_cursor_execute", _before_cursor)
+    event.listen(engine, "after_cursor_execute", _after_cursor)
+
+
+def register_metrics(app):
+    @app.before_request
+    def start_timer():
+        _local.sql = [0, 0.0]
+        _local.start = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        start = _local.__dict__.pop("start", None)
+        acc = _local.__dict__.pop("sql", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        req = request._get_current_object()   # one context lookup, not one per attribute
+        rule = req.url_rule
+        key = (req.method, rule.rule if rule is not None else UNMATCHED)
+
+        metrics.http_latency.observe(elapsed, key)
+        metrics.http_requests.inc(key + (response.status_code,))
+        metrics.http_sql_statements.observe(acc[0], key)
+        if acc[1]:
+            metrics.http_db_seconds.inc(key, acc[1])
+        return response
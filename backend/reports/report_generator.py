@@ -1,34 +1,107 @@
-import matplotlib.pyplot as plt
+# backend/reports/report_generator.py
+#
+# Participant PDF report: trial correctness and the stress EMA over time.
+#
+# Figures are built with the object-oriented API on an explicit Agg canvas,
+# never through pyplot, so nothing touches matplotlib's global figure
+# registry: renders are safe to run concurrently and every figure is freed
+# with its last reference. Series longer than the plot's pixel budget are
+# downsampled with Largest-Triangle-Three-Buckets (LTTB), which keeps the
+# visual shape -- peaks, dips, first and last point -- of a long session.
+
 import io
-import json
-from datetime import datetime
 
-def generate_simple_report(participant_id, task_logs, stress_logs):
-    # task_logs: list of dicts with timestamp & correct fields
-    # stress_logs: list of dicts with timestamp & ema_high
-    fig, axes = plt.subplots(2, 1, figsize=(8, 6), tight_layout=True)
+import numpy as np
+
+FIGSIZE = (8, 6)
+DPI = 100
+
+# at most ~one point per horizontal pixel of an axis
+MAX_POINTS = FIGSIZE[0] * DPI
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the `threshold` points LTTB keeps from (x, y); x ascending."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold is None or threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        if i == threshold - 3:
+            end = n - 1
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            nxt = min(int((i + 2) * every) + 1, n - 1)
+            avg_x, avg_y = x[end:nxt].mean(), y[end:nxt].mean()
+
+        # the point forming the largest triangle with the last kept point
+        # and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _series(rows, key, value):
+    # (datetime64 timestamps, float values) sorted by time, missing values dropped
+    t = np.array([r["timestamp"] for r in rows], dtype="datetime64[us]")
+    v = np.array([value(r.get(key)) for r in rows], dtype=float)
+    keep = ~np.isnan(v) & ~np.isnat(t)
+    t, v = t[keep], v[keep]
+    order = np.argsort(t, kind="stable")
+    return t[order], v[order]
+
+
+def downsample(t, v, max_points):
+    idx = lttb_indices(t.astype("int64"), v, max_points)
+    return t[idx], v[idx]
+
+
+def render_report(participant_id, task_logs, stress_logs, max_points=MAX_POINTS):
+    """PDF bytes for one participant.
+
+    task_logs: dicts with timestamp & correct; stress_logs: dicts with
+    timestamp & ema_high. max_points=None plots every point.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGSIZE, dpi=DPI, tight_layout=True)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(2, 1)
+    fig.suptitle(f"Participant {participant_id}")
 
     # Task accuracy over time
     if task_logs:
-        times = [t['timestamp'] for t in task_logs]
-        acc = []
-        # compute rolling accuracy by trial (0/1) - simplistic
-        values = [1 if t.get("correct") else 0 for t in task_logs]
-        acc = values
-        axes[0].plot(times, acc, marker='o', linestyle='-')
-        axes[0].set_title("Trial Correct (1) / Incorrect (0)")
-        axes[0].set_ylabel("Correct")
+        t, v = _series(task_logs, "correct", lambda c: 1 if c else 0)
+        t, v = downsample(t, v, max_points)
+        axes[0].plot(t.astype(object), v, marker='o', markersize=3, linestyle='-')
+    axes[0].set_title("Trial Correct (1) / Incorrect (0)")
+    axes[0].set_ylabel("Correct")
 
     # Stress EMA over time
     if stress_logs:
-        stimes = [s['timestamp'] for s in stress_logs]
-        ema = [s.get('ema_high', 0) for s in stress_logs]
-        axes[1].plot(stimes, ema, marker='.', linestyle='-')
-        axes[1].set_title("EMA High-Probability over time")
-        axes[1].set_ylabel("EMA High")
+        t, v = _series(stress_logs, "ema_high", lambda e: np.nan if e is None else e)
+        t, v = downsample(t, v, max_points)
+        axes[1].plot(t.astype(object), v, marker='.', linestyle='-')
+    axes[1].set_title("EMA High-Probability over time")
+    axes[1].set_ylabel("EMA High")
 
-    bio = io.BytesIO()
     fig.autofmt_xdate()
-    plt.savefig(bio, format='pdf')
-    bio.seek(0)
-    return bio
+    bio = io.BytesIO()
+    fig.savefig(bio, format='pdf')
+    return bio.getvalue()
+
+
+def generate_simple_report(participant_id, task_logs, stress_logs):
+    # kept for callers that want a file-like object
+    return io.BytesIO(render_report(participant_id, task_logs, stress_logs))
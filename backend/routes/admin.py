@@ -1,39 +1,27 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, Response, request, jsonify, send_file
 from datetime import datetime, timedelta
-import jwt, io, csv, json
-from sqlalchemy.orm import Session as DBSession
+import jwt, json, os, shutil, tempfile
 from ..database.models import AdminUser, Participant, Session as DBSessionModel, TaskLog, StressLog
-from ..database.base import get_engine, get_session_local
+from ..database.base import SessionLocal
+from ..middlewares.db_session import get_db, release_db
+from ..core.auth import JWT_ALGO, JWT_SECRET, require_admin
+from ..services.streaming import csv_stream
+from ..services import columnar
+from ..services.participants import participants_page
+from ..services.password_pool import password_pool, PasswordPoolBusy
 
 admin_bp = Blueprint("admin", __name__)
 
-JWT_SECRET = current_app.config.get("JWT_SECRET", "dev-secret")
-JWT_ALGO = "HS256"
 JWT_EXP_MINUTES = 720
+EXPORT_CHUNK_ROWS = 1000
 
 def create_jwt(payload):
     exp = datetime.utcnow() + timedelta(minutes=JWT_EXP_MINUTES)
     payload.update({"exp": exp})
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
 
-def admin_required(fn):
-    from functools import wraps
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        auth = request.headers.get("Authorization", "")
-        token = None
-        if auth.startswith("Bearer "):
-            token = auth.split(" ", 1)[1]
-        if not token:
-            return jsonify({"ok": False, "error": "missing token"}), 401
-        try:
-            payload = jwt.decode(token, current_app.config.get("JWT_SECRET", "dev-secret"), algorithms=[JWT_ALGO])
-            # optionally validate user exists
-        except Exception as e:
-            return jsonify({"ok": False, "error": "invalid token", "detail": str(e)}), 401
-        return fn(*args, **kwargs)
-    return wrapper
+# verified-token cache shared with the other admin routes
+admin_required = require_admin
 
 @admin_bp.route("/login", methods=["POST"])
 def login():
@@ -43,69 +31,102 @@ def login():
     if not username or not password:
         return jsonify({"ok": False, "error": "username/password required"}), 400
 
-    engine = get_engine()
-    SessionLocal = get_session_local()
-    db: DBSession = SessionLocal()
+    user = get_db().query(AdminUser).filter(AdminUser.username == username).first()
+    release_db()
     try:
-        user = db.query(AdminUser).filter(AdminUser.username == username).first()
-        if not user or not check_password_hash(user.password_hash, password):
-            return jsonify({"ok": False, "error": "invalid credentials"}), 401
-        token = create_jwt({"sub": user.username})
-        return jsonify({"ok": True, "data": {"token": token}})
-    finally:
-        db.close()
+        valid = user is not None and password_pool.verify(user.password_hash, password)
+    except PasswordPoolBusy as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    if not valid:
+        return jsonify({"ok": False, "error": "invalid credentials"}), 401
+    token = create_jwt({"sub": user.username, "role": "admin"})
+    return jsonify({"ok": True, "data": {"token": token}})
 
 @admin_bp.route("/participants", methods=["GET"])
 @admin_required
 def participants_list():
-    SessionLocal = get_session_local()
-    db = SessionLocal()
-    try:
-        q = db.query(Participant).order_by(Participant.created_at.desc()).limit(500)
-        rows = []
-        for p in q:
-            rows.append({
-                "participant_id": p.participant_id,
-                "assignment_group": p.assignment_group,
-                "created_at": p.created_at.isoformat()
-            })
-        return jsonify({"ok": True, "data": rows})
-    finally:
-        db.close()
+    db = get_db()
+    body, status = participants_page(db, request.args)
+    return jsonify(body), status
+
+def json_array(items):
+    # streams a JSON array one element at a time
+    yield "["
+    first = True
+    for item in items:
+        yield json.dumps(item, default=str) if first else ", " + json.dumps(item, default=str)
+        first = False
+    yield "]"
+
+def buffered(pieces, size=64 * 1024):
+    parts, n = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        n += len(piece)
+        if n >= size:
+            yield "".join(parts).encode("utf-8")
+            parts, n = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+def attachment(body, filename, mimetype):
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={filename}"
+    })
 
 @admin_bp.route("/export/json/<participant_id>", methods=["GET"])
 @admin_required
 def export_json(participant_id):
-    SessionLocal = get_session_local()
-    db = SessionLocal()
-    try:
-        logs = db.query(TaskLog).filter(TaskLog.participant_id == participant_id).order_by(TaskLog.timestamp.asc()).all()
-        stress = db.query(StressLog).filter(StressLog.participant_id == participant_id).order_by(StressLog.timestamp.asc()).all()
-        out = {
-            "participant_id": participant_id,
-            "task_logs": [ { "task_name": l.task_name, "trial": l.trial_index, "event": l.event, "correct": l.correct, "rt": l.reaction_time_ms, "ts": l.timestamp.isoformat(), "extra": l.extra } for l in logs ],
-            "stress_logs": [ { "ema_high": s.ema_high, "raw_proba": s.raw_proba, "smoothed_label": s.smoothed_label, "difficulty": s.difficulty, "ts": s.timestamp.isoformat() } for s in stress ]
-        }
-        bio = io.BytesIO()
-        bio.write(json.dumps(out, default=str, indent=2).encode("utf-8"))
-        bio.seek(0)
-        return send_file(bio, download_name=f"{participant_id}_export.json", as_attachment=True, mimetype="application/json")
-    finally:
-        db.close()
+    def generate():
+        db = SessionLocal()
+        try:
+            logs = db.query(TaskLog).filter(TaskLog.participant_id == participant_id).order_by(TaskLog.timestamp.asc()).yield_per(EXPORT_CHUNK_ROWS)
+            stress = db.query(StressLog).filter(StressLog.participant_id == participant_id).order_by(StressLog.timestamp.asc()).yield_per(EXPORT_CHUNK_ROWS)
+            yield '{"participant_id": %s, "task_logs": ' % json.dumps(participant_id)
+            yield from json_array({ "task_name": l.task_name, "trial": l.trial_index, "event": l.event, "correct": l.correct, "rt": l.reaction_time_ms, "ts": l.timestamp.isoformat(), "extra": l.extra } for l in logs)
+            yield ', "stress_logs": '
+            yield from json_array({ "ema_high": s.ema_high, "raw_proba": s.raw_proba, "smoothed_label": s.smoothed_label, "difficulty": s.difficulty, "ts": s.timestamp.isoformat() } for s in stress)
+            yield "}"
+        finally:
+            db.close()
+    return attachment(buffered(generate()), f"{participant_id}_export.json", "application/json")
 
 @admin_bp.route("/export/csv/<participant_id>", methods=["GET"])
 @admin_required
 def export_csv(participant_id):
-    SessionLocal = get_session_local()
-    db = SessionLocal()
+    def generate():
+        db = SessionLocal()
+        try:
+            logs = db.query(TaskLog).filter(TaskLog.participant_id == participant_id).order_by(TaskLog.timestamp.asc()).yield_per(EXPORT_CHUNK_ROWS)
+            rows = ([l.participant_id, l.task_name, l.trial_index, l.event, l.correct, l.reaction_time_ms, l.timestamp.isoformat(), json.dumps(l.extra or {})] for l in logs)
+            yield from csv_stream(["participant_id","task_name","trial","event","correct","reaction_time_ms","timestamp","extra"], rows)
+        finally:
+            db.close()
+    return attachment(generate(), f"{participant_id}_tasklogs.csv", "text/csv")
+
+@admin_bp.route("/export/columnar/<table>", methods=["GET"])
+@admin_required
+def export_columnar(table):
+    # typed columns for analysis: parquet when pyarrow is installed, else .npz
+    if table not in columnar.TABLES:
+        return jsonify({"ok": False, "error": "table must be one of: " + ", ".join(columnar.TABLES)}), 404
+    fmt = request.args.get("format")
+    pid = request.args.get("participant_id")
+    compress = request.args.get("compress", "0") in ("1", "true")
+
+    tmpdir = tempfile.mkdtemp(prefix="columnar_")
     try:
-        logs = db.query(TaskLog).filter(TaskLog.participant_id == participant_id).order_by(TaskLog.timestamp.asc()).all()
-        bio = io.StringIO()
-        writer = csv.writer(bio)
-        writer.writerow(["participant_id","task_name","trial","event","correct","reaction_time_ms","timestamp","extra"])
-        for l in logs:
-            writer.writerow([l.participant_id, l.task_name, l.trial_index, l.event, l.correct, l.reaction_time_ms, l.timestamp.isoformat(), json.dumps(l.extra or {})])
-        bio.seek(0)
-        return send_file(io.BytesIO(bio.getvalue().encode("utf-8")), download_name=f"{participant_id}_tasklogs.csv", as_attachment=True, mimetype="text/csv")
+        path = columnar.export_table(get_db(), table, os.path.join(tmpdir, f"{table}_logs"),
+                                     participant_id=pid, fmt=fmt, compress=compress)
+    except ValueError as e:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        return jsonify({"ok": False, "error": str(e)}), 400
     finally:
-        db.close()
+        release_db()
+
+    name = os.path.basename(path)
+    if pid:
+        name = f"{pid}_{name}"
+    resp = send_file(path, as_attachment=True, download_name=name, mimetype="application/octet-stream")
+    resp.call_on_close(lambda: shutil.rmtree(tmpdir, ignore_errors=True))
+    return resp
@@ -1,64 +1,70 @@
-from flask import Blueprint, request, jsonify, send_file
-from functools import wraps
-from datetime import datetime
-import io, csv, json, zipfile, os, jwt
+from flask import Blueprint, Response, request, jsonify, send_file
+import atexit, json, os
+from datetime import datetime, timezone
 
-from backend.database.base import SessionLocal
-from backend.database.models import Participant, TaskLog, StressLog
+from backend.core.auth import require_admin
+from backend.database.base import SessionLocal, DATABASE_URL
+from backend.database.models import Participant
+from backend.middlewares.db_session import get_db, release_db
+from backend.services.streaming import csv_stream, ndjson_lines, zip_stream
+from backend.services.export_jobs import ExportJobManager
+from backend.services.participants import participant_counts, participants_page
+from backend.services.reports import ReportService
+from backend.services.rollups import DEFAULT_POINTS, SERIES, query_series
+from backend.services.timeline import iter_timeline, iter_participant_timelines, pid_order, timeline_row
 
 bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
-JWT_SECRET = os.environ.get("JWT_SECRET", "change_this_secret")
+# rows fetched per round trip while streaming exports
+EXPORT_CHUNK_ROWS = 1000
 
-def require_admin(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        auth = request.headers.get("Authorization", "")
-        if not auth.startswith("Bearer "):
-            return jsonify({"ok": False, "error": "missing token"}), 401
-        try:
-            payload = jwt.decode(auth.split(" ",1)[1], JWT_SECRET, algorithms=["HS256"])
-        except Exception:
-            return jsonify({"ok": False, "error": "invalid token"}), 401
-        if payload.get("role") != "admin":
-            return jsonify({"ok": False, "error": "admin required"}), 403
-        return fn(*args, **kwargs)
-    return wrapper
+# background cohort exports (see services/export_jobs.py)
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "exports"))
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", 0)) or None
+EXPORT_SHARD_SIZE = int(os.environ.get("EXPORT_SHARD_SIZE", 200))
+
+export_jobs = ExportJobManager(DATABASE_URL, EXPORT_DIR, workers=EXPORT_WORKERS, shard_size=EXPORT_SHARD_SIZE)
+atexit.register(export_jobs.shutdown)
+
+# cached PDF reports (see services/reports.py)
+REPORT_DIR = os.environ.get("REPORT_DIR", os.path.join(EXPORT_DIR, "reports"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+# how long a request waits for a fresh render before answering 202
+REPORT_WAIT_SECONDS = float(os.environ.get("REPORT_WAIT_SECONDS", 10))
+
+reports = ReportService(DATABASE_URL, REPORT_DIR, workers=REPORT_WORKERS)
+atexit.register(reports.shutdown)
+
+def iter_logs(db, pid):
+    return (timeline_row(r) for r in iter_timeline(db, pid, chunk_rows=EXPORT_CHUNK_ROWS))
 
 def collect_logs(db, pid):
-    rows = []
-    for t in db.query(TaskLog).filter_by(participant_id=pid).all():
-        rows.append({
-            "timestamp": t.timestamp.isoformat(),
-            "task": t.task_name,
-            "trial": t.trial_index,
-            "event": t.event,
-            "extra": t.extra
-        })
-    for s in db.query(StressLog).filter_by(participant_id=pid).all():
-        rows.append({
-            "timestamp": s.timestamp.isoformat(),
-            "task": "stress",
-            "trial": None,
-            "event": "stress",
-            "extra": s.features
-        })
-    rows.sort(key=lambda r: r["timestamp"])
-    return rows
+    return list(iter_logs(db, pid))
+
+def parse_utc(value):
+    # naive UTC, like the stored timestamps
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+def attachment(body, filename, mimetype):
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={filename}"
+    })
 
 @bp.route("/participants", methods=["GET"])
 @require_admin
 def participants():
-    db = SessionLocal()
-    try:
-        data = [{
-            "participant_id": p.participant_id,
-            "created_at": p.created_at.isoformat(),
-            "assignment_group": p.assignment_group
-        } for p in db.query(Participant).all()]
-        return jsonify({"ok": True, "data": data})
-    finally:
-        db.close()
+    db = get_db()
+    body, status = participants_page(db, request.args)
+    return jsonify(body), status
+
+@bp.route("/participants/count", methods=["GET"])
+@require_admin
+def participants_count():
+    # cached (services/participants.py); no page of rows is read
+    return jsonify({"ok": True, "total": participant_counts.get(get_db(), request.args.get("group"))})
 
 @bp.route("/export", methods=["GET"])
 @require_admin
@@ -66,32 +72,109 @@ def export_csv():
     pid = request.args.get("participant_id")
     if not pid:
         return jsonify({"ok": False, "error": "participant_id required"}), 400
-    db = SessionLocal()
-    try:
-        rows = collect_logs(db, pid)
-        buf = io.StringIO()
-        w = csv.writer(buf)
-        w.writerow(["timestamp","task","trial","event","extra"])
-        for r in rows:
-            w.writerow([r["timestamp"], r["task"], r["trial"], r["event"], json.dumps(r["extra"])])
-        mem = io.BytesIO(buf.getvalue().encode())
-        return send_file(mem, as_attachment=True, download_name=f"{pid}.csv")
-    finally:
-        db.close()
+
+    def generate():
+        db = SessionLocal()
+        try:
+            rows = ([r["timestamp"], r["task"], r["trial"], r["event"], json.dumps(r["extra"])]
+                    for r in iter_logs(db, pid))
+            yield from csv_stream(["timestamp","task","trial","event","extra"], rows)
+        finally:
+            db.close()
+
+    return attachment(generate(), f"{pid}.csv", "text/csv")
 
 @bp.route("/export_all", methods=["GET"])
 @require_admin
 def export_all():
-    db = SessionLocal()
+    def generate():
+        db = SessionLocal()
+        try:
+            # one ordered pass over each log table for the whole cohort
+            pids = (
+                p.participant_id for p in
+                db.query(Participant.participant_id)
+                .order_by(pid_order(db, Participant.participant_id))
+                .yield_per(EXPORT_CHUNK_ROWS)
+            )
+            timelines = iter_participant_timelines(db, pids, chunk_rows=EXPORT_CHUNK_ROWS)
+            entries = (
+                (f"{pid}.json", ndjson_lines(timeline_row(r) for r in records))
+                for pid, records in timelines
+            )
+            yield from zip_stream(entries)
+        finally:
+            db.close()
+
+    return attachment(generate(), "all_logs.zip", "application/zip")
+
+@bp.route("/export_jobs", methods=["POST"])
+@require_admin
+def start_export_job():
+    job = export_jobs.submit(SessionLocal, requested_by=request.admin_user)
+    return jsonify({"ok": True, "data": job}), 202
+
+@bp.route("/export_jobs/<job_id>", methods=["GET"])
+@require_admin
+def export_job_status(job_id):
+    job = export_jobs.get(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "unknown export job"}), 404
+    return jsonify({"ok": True, "data": job})
+
+@bp.route("/export_jobs/<job_id>/download", methods=["GET"])
+@require_admin
+def export_job_download(job_id):
+    job = export_jobs.get(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "unknown export job"}), 404
+    if job["state"] != "done":
+        return jsonify({"ok": False, "error": f"export is {job['state']}"}), 409
+    return send_file(export_jobs.artifact_path(job_id), as_attachment=True,
+                     download_name="all_logs.zip", mimetype="application/zip")
+
+@bp.route("/report", methods=["GET"])
+@require_admin
+def participant_report():
+    pid = request.args.get("participant_id")
+    if not pid:
+        return jsonify({"ok": False, "error": "participant_id required"}), 400
+
+    db = get_db()
+    if not db.query(Participant.id).filter_by(participant_id=pid).first():
+        return jsonify({"ok": False, "error": "unknown participant"}), 404
+    watermark = reports.watermark(db, pid)
+    # don't hold a pooled connection while the render runs
+    release_db()
+
     try:
-        mem = io.BytesIO()
-        z = zipfile.ZipFile(mem, "w")
-        for p in db.query(Participant).all():
-            rows = collect_logs(db, p.participant_id)
-            csv_text = "\n".join([json.dumps(r) for r in rows])
-            z.writestr(f"{p.participant_id}.json", csv_text)
-        z.close()
-        mem.seek(0)
-        return send_file(mem, as_attachment=True, download_name="all_logs.zip")
-    finally:
-        db.close()
+        key, path = reports.get(pid, watermark, wait=REPORT_WAIT_SECONDS)
+    except Exception as e:
+        return jsonify({"ok": False, "error": f"report failed: {e}"}), 500
+    if path is None:
+        return jsonify({"ok": True, "data": {"state": "rendering", "key": key}}), 202
+    return send_file(path, mimetype="application/pdf", as_attachment=True,
+                     download_name=f"{pid}_report.pdf", etag=key, max_age=0)
+
+@bp.route("/series", methods=["GET"])
+@require_admin
+def participant_series():
+    # bucketed chart series from the rollups (see services/rollups.py);
+    # ?series=ema_high,accuracy&start=ISO&end=ISO&points=N
+    pid = request.args.get("participant_id")
+    if not pid:
+        return jsonify({"ok": False, "error": "participant_id required"}), 400
+    names = [s for s in request.args.get("series", "ema_high").split(",") if s]
+    unknown = [s for s in names if s not in SERIES]
+    if unknown:
+        return jsonify({"ok": False, "error": f"unknown series: {', '.join(unknown)}"}), 400
+    try:
+        start, end = (parse_utc(request.args[k]) if request.args.get(k) else None
+                      for k in ("start", "end"))
+        points = int(request.args.get("points", DEFAULT_POINTS))
+    except ValueError:
+        return jsonify({"ok": False, "error": "start/end must be ISO timestamps, points an integer"}), 400
+
+    db = get_db()
+    data = {name: query_series(db, name, pid, start, end, points) for name in names}
+    return jsonify({"ok": True, "data": data})
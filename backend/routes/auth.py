@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from backend.database.base import SessionLocal
+from backend.middlewares.db_session import get_db, release_db
 from backend.database.user import User
+from backend.services.password_pool import password_pool, PasswordPoolBusy
 import jwt
 from datetime import datetime, timedelta
 import os
@@ -27,13 +27,20 @@ def signup():
     if not email or not password:
         return jsonify({"ok": False, "error": "missing fields"}), 400
 
-    db = SessionLocal()
-    if db.query(User).filter_by(email=email).first():
+    if get_db().query(User).filter_by(email=email).first():
         return jsonify({"ok": False, "error": "user exists"}), 400
+    release_db()
+
+    try:
+        pwhash = password_pool.hash(password)
+    except PasswordPoolBusy as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+
+    db = get_db()
 
     user = User(
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=pwhash,
         role="user"
     )
     db.add(user)
@@ -46,10 +53,14 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
-    db = SessionLocal()
-    user = db.query(User).filter_by(email=email).first()
+    user = get_db().query(User).filter_by(email=email).first()
+    release_db()
 
-    if not user or not check_password_hash(user.password_hash, password):
+    try:
+        valid = user is not None and password_pool.verify(user.password_hash, password)
+    except PasswordPoolBusy as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    if not valid:
         return jsonify({"ok": False, "error": "invalid credentials"}), 401
 
     return jsonify({"ok": True, "token": create_token(user)})
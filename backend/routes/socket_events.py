@@ -0,0 +1,51 @@
+from flask_socketio import SocketIO, join_room, leave_room
+
+from backend.core.auth import AuthError, verify_admin_token
+from backend.services.realtime_events import MONITOR_ROOM, broadcaster_for
+from backend.services.rr_binary import RRPacketError, decode_rr_packet
+
+# Socket.IO server for the app. Admin dashboards join the monitor room and
+# receive coalesced `monitor_frame` events (services/realtime_events.py);
+# POST /api/stress publishes to it via emit_monitor_update(). Wearables may
+# send binary RR packets (services/rr_binary.py) as "rr" events instead of
+# posting them.
+
+def init_socketio(app, cfg):
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode=cfg["SOCKETIO_ASYNC_MODE"])
+    # created here so the frames use the app's tick rate / encoding;
+    # emit_monitor_update() finds it by server
+    broadcaster = broadcaster_for(socketio, tick_hz=cfg["MONITOR_TICK_HZ"], encoding=cfg["MONITOR_ENCODING"])
+    register_monitor_handlers(socketio)
+    register_rr_handlers(socketio)
+    return socketio, broadcaster
+
+def register_monitor_handlers(socketio):
+    @socketio.on("join_monitor")
+    def join_monitor(data=None):
+        token = (data or {}).get("token") if isinstance(data, dict) else None
+        if not token:
+            return {"ok": False, "error": "missing token"}
+        try:
+            verify_admin_token(token)
+        except AuthError as e:
+            return {"ok": False, "error": e.message}
+        join_room(MONITOR_ROOM)
+        return {"ok": True}
+
+    @socketio.on("leave_monitor")
+    def leave_monitor(data=None):
+        leave_room(MONITOR_ROOM)
+        return {"ok": True}
+
+def register_rr_handlers(socketio):
+    # imported here: backend.app imports this module while building the app
+    from backend.app import stress_update
+
+    @socketio.on("rr")
+    def rr_packet(data):
+        """emit("rr", packet, callback) acknowledges with the body POST /api/stress returns."""
+        try:
+            token, seq, rr, stream = decode_rr_packet(data)
+        except (RRPacketError, TypeError) as e:
+            return {"ok": False, "error": str(e)}
+        return stress_update(token, rr, stream, seq)[0]
@@ -0,0 +1,202 @@
+from flask import Blueprint, current_app, request, jsonify
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime
+import atexit, logging, math, os
+
+from backend.core.auth import AuthError, bearer_token, require_session, resolve_session, verify_admin_token
+from backend.database.base import SessionLocal
+from backend.middlewares.db_session import get_db, release_db
+from backend.database.models import TaskSession
+from backend.services.difficulty_controller import GAIN_KEYS
+from backend.services.task_ingest import TaskEventWriter, write_events
+from backend.services.task_summary import get_summary, new_summary, summary_dict
+
+bp = Blueprint("task", __name__, url_prefix="/api/task")
+logger = logging.getLogger("backend")
+
+# single /event calls are group-committed (see services/task_ingest.py)
+TASK_EVENT_MAX_BATCH = int(os.environ.get("TASK_EVENT_MAX_BATCH", 500))
+TASK_EVENT_MAX_WAIT_MS = float(os.environ.get("TASK_EVENT_MAX_WAIT_MS", 20))
+TASK_EVENT_COMMIT_TIMEOUT = 10.0
+MAX_EVENTS_PER_BATCH = 1000
+
+event_writer = TaskEventWriter(SessionLocal, max_batch=TASK_EVENT_MAX_BATCH, max_wait_ms=TASK_EVENT_MAX_WAIT_MS)
+atexit.register(event_writer.close)
+
+TRIAL_FIELDS = ("stimulus", "response", "correct", "reaction_time_ms", "difficulty_level", "stress_level")
+
+def load_task_session(db, session_id):
+    ts = db.get(TaskSession, session_id) if isinstance(session_id, int) else None
+    if not ts or ts.participant_id != request.participant_id:
+        return None
+    return ts
+
+def _number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+
+def check_fields(ev):
+    # every value must fit its TaskTrial / TaskLog column; a bad one would
+    # otherwise fail inside the shared group commit
+    if ev.get("correct") is not None and not isinstance(ev["correct"], bool):
+        raise ValueError("correct must be a boolean")
+    for k in ("reaction_time_ms", "stress_level"):
+        if ev.get(k) is not None and not _number(ev[k]):
+            raise ValueError(f"{k} must be a number")
+    level = ev.get("difficulty_level")
+    if level is not None and not (_number(level) and float(level).is_integer()):
+        raise ValueError("difficulty_level must be an integer")
+    if ev.get("response") is not None and not isinstance(ev["response"], (str, int, float)):
+        raise ValueError("response must be a string")
+    if ev.get("event") is not None and not (isinstance(ev["event"], str) and len(ev["event"]) <= 128):
+        raise ValueError("event must be a string")
+
+def event_rows(ts, ev, now):
+    trial_index = ev.get("trial_index")
+    if not isinstance(trial_index, int) or isinstance(trial_index, bool):
+        raise ValueError("trial_index required")
+    check_fields(ev)
+
+    trial = {"session_id": ts.id, "trial_index": trial_index, "timestamp": now}
+    for k in TRIAL_FIELDS:
+        if k in ev:
+            trial[k] = ev[k]
+    if trial.get("reaction_time_ms") is not None:
+        trial["reaction_time_ms"] = int(round(float(trial["reaction_time_ms"])))
+    if trial.get("difficulty_level") is not None:
+        trial["difficulty_level"] = int(trial["difficulty_level"])
+    if trial.get("response") is not None:
+        trial["response"] = str(trial["response"])
+
+    extra = {k: ev[k] for k in ("stimulus", "response", "difficulty_level", "stress_level") if k in ev}
+    extra["task_session_id"] = ts.id
+    log = {
+        "participant_id": ts.participant_id,
+        "session_token": request.session_token,
+        "task_name": ts.task_name,
+        "trial_index": trial_index,
+        "event": ev.get("event", "trial"),
+        "correct": ev.get("correct"),
+        "reaction_time_ms": ev.get("reaction_time_ms"),
+        "extra": extra,
+        "timestamp": now,
+    }
+    return trial, log
+
+@bp.route("/start", methods=["POST"])
+@require_session
+def start():
+    data = request.get_json() or {}
+    task = data.get("task")
+    if not task:
+        return jsonify({"ok": False, "error": "task required"}), 400
+    config = data.get("config") or {}
+    if not isinstance(config, dict):
+        return jsonify({"ok": False, "error": "config must be an object"}), 400
+    controller = config.get("controller")
+    if controller is not None:
+        if not isinstance(controller, dict):
+            return jsonify({"ok": False, "error": "config.controller must be an object"}), 400
+        for k in GAIN_KEYS:
+            if controller.get(k) is not None and not _number(controller[k]):
+                return jsonify({"ok": False, "error": f"config.controller.{k} must be a number"}), 400
+    db = get_db()
+    ts = TaskSession(participant_id=request.participant_id, task_name=task, config=config)
+    db.add(ts)
+    db.flush()
+    db.add(new_summary(ts))
+    db.commit()
+    # the difficulty controller writes this session's history from now on;
+    # config["controller"] may override setpoint / kp / ki / kd
+    stress = current_app.extensions.get("stress")
+    if stress is not None:
+        stress.controller.bind(request.session_token, ts.id, controller)
+    return jsonify({"ok": True, "session_id": ts.id})
+
+@bp.route("/event", methods=["POST"])
+@require_session
+def event():
+    data = request.get_json() or {}
+    db = get_db()
+    ts = load_task_session(db, data.get("session_id"))
+    if not ts:
+        return jsonify({"ok": False, "error": "unknown task session"}), 404
+    try:
+        trial, log = event_rows(ts, data, datetime.utcnow())
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    release_db()
+
+    # waits for the group commit that includes this event
+    try:
+        event_writer.submit(trial, log).result(timeout=TASK_EVENT_COMMIT_TIMEOUT)
+    except FutureTimeout:
+        return jsonify({"ok": False, "error": "event commit timed out"}), 503
+    except Exception:
+        logger.exception("task event write failed")
+        return jsonify({"ok": False, "error": "event could not be stored"}), 500
+    return jsonify({"ok": True})
+
+@bp.route("/events", methods=["POST"])
+@require_session
+def events():
+    data = request.get_json() or {}
+    evs = data.get("events")
+    if not isinstance(evs, list) or not evs:
+        return jsonify({"ok": False, "error": "events required"}), 400
+    if len(evs) > MAX_EVENTS_PER_BATCH:
+        return jsonify({"ok": False, "error": f"at most {MAX_EVENTS_PER_BATCH} events per batch"}), 413
+
+    db = get_db()
+    ts = load_task_session(db, data.get("session_id"))
+    if not ts:
+        return jsonify({"ok": False, "error": "unknown task session"}), 404
+
+    now = datetime.utcnow()
+    trials, logs = [], []
+    for i, ev in enumerate(evs):
+        if not isinstance(ev, dict):
+            return jsonify({"ok": False, "error": f"event {i}: object expected"}), 400
+        try:
+            trial, log = event_rows(ts, ev, now)
+        except (TypeError, ValueError) as e:
+            return jsonify({"ok": False, "error": f"event {i}: {e}"}), 400
+        trials.append(trial)
+        logs.append(log)
+
+    write_events(db, trials, logs)
+    db.commit()
+    return jsonify({"ok": True, "count": len(trials)})
+
+@bp.route("/finish", methods=["POST"])
+@require_session
+def finish():
+    data = request.get_json() or {}
+    db = get_db()
+    ts = load_task_session(db, data.get("session_id"))
+    if not ts:
+        return jsonify({"ok": False, "error": "unknown task session"}), 404
+    ts.end_time = datetime.utcnow()
+    db.commit()
+    stress = current_app.extensions.get("stress")
+    if stress is not None:
+        stress.controller.unbind(ts.id)
+    return jsonify({"ok": True})
+
+@bp.route("/summary/<int:session_id>", methods=["GET"])
+def summary(session_id):
+    # the owning participant's session token, or an admin token
+    token = bearer_token()
+    if not token:
+        return jsonify({"ok": False, "error": "missing token"}), 401
+    info = resolve_session(token)
+    if info is None:
+        try:
+            verify_admin_token(token)
+        except AuthError as e:
+            return jsonify({"ok": False, "error": e.message}), e.status
+
+    # one primary-key read; the row is kept current by write_events()
+    s = get_summary(get_db(), session_id)
+    if s is None or (info is not None and s.participant_id != info.participant_id):
+        return jsonify({"ok": False, "error": "unknown task session"}), 404
+    return jsonify({"ok": True, "summary": summary_dict(s)})
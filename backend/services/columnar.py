@@ -0,0 +1,352 @@
+# backend/services/columnar.py
+#
+# Columnar analytics export of StressLog and TaskLog.
+#
+# Every column is typed: numbers stay numbers, timestamps are datetime64[us],
+# StressLog.raw_proba and StressLog.features are flattened into fixed float32
+# columns (proba_0..proba_2, rmssd/sdnn/mean_rr/mean_hr), and the numeric
+# task parameters stored in TaskLog.extra become their own columns. Missing
+# or unconvertible values are NaN for floats and -1 for integer codes.
+#
+# Parquet is written (one row group per chunk) when pyarrow is installed;
+# otherwise the table goes to an .npz archive where string columns are
+# stored as int32 codes plus a `<name>_categories` array. The .npz is written
+# uncompressed by default so load_columnar() can memory-map every member in
+# place; pass compress=True for a smaller file that loads into memory.
+#
+#   python -m backend.services.columnar OUT_DIR [--participant P] [--format npz]
+
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+from sqlalchemy import select
+
+from backend.database.models import StressLog, TaskLog
+
+CHUNK_ROWS = 10000
+
+PROBA_COLUMNS = ("proba_0", "proba_1", "proba_2")
+FEATURE_COLUMNS = ("rmssd", "sdnn", "mean_rr", "mean_hr")
+TABLES = ("stress", "task")
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+###############################################################
+# ROW -> COLUMN CHUNKS
+###############################################################
+
+def _int_or_missing(v, lo, hi):
+    # TaskLog.extra is free-form JSON: anything that isn't an integer in
+    # range (e.g. "hard") is exported as missing rather than failing the
+    # whole export
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    elif isinstance(v, str):
+        try:
+            v = int(v.strip())
+        except ValueError:
+            return -1
+    return v if isinstance(v, int) and lo <= v <= hi else -1
+
+
+def _float_or_missing(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _ints(values, dtype):
+    try:
+        return np.array([-1 if v is None else v for v in values], dtype=dtype)
+    except (TypeError, ValueError, OverflowError):
+        info = np.iinfo(dtype)
+        return np.array([_int_or_missing(v, info.min, info.max) for v in values], dtype=dtype)
+
+
+def _floats(values, dtype=np.float32):
+    try:
+        return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    except (TypeError, ValueError):
+        return np.array([_float_or_missing(v) for v in values], dtype=dtype)
+
+
+def _times(values):
+    return np.array(values, dtype="datetime64[us]")
+
+
+def _fixed(rows, width):
+    # JSON float lists -> NaN-padded (n, width) block
+    out = np.full((len(rows), width), np.nan, dtype=np.float32)
+    for i, vals in enumerate(rows):
+        if vals:
+            vals = vals[:width]
+            out[i, :len(vals)] = vals
+    return out
+
+
+def _as_obj(v):
+    if isinstance(v, str):
+        try:
+            return json.loads(v)
+        except ValueError:
+            return None
+    return v
+
+
+def _stress_columns(part):
+    proba = _fixed([_as_obj(r.raw_proba) for r in part], len(PROBA_COLUMNS))
+    feats = [_as_obj(r.features) or {} for r in part]
+    numeric = {
+        "id": np.array([r.id for r in part], dtype=np.int64),
+        "timestamp": _times([r.timestamp for r in part]),
+        "ema_high": _floats([r.ema_high for r in part], np.float64),
+        "smoothed_label": _ints([r.smoothed_label for r in part], np.int8),
+        "difficulty": _ints([r.difficulty for r in part], np.int16),
+    }
+    for i, name in enumerate(PROBA_COLUMNS):
+        numeric[name] = np.ascontiguousarray(proba[:, i])
+    for name in FEATURE_COLUMNS:
+        numeric[name] = _floats([f.get(name) for f in feats])
+    strings = {
+        "participant_id": [r.participant_id for r in part],
+        "session_token": [r.session_token for r in part],
+        "model_version": [r.model_version for r in part],
+    }
+    return numeric, strings
+
+
+def _task_columns(part):
+    extra = [_as_obj(r.extra) or {} for r in part]
+    numeric = {
+        "id": np.array([r.id for r in part], dtype=np.int64),
+        "timestamp": _times([r.timestamp for r in part]),
+        "trial_index": _ints([r.trial_index for r in part], np.int32),
+        "correct": _ints([None if r.correct is None else int(r.correct) for r in part], np.int8),
+        "reaction_time_ms": _floats([r.reaction_time_ms for r in part]),
+        "difficulty_level": _ints([e.get("difficulty_level") for e in extra], np.int16),
+        "stress_level": _floats([e.get("stress_level") for e in extra]),
+    }
+    strings = {
+        "participant_id": [r.participant_id for r in part],
+        "session_token": [r.session_token for r in part],
+        "task_name": [r.task_name for r in part],
+        "event": [r.event for r in part],
+    }
+    return numeric, strings
+
+
+STRESS_SELECT = (
+    StressLog.id, StressLog.participant_id, StressLog.session_token, StressLog.timestamp,
+    StressLog.ema_high, StressLog.smoothed_label, StressLog.difficulty,
+    StressLog.raw_proba, StressLog.features, StressLog.model_version,
+)
+TASK_SELECT = (
+    TaskLog.id, TaskLog.participant_id, TaskLog.session_token, TaskLog.task_name,
+    TaskLog.event, TaskLog.timestamp, TaskLog.trial_index, TaskLog.correct,
+    TaskLog.reaction_time_ms, TaskLog.extra,
+)
+_TABLES = {
+    "stress": (StressLog, STRESS_SELECT, _stress_columns),
+    "task": (TaskLog, TASK_SELECT, _task_columns),
+}
+
+
+def _chunks(db, table, participant_id, chunk_rows):
+    model, columns, to_columns = _TABLES[table]
+    stmt = select(*columns).order_by(model.id)
+    if participant_id is not None:
+        stmt = stmt.where(model.participant_id == participant_id)
+    result = db.execute(stmt.execution_options(yield_per=chunk_rows))
+    for part in result.partitions(chunk_rows):
+        yield to_columns(part)
+
+
+###############################################################
+# SINKS
+###############################################################
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, numeric, strings):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        cols = {k: pa.array(v) for k, v in numeric.items()}
+        cols.update({k: pa.array(v, type=pa.string()) for k, v in strings.items()})
+        table = pa.table(cols)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _NpzSink:
+    def __init__(self, path, compress):
+        self.path = path
+        self.compress = compress
+        self.numeric = {}
+        self.codes = {}
+        self.categories = {}
+
+    def _encode(self, name, values):
+        lookup = self.categories.setdefault(name, {})
+        out = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            if v is None:
+                out[i] = -1
+            else:
+                out[i] = lookup.setdefault(v, len(lookup))
+        return out
+
+    def write(self, numeric, strings):
+        for k, v in numeric.items():
+            self.numeric.setdefault(k, []).append(v)
+        for k, v in strings.items():
+            self.codes.setdefault(k, []).append(self._encode(k, v))
+
+    def close(self):
+        arrays = {k: np.concatenate(v) for k, v in self.numeric.items()}
+        for k, parts in self.codes.items():
+            arrays[k] = np.concatenate(parts)
+            arrays[f"{k}_categories"] = np.array(list(self.categories[k]), dtype=str)
+        save = np.savez_compressed if self.compress else np.savez
+        save(self.path, **arrays)
+
+
+###############################################################
+# PUBLIC API
+###############################################################
+
+def export_table(db, table, path, participant_id=None, fmt=None, compress=False, chunk_rows=CHUNK_ROWS):
+    """Write one table ("stress" or "task") to `path`; returns the path written.
+
+    `fmt` is "parquet", "npz" or None (Parquet when available). The file
+    extension is set from the format.
+    """
+    if table not in _TABLES:
+        raise ValueError(f"unknown table {table!r}")
+    fmt = fmt or ("parquet" if parquet_available() else "npz")
+    if fmt == "parquet" and not parquet_available():
+        raise ValueError("parquet export needs pyarrow")
+    if fmt not in ("parquet", "npz"):
+        raise ValueError(f"unknown format {fmt!r}")
+
+    path = os.path.splitext(path)[0] + "." + fmt
+    sink = _ParquetSink(path) if fmt == "parquet" else _NpzSink(path, compress)
+
+    wrote = False
+    for numeric, strings in _chunks(db, table, participant_id, chunk_rows):
+        sink.write(numeric, strings)
+        wrote = True
+    if not wrote:
+        # keep the schema even for an empty export
+        sink.write(*_TABLES[table][2]([]))
+    sink.close()
+    return path
+
+
+def export_study(db, out_dir, participant_id=None, fmt=None, compress=False):
+    os.makedirs(out_dir, exist_ok=True)
+    return {
+        table: export_table(db, table, os.path.join(out_dir, f"{table}_logs"),
+                            participant_id=participant_id, fmt=fmt, compress=compress)
+        for table in TABLES
+    }
+
+
+def _npz_members(path):
+    # memory-map stored (uncompressed) .npy members of an .npz in place
+    out = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                out[name] = np.load(zf.open(info))
+                continue
+            f.seek(info.header_offset)
+            fixed = f.read(30)
+            name_len, extra_len = struct.unpack("<HH", fixed[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"{info.filename}: object arrays can't be memory-mapped")
+            if int(np.prod(shape)) == 0:
+                out[name] = np.empty(shape, dtype=dtype)
+                continue
+            out[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(),
+                                  shape=shape, order="F" if fortran else "C")
+    return out
+
+
+def load_columnar(path, as_frame=False):
+    """Load a columnar export without copying column data where possible.
+
+    Parquet files are opened with memory_map=True; stored .npz members are
+    returned as read-only np.memmap arrays. Returns a dict of column arrays,
+    or a pandas DataFrame (string codes decoded to categoricals) when
+    `as_frame` is set.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, memory_map=True)
+        if as_frame:
+            return table.to_pandas()
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    cols = _npz_members(path)
+    if not as_frame:
+        return cols
+
+    import pandas as pd
+    data = {}
+    for name, arr in cols.items():
+        if name.endswith("_categories"):
+            continue
+        cats = cols.get(f"{name}_categories")
+        if cats is not None:
+            data[name] = pd.Categorical.from_codes(np.asarray(arr), categories=np.asarray(cats))
+        else:
+            data[name] = arr
+    return pd.DataFrame(data)
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.database.base import SessionLocal
+
+    ap = argparse.ArgumentParser(description="columnar export of stress and task logs")
+    ap.add_argument("out_dir")
+    ap.add_argument("--participant")
+    ap.add_argument("--format", choices=("parquet", "npz"))
+    ap.add_argument("--compress", action="store_true", help="compressed .npz (not memory-mappable)")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        for table, path in export_study(db, args.out_dir, args.participant, args.format, args.compress).items():
+            print(f"{table}: {path}")
+    finally:
+        db.close()
@@ -0,0 +1,270 @@
+# backend/services/difficulty_controller.py
+#
+# Adaptive difficulty: one PID loop per active session, stepped together.
+#
+# The controller drives each session's smoothed stress (ema_high) towards a
+# setpoint by moving task difficulty: stress above the setpoint lowers the
+# level, stress below raises it. Per-session state -- setpoint, gains,
+# integral, previous error, continuous output -- lives in parallel NumPy
+# arrays indexed by a slot number, so a tick is a handful of vector
+# operations over every session that received a sample since the last tick,
+# not a Python object and a DB round trip per session.
+#
+# observe() only stores the latest measurement (O(1), no maths). A
+# background thread calls tick() every `tick_seconds`; the resulting levels
+# go to the `on_decisions` callback and, for sessions bound to a task
+# session, are written to TaskSessionHistory with one bulk insert per tick.
+
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import insert
+
+from backend.database.models import HISTORY_DIFFICULTY, HISTORY_STRESS, TaskSessionHistory
+from backend.services.write_retry import RetryLedger, ping
+
+logger = logging.getLogger("backend")
+
+GAIN_KEYS = ("setpoint", "kp", "ki", "kd")
+
+
+class DifficultyController:
+    def __init__(self, session_factory=None, setpoint=0.5, kp=4.0, ki=0.5, kd=1.0,
+                 levels=(1, 10), initial=5, windup=4.0, tick_seconds=1.0,
+                 idle_seconds=900, on_decisions=None, capacity=64):
+        self.session_factory = session_factory
+        self.defaults = {"setpoint": setpoint, "kp": kp, "ki": ki, "kd": kd}
+        self.min_level, self.max_level = levels
+        self.initial = initial
+        self.windup = float(windup)
+        self.tick_seconds = float(tick_seconds)
+        self.idle_seconds = float(idle_seconds)
+        self.on_decisions = on_decisions
+
+        self._lock = threading.Lock()
+        self._slots = {}          # key -> slot
+        self._keys = []           # slot -> key (None when free)
+        self._free = []
+        self._alloc(capacity)
+
+        self._pending = []        # TaskSessionHistory rows not yet written
+        self._retry = RetryLedger("difficulty history", probe=lambda: ping(self.session_factory))
+        self._stop = threading.Event()
+        self._worker = None
+
+        self.ticks = 0
+        self.decisions = 0
+
+    # ---------------------------------------------------------
+    # array storage
+    # ---------------------------------------------------------
+
+    def _alloc(self, n):
+        old = len(self._keys)
+        f = lambda: np.zeros(n)
+        grow = {
+            "setpoint": f(), "kp": f(), "ki": f(), "kd": f(),
+            "integral": f(), "prev_error": f(), "base": f(), "output": f(),
+            "measurement": f(), "last_tick": f(), "last_seen": f(),
+        }
+        grow["level"] = np.zeros(n, dtype=np.int16)
+        grow["task_session"] = np.full(n, -1, dtype=np.int64)
+        grow["fresh"] = np.zeros(n, dtype=bool)
+        grow["active"] = np.zeros(n, dtype=bool)
+        grow["primed"] = np.zeros(n, dtype=bool)   # has a previous error
+        for name, arr in grow.items():
+            if old:
+                arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+        self._keys.extend([None] * (n - old))
+        self._free.extend(range(n - 1, old - 1, -1))
+
+    def _slot(self, key, difficulty=None):
+        # caller holds _lock
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if not self._free:
+            self._alloc(2 * len(self._keys))
+        slot = self._free.pop()
+        self._slots[key] = slot
+        self._keys[slot] = key
+        for k in GAIN_KEYS:
+            getattr(self, k)[slot] = self.defaults[k]
+        level = self.initial if difficulty is None else difficulty
+        self.base[slot] = self.output[slot] = level
+        self.level[slot] = level
+        self.integral[slot] = self.prev_error[slot] = 0.0
+        self.task_session[slot] = -1
+        self.fresh[slot] = self.primed[slot] = False
+        self.active[slot] = True
+        self.last_tick[slot] = self.last_seen[slot] = time.monotonic()
+        return slot
+
+    def _release(self, slot):
+        # caller holds _lock
+        del self._slots[self._keys[slot]]
+        self._keys[slot] = None
+        self.active[slot] = self.fresh[slot] = False
+        self._free.append(slot)
+
+    # ---------------------------------------------------------
+    # public API
+    # ---------------------------------------------------------
+
+    def observe(self, key, measurement, difficulty=None):
+        """Record the latest stress measurement for `key`; returns its current level."""
+        with self._lock:
+            slot = self._slot(key, difficulty)
+            self.measurement[slot] = measurement
+            self.fresh[slot] = True
+            self.last_seen[slot] = time.monotonic()
+            level = int(self.level[slot])
+        self._ensure_worker()
+        return level
+
+    def bind(self, key, task_session_id, config=None):
+        """Attach a task session (its history receives the decisions); config
+        may override setpoint / kp / ki / kd for this session."""
+        with self._lock:
+            slot = self._slot(key)
+            self.task_session[slot] = task_session_id
+            if not isinstance(config, dict):
+                return
+            for k in GAIN_KEYS:
+                v = config.get(k)
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v):
+                    getattr(self, k)[slot] = v
+
+    def unbind(self, task_session_id):
+        with self._lock:
+            self.task_session[self.task_session == task_session_id] = -1
+
+    def level_of(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            return None if slot is None else int(self.level[slot])
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def tick(self, now=None):
+        """Step every session with a fresh measurement; returns [(key, level)]."""
+        now = time.monotonic() if now is None else now
+        rows = []
+        with self._lock:
+            idx = np.flatnonzero(self.fresh & self.active)
+            if len(idx):
+                dt = np.maximum(now - self.last_tick[idx], 1e-3)
+                error = self.measurement[idx] - self.setpoint[idx]
+                integral = np.clip(self.integral[idx] + error * dt, -self.windup, self.windup)
+                deriv = np.where(self.primed[idx], (error - self.prev_error[idx]) / dt, 0.0)
+
+                # stress above the setpoint lowers the level
+                u = self.kp[idx] * error + self.ki[idx] * integral + self.kd[idx] * deriv
+                output = np.clip(self.base[idx] - u, self.min_level, self.max_level)
+                level = np.rint(output).astype(np.int16)
+
+                self.integral[idx] = integral
+                self.prev_error[idx] = error
+                self.output[idx] = output
+                self.level[idx] = level
+                self.last_tick[idx] = now
+                self.primed[idx] = True
+                self.fresh[idx] = False
+
+                decisions = [(self._keys[s], int(v)) for s, v in zip(idx.tolist(), level.tolist())]
+                bound = idx[self.task_session[idx] >= 0]
+                if len(bound):
+                    ts = datetime.utcnow()
+                    for s in bound.tolist():
+                        sid = int(self.task_session[s])
+                        rows.append({"session_id": sid, "kind": HISTORY_DIFFICULTY,
+                                     "value": float(self.level[s]), "timestamp": ts})
+                        rows.append({"session_id": sid, "kind": HISTORY_STRESS,
+                                     "value": float(self.measurement[s]), "timestamp": ts})
+            else:
+                decisions = []
+
+            idle = np.flatnonzero(self.active & (self.last_seen < now - self.idle_seconds))
+            for s in idle.tolist():
+                self._release(s)
+            self._pending.extend(rows)
+            self.ticks += 1
+            self.decisions += len(decisions)
+
+        if decisions and self.on_decisions is not None:
+            self.on_decisions(decisions)
+        return decisions
+
+    def flush(self):
+        """Write queued history rows in one statement; returns the row count.
+
+        A failed batch is retried row by row (services/write_retry.py); rows
+        that keep failing are dropped, the rest requeued and the error
+        re-raised.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows or self.session_factory is None:
+            return 0
+        try:
+            self._write(rows)
+        except Exception:
+            logger.exception("difficulty history write failed (%d rows); retrying row by row", len(rows))
+            with self._lock:
+                queued = len(self._pending)
+            dropped = self._retry.dropped
+            keep = self._retry.after_failure(self._write, rows, queued)
+            if keep:
+                with self._lock:
+                    self._pending[:0] = keep
+                raise
+            return len(rows) - (self._retry.dropped - dropped)
+        self._retry.written(rows)
+        return len(rows)
+
+    def close(self, timeout=None):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        self.flush()
+
+    # ---------------------------------------------------------
+    # internals
+    # ---------------------------------------------------------
+
+    def _write(self, rows):
+        dbs = self.session_factory()
+        try:
+            dbs.execute(insert(TaskSessionHistory), rows)
+            dbs.commit()
+        except Exception:
+            dbs.rollback()
+            raise
+        finally:
+            dbs.close()
+
+    def _ensure_worker(self):
+        if self._worker is not None or self.tick_seconds <= 0 or self._stop.is_set():
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="difficulty-controller", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.tick()
+                self.flush()
+            except Exception:
+                logger.exception("difficulty controller tick failed")
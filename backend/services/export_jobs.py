@@ -0,0 +1,261 @@
+# backend/services/export_jobs.py
+#
+# Background cohort export jobs.
+#
+# A job splits the (sorted) participant list into shards of `shard_size`.
+# Each shard runs in a worker process: it reads the shard's timeline with one
+# ordered pass per log table, serialises every participant to NDJSON and
+# deflates it into a raw-deflate stream appended to the shard's data file.
+# Once all shards are done the coordinator thread stitches the precompressed
+# streams into a single ZIP (zip64) without recompressing anything, and
+# the shard files are removed.
+#
+# Job state is kept as a small JSON file next to the artifacts, so any web
+# worker can answer status and download requests.
+
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.base import make_engine
+from backend.database.models import Participant
+from backend.services.timeline import iter_participant_timelines, pid_order, timeline_row
+
+logger = logging.getLogger("backend")
+
+COPY_CHUNK = 1024 * 1024
+
+
+###############################################################
+# SHARD WORKER (runs in a child process)
+###############################################################
+
+def _export_shard(database_url, pids, path, level=6, chunk_rows=1000):
+    engine = make_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    entries, rows = [], 0
+    try:
+        with open(path, "wb") as out:
+            timelines = iter_participant_timelines(db, pids, first=pids[0], last=pids[-1],
+                                                   chunk_rows=chunk_rows)
+            for pid, records in timelines:
+                offset = out.tell()
+                comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+                crc, usize = 0, 0
+                buf = []
+                for r in records:
+                    buf.append(json.dumps(timeline_row(r), default=str) + "\n")
+                    rows += 1
+                    if len(buf) >= chunk_rows:
+                        data = "".join(buf).encode("utf-8")
+                        crc = zlib.crc32(data, crc)
+                        usize += len(data)
+                        out.write(comp.compress(data))
+                        buf = []
+                if buf:
+                    data = "".join(buf).encode("utf-8")
+                    crc = zlib.crc32(data, crc)
+                    usize += len(data)
+                    out.write(comp.compress(data))
+                out.write(comp.flush())
+                entries.append((f"{pid}.json", offset, out.tell() - offset, usize, crc))
+    finally:
+        db.close()
+        engine.dispose()
+    return {"path": path, "entries": entries, "rows": rows}
+
+
+###############################################################
+# ZIP ASSEMBLY
+###############################################################
+
+def _dos_datetime(dt):
+    return ((dt.hour << 11) | (dt.minute << 5) | (dt.second // 2),
+            ((dt.year - 1980) << 9) | (dt.month << 5) | dt.day)
+
+
+def assemble_zip(path, shards, when=None):
+    """Write a zip64 archive from precompressed shard results."""
+    dos_time, dos_date = _dos_datetime(when or datetime.now())
+    central = []
+    with open(path, "wb") as out:
+        for shard in shards:
+            with open(shard["path"], "rb") as src:
+                for name, offset, csize, usize, crc in shard["entries"]:
+                    fname = name.encode("utf-8")
+                    header_offset = out.tell()
+                    extra = struct.pack("<HHQQ", 0x0001, 16, usize, csize)
+                    out.write(struct.pack(
+                        "<IHHHHHIIIHH", 0x04034B50, 45, 0x800, 8, dos_time, dos_date,
+                        crc, 0xFFFFFFFF, 0xFFFFFFFF, len(fname), len(extra)
+                    ))
+                    out.write(fname)
+                    out.write(extra)
+
+                    src.seek(offset)
+                    remaining = csize
+                    while remaining:
+                        chunk = src.read(min(COPY_CHUNK, remaining))
+                        if not chunk:
+                            raise IOError(f"shard {shard['path']} truncated")
+                        out.write(chunk)
+                        remaining -= len(chunk)
+
+                    central.append((fname, crc, csize, usize, header_offset))
+
+        cd_offset = out.tell()
+        for fname, crc, csize, usize, header_offset in central:
+            extra = struct.pack("<HHQQQ", 0x0001, 24, usize, csize, header_offset)
+            out.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, 45, 45, 0x800, 8, dos_time, dos_date,
+                crc, 0xFFFFFFFF, 0xFFFFFFFF, len(fname), len(extra), 0, 0, 0,
+                0o100644 << 16, 0xFFFFFFFF
+            ))
+            out.write(fname)
+            out.write(extra)
+        cd_size = out.tell() - cd_offset
+
+        eocd64_offset = out.tell()
+        n = len(central)
+        out.write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, n, n, cd_size, cd_offset))
+        out.write(struct.pack("<IIQI", 0x07064B50, 0, eocd64_offset, 1))
+        out.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(n, 0xFFFF), min(n, 0xFFFF),
+            min(cd_size, 0xFFFFFFFF), min(cd_offset, 0xFFFFFFFF), 0
+        ))
+
+
+###############################################################
+# JOB MANAGER
+###############################################################
+
+class ExportJobManager:
+    def __init__(self, database_url, export_dir, workers=None, shard_size=200):
+        self.database_url = database_url
+        self.export_dir = export_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(int(shard_size), 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _pool_executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that holds eventlet hubs,
+                # DB connections or writer threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _status_path(self, job_id):
+        return os.path.join(self.export_dir, f"{job_id}.json")
+
+    def artifact_path(self, job_id):
+        return os.path.join(self.export_dir, f"{job_id}.zip")
+
+    def _save(self, job):
+        tmp = self._status_path(job["id"]) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp, self._status_path(job["id"]))
+
+    def get(self, job_id):
+        # ids are generated hex; refuse anything that could escape the dir
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._status_path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def submit(self, session_factory, requested_by=None):
+        os.makedirs(self.export_dir, exist_ok=True)
+        job = {
+            "id": uuid.uuid4().hex,
+            "state": "queued",
+            "requested_by": requested_by,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "participants": 0,
+            "rows": 0,
+            "shards_total": 0,
+            "shards_done": 0,
+            "size": None,
+            "error": None,
+        }
+        self._save(job)
+        threading.Thread(
+            target=self._run, args=(job, session_factory), name=f"export-{job['id'][:8]}", daemon=True
+        ).start()
+        return job
+
+    def _run(self, job, session_factory):
+        shard_paths = []
+        started = time.monotonic()
+        try:
+            db = session_factory()
+            try:
+                pids = [
+                    p.participant_id for p in
+                    db.query(Participant.participant_id).order_by(pid_order(db, Participant.participant_id))
+                ]
+            finally:
+                db.close()
+
+            shards = [pids[i:i + self.shard_size] for i in range(0, len(pids), self.shard_size)]
+            job.update(state="running", participants=len(pids), shards_total=len(shards))
+            self._save(job)
+
+            pool = self._pool_executor()
+            futures = {}
+            for i, shard in enumerate(shards):
+                path = os.path.join(self.export_dir, f"{job['id']}.shard{i:05d}")
+                shard_paths.append(path)
+                futures[pool.submit(_export_shard, self.database_url, shard, path)] = i
+
+            results = [None] * len(shards)
+            for fut in as_completed(futures):
+                res = fut.result()
+                results[futures[fut]] = res
+                job["shards_done"] += 1
+                job["rows"] += res["rows"]
+                self._save(job)
+
+            job["state"] = "assembling"
+            self._save(job)
+            final = self.artifact_path(job["id"])
+            assemble_zip(final + ".tmp", results)
+            os.replace(final + ".tmp", final)
+
+            job.update(state="done", size=os.path.getsize(final),
+                       finished_at=datetime.utcnow().isoformat())
+            logger.info("export %s: %d participants, %d rows in %.1fs",
+                        job["id"], job["participants"], job["rows"], time.monotonic() - started)
+        except Exception as e:
+            logger.exception("export %s failed", job["id"])
+            job.update(state="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+        finally:
+            for path in shard_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._save(job)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,158 @@
+# backend/services/forest.py
+#
+# Flat-array compiler and evaluator for the stress random forest.
+#
+# For a single row, RandomForestClassifier.predict_proba spends nearly all
+# its time in input validation and per-tree dispatch; the forest itself is a
+# few hundred comparisons. compile_forest() copies every tree of a fitted
+# forest into one set of NumPy node arrays (feature, threshold, left, right,
+# leaf class distribution), indexed globally across trees. CompiledForest
+# then walks all trees at once: one gather-compare-step per level for every
+# (row, tree) pair together, dropping pairs that have reached a leaf.
+#
+# Results match sklearn exactly, not just approximately: rows are cast to
+# float32 before comparing (as sklearn's tree code does), leaf distributions
+# are normalised the way the installed sklearn does it, and tree outputs are
+# summed in estimator order before dividing by the number of trees.
+# check_parity() verifies this on random inputs; the app falls back to
+# sklearn for any model that fails it.
+
+import numpy as np
+
+
+class CompiledForest:
+    def __init__(self, roots, feature, threshold, left, right, value, depth, classes, n_features):
+        self.roots = roots            # (n_trees,) global index of each tree's root
+        self.feature = feature        # (n_nodes,) int32; 0 at leaves
+        self.threshold = threshold    # (n_nodes,) float64
+        self.left = left              # (n_nodes,) int32; leaves point at themselves
+        self.right = right
+        self.value = value            # (n_nodes, n_classes) float64 leaf distributions
+        self.depth = int(depth)       # steps needed to reach every leaf
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+
+        # evaluation layout: intp indices, children interleaved so the next
+        # node is children[2 * node + went_left]
+        self._roots = roots.astype(np.intp)
+        self._feature = feature.astype(np.intp)
+        self._children = np.empty(2 * len(feature), dtype=np.intp)
+        self._children[0::2] = right
+        self._children[1::2] = left
+        self._is_leaf = left == np.arange(len(feature))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _leaves(self, X):
+        # walk every (row, tree) pair at once, flattened; pairs drop out of
+        # `active` as soon as they land on a leaf
+        n, n_features = X.shape
+        T = self.n_trees
+        flat = X.astype(np.float64).ravel()
+        node = np.tile(self._roots, n)
+        base = np.repeat(np.arange(n) * n_features, T)
+        active = np.arange(n * T)
+        for _ in range(self.depth):
+            cur = node[active]
+            went_left = flat[base[active] + self._feature[cur]] <= self.threshold[cur]
+            nxt = self._children[2 * cur + went_left]
+            node[active] = nxt
+            active = active[~self._is_leaf[nxt]]
+            if not active.size:
+                break
+        return node.reshape(n, T)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected rows of {self.n_features_in_} features, got shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("input contains NaN or infinity")
+        # (n_trees, n, n_classes) summed over the outer axis adds the trees
+        # one after another, in the same order as sklearn's accumulation loop
+        return self.value[self._leaves(X).T].sum(axis=0) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(model):
+    """Compile a fitted sklearn forest (or single decision tree) classifier."""
+    trees = getattr(model, "estimators_", None)
+    if trees is None:
+        trees = [model]
+    if not trees or not hasattr(trees[0], "tree_"):
+        raise TypeError(f"{type(model).__name__} is not a fitted tree classifier")
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise TypeError("multi-output forests are not supported")
+
+    n_classes = len(model.classes_)
+    roots, feature, threshold, left, right, value = [], [], [], [], [], []
+    depth, offset = 0, 0
+    for est in trees:
+        t = est.tree_
+        if t.value.shape[2] != n_classes:
+            raise TypeError("trees disagree on the number of classes")
+        n = t.node_count
+        leaf = t.children_left == -1
+        idx = np.arange(n)
+
+        roots.append(offset)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(t.threshold.astype(np.float64))
+        left.append(np.where(leaf, idx, t.children_left) + offset)
+        right.append(np.where(leaf, idx, t.children_right) + offset)
+        v = t.value[:, 0, :].astype(np.float64)
+        sums = v.sum(axis=1, keepdims=True)
+        if not np.allclose(sums, 1.0, rtol=0, atol=1e-9):
+            # older sklearn stores class counts and normalises in predict_proba
+            sums[sums == 0] = 1.0
+            v = v / sums
+        value.append(v)
+        depth = max(depth, t.max_depth)
+        offset += n
+
+    return CompiledForest(
+        roots=np.asarray(roots, dtype=np.int32),
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        value=np.concatenate(value),
+        depth=depth,
+        classes=np.asarray(model.classes_),
+        n_features=model.n_features_in_,
+    )
+
+
+def random_rows(compiled, n, seed=0):
+    # spread samples over (and a bit beyond) the range of split thresholds so
+    # every branch gets exercised
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, compiled.n_features_in_))
+    internal = compiled.left != np.arange(compiled.n_nodes)
+    for f in range(compiled.n_features_in_):
+        thr = compiled.threshold[internal & (compiled.feature == f)]
+        lo, hi = (thr.min(), thr.max()) if len(thr) else (0.0, 1.0)
+        pad = 0.1 * (hi - lo) + 1.0
+        X[:, f] = rng.uniform(lo - pad, hi + pad, n)
+    # a few rows exactly on thresholds, where float32 rounding matters
+    k = min(n // 10, int(internal.sum()))
+    if k:
+        nodes = rng.choice(np.flatnonzero(internal), k, replace=False)
+        X[:k, compiled.feature[nodes]] = compiled.threshold[nodes]
+    return X
+
+
+def check_parity(model, compiled, n=10000, seed=0):
+    """Return the max absolute difference from model.predict_proba on random rows."""
+    X = random_rows(compiled, n, seed)
+    return float(np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max())
@@ -0,0 +1,148 @@
+# backend/services/hrv_stream.py
+#
+# Rolling-window HRV features for continuous RR streams.
+#
+# rr_features() in app.py recomputes everything from the full window on each
+# call. HRVWindow keeps the last `capacity` beats in a ring buffer together
+# with running statistics (Welford mean/M2 for SDNN, a running sum of squared
+# successive differences for RMSSD), so pushing a beat is O(1) regardless of
+# window length. Output matches rr_features() on the same window within
+# float tolerance.
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# recompute the running sums from the buffer after this many evictions so
+# floating point drift from add/remove pairs stays bounded (amortised O(1))
+RESYNC_EVERY = 4096
+
+
+class HRVWindow:
+    def __init__(self, capacity):
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        self.capacity = int(capacity)
+        self._buf = np.zeros(self.capacity, dtype=float)
+        self._start = 0
+        self.n = 0
+
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._sq_diff = 0.0
+        self._evictions = 0
+
+    def _at(self, i):
+        return self._buf[(self._start + i) % self.capacity]
+
+    def push(self, rr):
+        rr = float(rr)
+
+        if self.n == self.capacity:
+            old = self._buf[self._start]
+            nxt = self._at(1)
+            self._sq_diff -= (nxt - old) ** 2
+
+            # Welford removal
+            self.n -= 1
+            d = old - self._mean
+            self._mean -= d / self.n
+            self._m2 -= d * (old - self._mean)
+
+            self._start = (self._start + 1) % self.capacity
+            self._evictions += 1
+
+        if self.n:
+            self._sq_diff += (rr - self._at(self.n - 1)) ** 2
+
+        self._buf[(self._start + self.n) % self.capacity] = rr
+        self.n += 1
+
+        # Welford insertion
+        d = rr - self._mean
+        self._mean += d / self.n
+        self._m2 += d * (rr - self._mean)
+
+        if self._evictions >= RESYNC_EVERY:
+            self._resync()
+
+    def extend(self, values):
+        for v in values:
+            self.push(v)
+
+    def values(self):
+        idx = (self._start + np.arange(self.n)) % self.capacity
+        return self._buf[idx]
+
+    def _resync(self):
+        rr = self.values()
+        self._mean = float(rr.mean())
+        self._m2 = float(((rr - self._mean) ** 2).sum())
+        self._sq_diff = float((np.diff(rr) ** 2).sum())
+        self._evictions = 0
+
+    def features(self):
+        if self.n < 2:
+            return {"rmssd": None, "sdnn": None, "mean_rr": None, "mean_hr": None}
+
+        rmssd = float(np.sqrt(max(self._sq_diff, 0.0) / (self.n - 1)))
+        sdnn = float(np.sqrt(max(self._m2, 0.0) / self.n))
+        mean_rr = float(self._mean)
+        mean_hr = float(60000.0 / mean_rr) if mean_rr > 0 else None
+
+        return {"rmssd": rmssd, "sdnn": sdnn, "mean_rr": mean_rr, "mean_hr": mean_hr}
+
+
+class HRVStreamStore:
+    """Per-session HRVWindow registry keyed by session token.
+
+    Sessions untouched for `idle_seconds` are dropped on the next access, so
+    abandoned streams do not accumulate.
+    """
+
+    def __init__(self, capacity=64, idle_seconds=600):
+        self.capacity = int(capacity)
+        self.idle_seconds = float(idle_seconds)
+        self._windows = OrderedDict()  # token -> (HRVWindow, last_seen)
+        self._lock = threading.Lock()
+
+    def push(self, token, values):
+        # arrays (the uint16 / float32 view of a binary packet) are read in
+        # place; HRVWindow.push converts one beat at a time
+        if not isinstance(values, np.ndarray):
+            values = np.array(values, dtype=float)
+        # checked before the window changes: one NaN (JSON null) would poison
+        # the running sums until the next resync
+        if not (np.isfinite(values).all() and (values > 0).all()):
+            raise ValueError("RR intervals must be positive finite numbers")
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._windows.pop(token, None)
+            win = entry[0] if entry else HRVWindow(self.capacity)
+            win.extend(values)
+            self._windows[token] = (win, now)
+            return win.features()
+
+    def features(self, token):
+        with self._lock:
+            entry = self._windows.get(token)
+            return entry[0].features() if entry else None
+
+    def drop(self, token):
+        with self._lock:
+            self._windows.pop(token, None)
+
+    def __len__(self):
+        return len(self._windows)
+
+    def _evict_idle(self, now):
+        # entries are kept in last-touched order, oldest first
+        cutoff = now - self.idle_seconds
+        while self._windows:
+            token, (_, last_seen) = next(iter(self._windows.items()))
+            if last_seen >= cutoff:
+                break
+            del self._windows[token]
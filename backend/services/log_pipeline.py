@@ -0,0 +1,172 @@
+# backend/services/log_pipeline.py
+#
+# Asynchronous, structured log output.
+#
+# Loggers under "backend" hand records to a NonBlockingQueueHandler, which
+# only formats the message and puts it on a bounded in-memory queue; a
+# QueueListener thread writes them to a RotatingFileHandler as one JSON
+# object per line, flushed once per drained burst. No file I/O happens on the calling thread: when the disk
+# stalls and the queue fills up, new records are dropped (and counted)
+# rather than blocking a request.
+#
+# Records carry the current request id when logged inside a request
+# (middlewares/logging_middleware.py sets g.request_id); any `extra=` fields
+# (route, status, latency_ms, ...) become top-level JSON keys.
+
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context
+
+# attributes every LogRecord has; anything else came in through extra=
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_plain = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _RESERVED and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    # handler filters run on the thread that logged, inside its request
+    def filter(self, record):
+        if not hasattr(record, "request_id") and has_request_context():
+            rid = g.get("request_id")
+            if rid is not None:
+                record.request_id = rid
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # render msg % args and the traceback now (both may reference
+        # objects that change before the listener gets to them); extra=
+        # fields are left for JsonFormatter. Rendering msg in place is
+        # invisible to other handlers; dropping exc_info is not, so that
+        # case works on a copy
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record = copy.copy(record)
+            record.exc_text = _plain.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonLinesFileHandler(RotatingFileHandler):
+    # emit() leaves lines in the file buffer; the listener calls sync() once
+    # the queue is drained, so a burst costs one write() instead of one each
+    def flush(self):
+        pass
+
+    def sync(self):
+        super().flush()
+
+
+class _Listener(QueueListener):
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for h in self.handlers:
+                h.sync()
+        return self.queue.get(block)
+
+    def enqueue_sentinel(self):
+        # blocking: a full queue must not lose the stop signal
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    def __init__(self, path, max_bytes=10_000_000, backups=5, queue_size=10_000, level=logging.INFO):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file_handler = JsonLinesFileHandler(self.path, maxBytes=max_bytes, backupCount=backups,
+                                                 encoding="utf-8", delay=True)
+        self.file_handler.setFormatter(JsonFormatter())
+        self.file_handler.setLevel(level)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = _Listener(self.queue, self.file_handler, respect_handler_level=True)
+        self._started = False
+
+    def start(self):
+        if not self._started:
+            self.listener.start()
+            self._started = True
+        return self
+
+    def stop(self):
+        # drains what is queued, then closes the file
+        if self._started:
+            self.listener.stop()
+            self._started = False
+        self.file_handler.close()
+
+    @property
+    def pending_count(self):
+        return self.queue.qsize()
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def start_pipeline(logger, path, **kwargs):
+    """Attach a running LogPipeline for `path` to `logger` (once per path)."""
+    path = os.path.abspath(path)
+    with _pipelines_lock:
+        p = _pipelines.get(path)
+        if p is None:
+            p = _pipelines[path] = LogPipeline(path, **kwargs).start()
+        if p.handler not in logger.handlers:
+            logger.addHandler(p.handler)
+        return p
+
+
+def pipelines():
+    with _pipelines_lock:
+        return list(_pipelines.values())
+
+
+def stop_pipelines():
+    with _pipelines_lock:
+        ps = list(_pipelines.values())
+        _pipelines.clear()
+    for p in ps:
+        p.stop()
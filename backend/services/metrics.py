@@ -0,0 +1,173 @@
+# backend/services/metrics.py
+#
+# In-process metrics in the Prometheus text exposition format.
+#
+# Counters and fixed-bucket histograms are plain dicts keyed by a tuple of
+# label values, each guarded by its own lock: recording a value is one
+# bisect plus a couple of list updates (about a microsecond), with no
+# allocation after a series' first observation. Gauges whose values live
+# elsewhere (queue depths, pool sizes) are read at scrape time instead of
+# being pushed on every change; render() takes them as extra families.
+#
+# The metrics every part of the backend shares (HTTP, SQL, model inference)
+# are defined at the bottom of this module; /metrics in app.py renders them.
+
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; request latency from sub-millisecond cache hits to slow exports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(v):
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, float) and v.is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(v) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key=(), amount=1):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, key=()):
+        return self._values.get(key, 0)
+
+    def lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labels, key)} {_number(v)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # key -> [count per bucket..., count above the last, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, key=()):
+        i = bisect_left(self.buckets, value)   # first bucket with le >= value
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def count(self, key=()):
+        s = self._series.get(key)
+        return sum(s[:-1]) if s else 0
+
+    def lines(self):
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        for key, s in items:
+            cum = 0
+            for le, n in zip(self.buckets + (float("inf"),), s[:-1]):
+                cum += n
+                yield f"{self.name}_bucket{_labels(self.labels, key, ('le', _number(float(le))))} {cum}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {_number(float(s[-1]))}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {cum}"
+
+
+class Gauge:
+    """Values collected at scrape time: samples is {label values tuple: value}.
+
+    type="counter" exposes a monotonic count kept by some other object.
+    """
+
+    def __init__(self, name, help, labels=(), samples=None, type="gauge"):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.samples = samples or {}
+        self.type = type
+
+    def lines(self):
+        for key, v in sorted(self.samples.items()):
+            if v is not None:
+                yield f"{self.name}{_labels(self.labels, key)} {_number(v)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labels != metric.labels:
+                    raise ValueError(f"metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self, extra=()):
+        out = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics + list(extra):
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.type}")
+            out.extend(m.lines())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+###############################################################
+# SHARED METRICS
+###############################################################
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP responses by route and status.", ("method", "route", "status"))
+http_latency = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from before_request to after_request.", ("method", "route"))
+http_sql_statements = REGISTRY.histogram(
+    "http_request_sql_statements", "SQL statements executed while handling one request.",
+    ("method", "route"), buckets=COUNT_BUCKETS)
+http_db_seconds = REGISTRY.counter(
+    "http_request_db_seconds_total", "Cumulative SQL execution time inside requests.", ("method", "route"))
+
+db_statements = REGISTRY.counter(
+    "db_statements_total", "SQL statements executed, in requests or background writers.", ("context",))
+db_seconds = REGISTRY.counter(
+    "db_statement_seconds_total", "Cumulative SQL execution time.", ("context",))
+
+inference_seconds = REGISTRY.histogram(
+    "stress_inference_batch_seconds", "predict_proba time per micro-batch.")
+inference_rows = REGISTRY.histogram(
+    "stress_inference_batch_rows", "Feature rows per micro-batch.", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
@@ -0,0 +1,192 @@
+# backend/services/model_registry.py
+#
+# Lazily loaded, hot-reloadable stress model.
+#
+# Nothing is read at import time: the newest `stress_rf_model*.pkl` in the
+# models directory is loaded (joblib, mmap_mode="r" so uncompressed arrays
+# stay on disk) the first time a request needs it. A watcher thread then
+# stats the directory every `poll_seconds`; when a newer file appears (or the
+# current one is rewritten) it is loaded, compiled (services/forest.py) and
+# given its own StressBatcher in the background, and the registry swaps to it
+# with one reference assignment. Requests already holding the old model
+# finish on it; the old batcher is stopped `retire_after` seconds later, and
+# a request that races with that is retried on the new model.
+#
+# Versions are "<file name>:<first 12 hex of the file's sha1>" and are written
+# to StressLog.model_version with every score.
+
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from backend.services.forest import check_parity, compile_forest
+from backend.services.stress_inference import StressBatcher
+
+log = logging.getLogger("backend")
+
+MODEL_PATTERN = "stress_rf_model*.pkl"
+
+ModelHandle = namedtuple("ModelHandle", ["version", "path", "model", "batcher", "signature"])
+
+
+def file_version(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"{os.path.basename(path)}:{h.hexdigest()[:12]}"
+
+
+def prepare_model(model, backend="compiled"):
+    # "compiled" scores with the flat-array evaluator when it matches sklearn
+    # exactly; anything else (or any mismatch) keeps predict_proba
+    if backend != "compiled":
+        return model
+    try:
+        compiled = compile_forest(model)
+        diff = check_parity(model, compiled, n=2000)
+    except (TypeError, ValueError) as e:
+        log.warning("stress model not compiled (%s); using sklearn", e)
+        return model
+    if diff != 0.0:
+        log.warning("compiled stress model differs from sklearn by %g; using sklearn", diff)
+        return model
+    return compiled
+
+
+class ModelRegistry:
+    def __init__(self, models_dir, pattern=MODEL_PATTERN, backend="compiled", max_batch=32,
+                 max_wait_ms=2.0, poll_seconds=10.0, retire_after=30.0):
+        self.models_dir = models_dir
+        self.pattern = pattern
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.poll_seconds = float(poll_seconds)
+        self.retire_after = float(retire_after)
+
+        self._current = None
+        self._failed = None       # (path, signature) that failed to load
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+        self.reloads = 0
+        self.load_errors = 0
+
+    # ---------------------------------------------------------
+    # public API
+    # ---------------------------------------------------------
+
+    def current(self):
+        """The live ModelHandle, loading it on first use; None without a model."""
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._swap(self._newest())
+                    self._loaded = True
+                    self._start_watcher()
+        return self._current
+
+    @property
+    def version(self):
+        h = self.current()
+        return h.version if h else None
+
+    @property
+    def pending_count(self):
+        # rows waiting for the live batcher; does not load a model
+        h = self._current
+        return h.batcher.pending_count if h else 0
+
+    def predict(self, row, timeout=None):
+        """Score one feature row; returns (proba, version) or None without a model."""
+        while True:
+            h = self.current()
+            if h is None:
+                return None
+            try:
+                return h.batcher.predict(row, timeout=timeout), h.version
+            except RuntimeError:
+                # that model was retired between current() and submit()
+                if self._current is h:
+                    raise
+
+    def check(self):
+        """Swap to the newest model file if it changed; returns True on a swap."""
+        with self._load_lock:
+            newest = self._newest()
+            cur = self._current
+            if newest is None or newest == self._failed:
+                return False
+            if cur is not None and newest == (cur.path, cur.signature):
+                return False
+            return self._swap(newest)
+
+    def close(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(self.poll_seconds + 1)
+        if self._current is not None:
+            self._current.batcher.stop()
+
+    # ---------------------------------------------------------
+    # internals
+    # ---------------------------------------------------------
+
+    def _newest(self):
+        # (path, (mtime_ns, size)) of the most recently written match
+        try:
+            entries = [e for e in os.scandir(self.models_dir)
+                       if e.is_file() and fnmatch.fnmatch(e.name, self.pattern)]
+        except FileNotFoundError:
+            return None
+        if not entries:
+            return None
+        best = max(entries, key=lambda e: (e.stat().st_mtime_ns, e.name))
+        st = best.stat()
+        return best.path, (st.st_mtime_ns, st.st_size)
+
+    def _swap(self, newest):
+        # caller holds _load_lock
+        if newest is None:
+            return False
+        path, signature = newest
+        try:
+            import joblib   # sklearn/joblib only load with the first model
+            version = file_version(path)
+            model = prepare_model(joblib.load(path, mmap_mode="r"), self.backend)
+        except Exception:
+            self.load_errors += 1
+            self._failed = newest
+            log.exception("failed to load stress model %s; keeping the current one", path)
+            return False
+
+        batcher = StressBatcher(model, max_batch=self.max_batch, max_wait_ms=self.max_wait_ms)
+        old, self._current = self._current, ModelHandle(version, path, model, batcher, signature)
+        if old is not None:
+            self.reloads += 1
+            log.info("stress model %s -> %s", old.version, version)
+            timer = threading.Timer(self.retire_after, old.batcher.stop)
+            timer.daemon = True
+            timer.start()
+        else:
+            log.info("stress model %s loaded", version)
+        return True
+
+    def _start_watcher(self):
+        if self.poll_seconds <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception:
+                log.exception("model watcher failed")
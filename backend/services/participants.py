@@ -0,0 +1,120 @@
+# backend/services/participants.py
+#
+# Keyset pagination over participants plus a cached total count.
+#
+# Pages are ordered newest first by (created_at, id) and continue from an
+# opaque cursor holding the last row's key, so each poll reads one index
+# range instead of OFFSET-scanning or serialising the whole table. Totals
+# are cached per assignment_group and dropped whenever /api/register adds a
+# participant (and after `ttl` seconds, for registrations handled by other
+# worker processes).
+
+import base64
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+
+from backend.database.models import Participant
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+
+def page_participants(db, limit=DEFAULT_PAGE_SIZE, cursor=None, group=None):
+    """Return (participants, next_cursor); next_cursor is None on the last page."""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    q = db.query(Participant)
+    if group is not None:
+        q = q.filter(Participant.assignment_group == group)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        q = q.filter(or_(
+            Participant.created_at < created_at,
+            and_(Participant.created_at == created_at, Participant.id < pk),
+        ))
+    rows = q.order_by(Participant.created_at.desc(), Participant.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def participants_page(db, args):
+    """Build the admin participant listing from query args; returns (body, status).
+
+    Accepts `limit`, `cursor` and `group` (assignment_group filter).
+    """
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return {"ok": False, "error": "limit must be an integer"}, 400
+    group = args.get("group")
+    try:
+        rows, next_cursor = page_participants(db, limit=limit, cursor=args.get("cursor"), group=group)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}, 400
+
+    data = [{
+        "participant_id": p.participant_id,
+        "created_at": p.created_at.isoformat(),
+        "assignment_group": p.assignment_group
+    } for p in rows]
+    return {
+        "ok": True,
+        "data": data,
+        "next_cursor": next_cursor,
+        "total": participant_counts.get(db, group)
+    }, 200
+
+
+class CountCache:
+    def __init__(self, ttl=30.0):
+        self.ttl = float(ttl)
+        self._counts = {}   # group (None = all) -> (count, cached_at)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db, group=None):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._counts.get(group)
+            if hit and now - hit[1] < self.ttl:
+                return hit[0]
+            generation = self._generation
+
+        q = db.query(func.count(Participant.id))
+        if group is not None:
+            q = q.filter(Participant.assignment_group == group)
+        count = q.scalar()
+
+        with self._lock:
+            # don't cache a count that an invalidate() raced with
+            if generation == self._generation:
+                self._counts[group] = (count, now)
+        return count
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._counts.clear()
+
+
+participant_counts = CountCache()
@@ -0,0 +1,107 @@
+# backend/services/password_pool.py
+#
+# Bounded worker pool for password hashing and verification.
+#
+# werkzeug's generate_password_hash / check_password_hash run a deliberately
+# slow KDF (scrypt by default). Called inline under the eventlet server they
+# hold the hub for the whole computation, so every green thread -- including
+# the live /api/stress streams -- stalls while someone logs in.
+#
+# PasswordPool runs the KDF on real OS threads (eventlet.tpool when the
+# process is monkey-patched, a ThreadPoolExecutor otherwise); hashlib drops
+# the GIL while it works, so the caller only waits on its own green thread.
+# At most `max_workers` KDFs run at once; callers beyond that wait up to
+# `queue_timeout` seconds for a slot, and once `max_queue` callers are already
+# waiting new ones are refused straight away. Either way PasswordPoolBusy is
+# raised so the route can answer 503 instead of piling up work.
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordPoolBusy(RuntimeError):
+    pass
+
+
+def green_patched():
+    # only look at eventlet if something already imported it
+    if "eventlet" not in sys.modules:
+        return False
+    from eventlet import patcher
+    return patcher.is_monkey_patched("thread")
+
+
+class PasswordPool:
+    def __init__(self, max_workers=2, max_queue=64, queue_timeout=5.0):
+        self.max_workers = max(int(max_workers), 1)
+        self.max_queue = int(max_queue)
+        self.queue_timeout = float(queue_timeout)
+
+        # decided once: under eventlet these primitives are green and the KDF
+        # goes through tpool; otherwise plain threads
+        self.green = green_patched()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._executor = None
+
+        self.calls = 0
+        self.rejected = 0
+
+    def _call(self, fn, *args):
+        if self.green:
+            from eventlet import tpool
+            return tpool.execute(fn, *args)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="password-pool")
+        return self._executor.submit(fn, *args).result()
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolBusy("password pool queue is full")
+            self._waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy("timed out waiting for a password worker")
+
+        try:
+            self.calls += 1
+            return self._call(fn, *args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password)
+
+    def verify(self, pwhash, password):
+        if not pwhash or password is None:
+            return False
+        return self.run(check_password_hash, pwhash, password)
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+password_pool = PasswordPool(
+    max_workers=int(os.environ.get("PASSWORD_POOL_WORKERS", 2)),
+    max_queue=int(os.environ.get("PASSWORD_POOL_MAX_QUEUE", 64)),
+    queue_timeout=float(os.environ.get("PASSWORD_POOL_QUEUE_TIMEOUT", 5.0)),
+)
@@ -1,7 +1,254 @@
-# simple helper to broadcast monitor updates via socketio
+# backend/services/realtime_events.py
+#
+# Coalescing, rate-limited monitor broadcasts over Socket.IO.
+#
+# Emitting one `monitor_update` per stress sample swamps admin browsers once
+# a cohort is streaming at 1 Hz or more. MonitorBroadcaster keeps only the
+# latest state per participant and, every 1/tick_hz seconds, sends each room
+# a single `monitor_frame` holding the participants whose state changed since
+# that room's previous frame:
+#
+#   json:   {"t": <epoch s>, "updates": [{"participant_id", "ts", **state}, ...]}
+#   binary: bytes, see encode_binary_frame() / frontend/src/lib/monitorFrame.ts
+#
+# Backpressure is per room: a room holds at most `max_pending` participants
+# (the least recently updated are dropped past that), a frame carries at most
+# `max_frame` of them (the rest wait for the next tick), a room whose emit is
+# slow is flushed less often, and a room whose emit fails backs off
+# exponentially while its updates keep coalescing. Counters (published,
+# merged, unchanged, dropped, frames, sent, emit_errors) are kept on the
+# broadcaster. With tick_hz <= 0 there is no background thread and the
+# caller flushes.
+#
+# routes/socket_events.py builds the broadcaster for the app's Socket.IO
+# server; POST /api/stress publishes every scored sample through
+# emit_monitor_update().
+
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+MONITOR_ROOM = "monitor_admin"
+FRAME_EVENT = "monitor_frame"
+
+MONITOR_TICK_HZ = float(os.environ.get("MONITOR_TICK_HZ", 4))
+MONITOR_ENCODING = os.environ.get("MONITOR_ENCODING", "json")
+
+# numeric state carried by binary frames, in wire order (float32, NaN = missing)
+BINARY_FIELDS = ("proba_high", "ema_high", "label", "smoothed_label", "difficulty")
+BINARY_MAGIC = b"MF"
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<2sBBdH")   # magic, version, field count, t, entries
+_ENTRY_TS = struct.Struct("<d")
+
+
+def encode_binary_frame(t, updates, fields=BINARY_FIELDS):
+    """Pack [(participant_id, state, ts)] into a compact little-endian frame.
+
+    header: b"MF", u8 version, u8 n_fields, f64 t, u16 n_entries
+    entry:  u8 id_len, id (utf-8), f64 ts, n_fields x f32
+    """
+    values = struct.Struct(f"<{len(fields)}f")
+    out = [_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(fields), t, len(updates))]
+    for pid, state, ts in updates:
+        raw = pid.encode("utf-8")[:255]
+        out.append(bytes((len(raw),)) + raw)
+        out.append(_ENTRY_TS.pack(ts))
+        nums = []
+        for f in fields:
+            v = state.get(f)
+            nums.append(float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else math.nan)
+        out.append(values.pack(*nums))
+    return b"".join(out)
+
+
+def decode_binary_frame(data, fields=BINARY_FIELDS):
+    magic, version, n_fields, t, n = _HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION or n_fields != len(fields):
+        raise ValueError("not a monitor frame")
+    values = struct.Struct(f"<{n_fields}f")
+    pos = _HEADER.size
+    updates = []
+    for _ in range(n):
+        ln = data[pos]
+        pid = data[pos + 1:pos + 1 + ln].decode("utf-8")
+        pos += 1 + ln
+        ts, = _ENTRY_TS.unpack_from(data, pos)
+        pos += _ENTRY_TS.size
+        nums = values.unpack_from(data, pos)
+        pos += values.size
+        state = {f: v for f, v in zip(fields, nums) if not math.isnan(v)}
+        updates.append({"participant_id": pid, "ts": ts, **state})
+    return {"t": t, "updates": updates}
+
+
+class _Room:
+    __slots__ = ("pending", "last_sent", "next_at", "failures")
+
+    def __init__(self):
+        self.pending = OrderedDict()   # pid -> (state, ts), least recent first
+        self.last_sent = {}            # pid -> state, for delta suppression
+        self.next_at = 0.0
+        self.failures = 0
+
+
+class MonitorBroadcaster:
+    def __init__(self, socketio, tick_hz=MONITOR_TICK_HZ, encoding=MONITOR_ENCODING, max_pending=5000,
+                 max_frame=1000, max_backoff=10.0, event=FRAME_EVENT):
+        if encoding not in ("json", "binary"):
+            raise ValueError(f"unknown encoding {encoding!r}")
+        self.socketio = socketio
+        self.interval = 1.0 / max(float(tick_hz), 0.1) if tick_hz > 0 else 0.0
+        self.encoding = encoding
+        self.max_pending = int(max_pending)
+        self.max_frame = int(max_frame)
+        self.max_backoff = float(max_backoff)
+        self.event = event
+
+        self._rooms = {}
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopped = False
+
+        self.published = 0
+        self.merged = 0       # replaced by a newer state before it was sent
+        self.unchanged = 0    # identical to what the room last received
+        self.dropped = 0      # evicted by the per-room pending cap
+        self.frames = 0
+        self.sent = 0         # participant updates delivered in frames
+        self.emit_errors = 0
+
+    def publish(self, pid, state, room=MONITOR_ROOM):
+        now = time.time()
+        with self._cond:
+            if self._stopped:
+                return
+            if self.interval and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._run, name="monitor-broadcaster", daemon=True)
+                self._worker.start()
+            r = self._rooms.get(room)
+            if r is None:
+                r = self._rooms[room] = _Room()
+            self.published += 1
+            if pid in r.pending:
+                self.merged += 1
+                r.pending.move_to_end(pid)
+            r.pending[pid] = (dict(state), now)
+            while len(r.pending) > self.max_pending:
+                r.pending.popitem(last=False)
+                self.dropped += 1
+
+    def stats(self):
+        with self._cond:
+            pending = sum(len(r.pending) for r in self._rooms.values())
+        return {
+            "published": self.published, "merged": self.merged, "unchanged": self.unchanged,
+            "dropped": self.dropped, "frames": self.frames, "sent": self.sent,
+            "emit_errors": self.emit_errors, "pending": pending,
+        }
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+        else:
+            self.flush(now=math.inf)
+
+    def _take(self, room, r):
+        # pop up to max_frame changed participants for one frame
+        batch = []
+        while r.pending and len(batch) < self.max_frame:
+            pid, (state, ts) = r.pending.popitem(last=False)
+            if r.last_sent.get(pid) == state:
+                self.unchanged += 1
+                continue
+            batch.append((pid, state, ts))
+        return batch
+
+    def _frame(self, batch):
+        t = time.time()
+        if self.encoding == "binary":
+            return encode_binary_frame(t, batch)
+        return {"t": t, "updates": [{"participant_id": pid, "ts": ts, **state} for pid, state, ts in batch]}
+
+    def flush(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            due = []
+            for room, r in self._rooms.items():
+                if r.pending and r.next_at <= now:
+                    batch = self._take(room, r)
+                    if batch:
+                        due.append((room, r, batch))
+
+        for room, r, batch in due:
+            start = time.monotonic()
+            try:
+                self.socketio.emit(self.event, self._frame(batch), room=room)
+            except Exception:
+                log.exception("monitor frame to %s failed", room)
+                with self._cond:
+                    self.emit_errors += 1
+                    r.failures += 1
+                    r.next_at = now + min(self.interval * 2 ** r.failures, self.max_backoff)
+                    # put the states back unless something newer arrived meanwhile
+                    for pid, state, ts in batch:
+                        if pid not in r.pending:
+                            r.pending[pid] = (state, ts)
+                            r.pending.move_to_end(pid, last=False)
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self.frames += 1
+                self.sent += len(batch)
+                r.failures = 0
+                # a slow room (long emit) is ticked no faster than it drains
+                r.next_at = now + max(self.interval, 2 * elapsed)
+                for pid, state, _ in batch:
+                    r.last_sent[pid] = state
+        return len(due)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    break
+                self._cond.wait(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("monitor broadcaster flush failed")
+        self.flush(now=math.inf)
+
+
+_broadcasters = {}
+_broadcasters_lock = threading.Lock()
+
+
+def broadcaster_for(socketio, **kwargs):
+    """Shared MonitorBroadcaster for a Socket.IO server (created on first use)."""
+    with _broadcasters_lock:
+        b = _broadcasters.get(id(socketio))
+        if b is None or b.socketio is not socketio:
+            b = _broadcasters[id(socketio)] = MonitorBroadcaster(socketio, **kwargs)
+        return b
+
+
+def broadcasters():
+    with _broadcasters_lock:
+        return list(_broadcasters.values())
+
+
 def emit_monitor_update(socketio, pid, payload):
-    try:
-        room = "monitor_admin"
-        socketio.emit("monitor_update", {"participant_id": pid, **payload}, room=room)
-    except Exception:
-        pass
+    # coalesced: delivered in the next monitor_frame, not one message per call
+    broadcaster_for(socketio).publish(pid, payload)
@@ -0,0 +1,188 @@
+# backend/services/reports.py
+#
+# Cached participant PDF reports, rendered off the web process.
+#
+# A report is keyed by a content hash of the participant's log watermark --
+# (row count, max id) of their TaskLog and StressLog rows -- plus the render
+# settings. Logs are append-only, so an unchanged watermark means an
+# unchanged report: a cached PDF is served straight from disk and the
+# database sees two index-only aggregate queries.
+#
+# A missing report is rendered in a spawn-based process pool (matplotlib and
+# the rows never enter the web process). The worker reads only rows up to
+# the watermark, so the file always matches its key. Concurrent requests for
+# the same key share one render, and once a participant's new report is
+# written their older ones are removed.
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.base import make_engine
+from backend.database.models import StressLog, TaskLog
+from backend.reports.report_generator import MAX_POINTS
+
+logger = logging.getLogger("backend")
+
+# bump when the report layout changes so cached files are re-rendered
+REPORT_FORMAT = 1
+
+
+###############################################################
+# RENDER WORKER (runs in a child process)
+###############################################################
+
+def _render(database_url, participant_id, watermark, path, max_points):
+    from backend.reports.report_generator import render_report
+
+    engine = make_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    try:
+        (_, task_max), (_, stress_max) = watermark
+        task_logs = [
+            {"timestamp": r.timestamp, "correct": r.correct}
+            for r in db.query(TaskLog.timestamp, TaskLog.correct)
+            .filter(TaskLog.participant_id == participant_id, TaskLog.id <= (task_max or 0))
+            .order_by(TaskLog.timestamp, TaskLog.id)
+        ]
+        stress_logs = [
+            {"timestamp": r.timestamp, "ema_high": r.ema_high}
+            for r in db.query(StressLog.timestamp, StressLog.ema_high)
+            .filter(StressLog.participant_id == participant_id, StressLog.id <= (stress_max or 0))
+            .order_by(StressLog.timestamp, StressLog.id)
+        ]
+    finally:
+        db.close()
+        engine.dispose()
+
+    pdf = render_report(participant_id, task_logs, stress_logs, max_points=max_points)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+    return {"path": path, "size": len(pdf), "task_rows": len(task_logs), "stress_rows": len(stress_logs)}
+
+
+###############################################################
+# REPORT SERVICE
+###############################################################
+
+class ReportService:
+    def __init__(self, database_url, report_dir, workers=2, max_points=MAX_POINTS):
+        self.database_url = database_url
+        self.report_dir = report_dir
+        self.workers = max(int(workers or 1), 1)
+        self.max_points = max_points
+        self._pool = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.renders = 0
+
+    def _pool_executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that holds eventlet hubs,
+                # DB connections or writer threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def watermark(self, db, participant_id):
+        """((task rows, max task id), (stress rows, max stress id))."""
+        return tuple(
+            tuple(db.query(func.count(m.id), func.max(m.id)).filter(m.participant_id == participant_id).one())
+            for m in (TaskLog, StressLog)
+        )
+
+    def key(self, participant_id, watermark):
+        raw = json.dumps([REPORT_FORMAT, self.max_points, participant_id, watermark])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _prefix(self, participant_id):
+        # participant ids are user input; file names only carry their hash
+        return hashlib.sha1(participant_id.encode()).hexdigest()[:16]
+
+    def path(self, participant_id, key):
+        return os.path.join(self.report_dir, f"{self._prefix(participant_id)}-{key[:20]}.pdf")
+
+    def cached(self, participant_id, key):
+        p = self.path(participant_id, key)
+        return p if os.path.exists(p) else None
+
+    def render(self, participant_id, watermark, key):
+        """Future for the PDF path of `key`; joins a render already in flight."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = self.path(participant_id, key)
+        pool = self._pool_executor()
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = self._inflight[key] = pool.submit(
+                    _render, self.database_url, participant_id, watermark, path, self.max_points
+                )
+                self.renders += 1
+                fut.add_done_callback(lambda f: self._finished(participant_id, key, f))
+        return fut
+
+    def _finished(self, participant_id, key, fut):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            logger.error("report for %s failed: %s", participant_id, fut.exception())
+            return
+        res = fut.result()
+        logger.info("report for %s: %d task / %d stress rows, %d bytes",
+                    participant_id, res["task_rows"], res["stress_rows"], res["size"])
+        # one report per participant: drop the ones this replaces
+        prefix = self._prefix(participant_id) + "-"
+        keep = os.path.basename(res["path"])
+        try:
+            for name in os.listdir(self.report_dir):
+                if name.startswith(prefix) and name.endswith(".pdf") and name != keep:
+                    os.remove(os.path.join(self.report_dir, name))
+        except OSError:
+            pass
+
+    def get(self, participant_id, watermark, wait=0):
+        """(key, path) of the report for `watermark` (see watermark()).
+
+        path is None while a render is still running after `wait` seconds;
+        a failed render raises its exception.
+        """
+        key = self.key(participant_id, watermark)
+        path = self.cached(participant_id, key)
+        if path:
+            self.hits += 1
+            return key, path
+        fut = self.render(participant_id, watermark, key)
+        try:
+            return key, fut.result(timeout=wait)["path"]
+        except FutureTimeout:
+            return key, None
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"hits": self.hits, "renders": self.renders, "inflight": inflight}
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,279 @@
+# backend/services/rollups.py
+#
+# Time-bucket rollups of the dashboard series.
+#
+# Every StressLog / TaskLog insert also folds its values into MetricRollup
+# rows -- count / sum / min / max per (series, participant, resolution,
+# bucket) -- with one upsert per touched bucket, in the same transaction as
+# the log rows. Chart queries then read buckets instead of raw rows:
+# query_series() picks the finest resolution whose bucket count fits the
+# point budget for the requested range, so the work per chart load is
+# bounded by its width in pixels, not by how long the session ran.
+#
+#   python -m backend.services.rollups --rebuild [--participant P]
+
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from backend.database.models import MetricRollup, StressLog, TaskLog
+
+# bucket widths in seconds, finest first
+RESOLUTIONS = (1, 10, 60, 600)
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _number(v):
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def _correct(v):
+    return None if v is None else (1.0 if v else 0.0)
+
+
+# series name -> (source table, value of one inserted row)
+SERIES = {
+    "ema_high": ("stress", lambda r: _number(r.get("ema_high"))),
+    "accuracy": ("task", lambda r: _correct(r.get("correct"))),
+    "reaction_time_ms": ("task", lambda r: _number(r.get("reaction_time_ms"))),
+}
+
+
+def bucket_start(ts, resolution):
+    seconds = (ts - EPOCH) // timedelta(seconds=resolution) * resolution
+    return EPOCH + timedelta(seconds=seconds)
+
+
+###############################################################
+# INCREMENTAL MAINTENANCE
+###############################################################
+
+def aggregate(stress_rows=(), task_rows=(), resolutions=RESOLUTIONS):
+    """{(series, participant_id, resolution, bucket_start): [count, sum, min, max]}"""
+    sources = {"stress": stress_rows, "task": task_rows}
+    acc = {}
+    for name, (source, value) in SERIES.items():
+        for r in sources[source]:
+            pid = r.get("participant_id")
+            v = value(r)
+            if pid is None or v is None:
+                continue
+            secs = (r.get("timestamp") or datetime.utcnow()) - EPOCH
+            secs = secs.days * 86400 + secs.seconds
+            for res in resolutions:
+                key = (name, pid, res, secs - secs % res)
+                agg = acc.get(key)
+                if agg is None:
+                    acc[key] = [1, v, v, v]
+                else:
+                    agg[0] += 1
+                    agg[1] += v
+                    if v < agg[2]:
+                        agg[2] = v
+                    if v > agg[3]:
+                        agg[3] = v
+    return {(name, pid, res, EPOCH + timedelta(seconds=b)): agg
+            for (name, pid, res, b), agg in acc.items()}
+
+
+def _upsert_stmt(dialect):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(MetricRollup)
+    new, cur = stmt.excluded, MetricRollup.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=["series", "participant_id", "resolution", "bucket_start"],
+        set_={
+            "count": cur.count + new.count,
+            "sum": cur.sum + new.sum,
+            "min": case((new.min < cur.min, new.min), else_=cur.min),
+            "max": case((new.max > cur.max, new.max), else_=cur.max),
+        },
+    )
+
+
+def apply_rollups(dbs, stress_rows=(), task_rows=(), resolutions=RESOLUTIONS):
+    """Fold newly inserted log rows into their buckets; caller commits."""
+    buckets = aggregate(stress_rows, task_rows, resolutions)
+    if not buckets:
+        return 0
+    # sorted, so concurrent writers lock buckets in the same order
+    rows = [
+        {"series": s, "participant_id": pid, "resolution": res, "bucket_start": b,
+         "count": c, "sum": total, "min": lo, "max": hi}
+        for (s, pid, res, b), (c, total, lo, hi) in sorted(buckets.items())
+    ]
+    stmt = _upsert_stmt(dbs.get_bind().dialect.name)
+    if stmt is not None:
+        dbs.execute(stmt, rows)
+        return len(rows)
+
+    # no native upsert: read-modify-write
+    for row in rows:
+        cur = dbs.query(MetricRollup).filter_by(
+            series=row["series"], participant_id=row["participant_id"],
+            resolution=row["resolution"], bucket_start=row["bucket_start"]
+        ).with_for_update().first()
+        if cur is None:
+            dbs.add(MetricRollup(**row))
+        else:
+            cur.count += row["count"]
+            cur.sum += row["sum"]
+            cur.min = min(cur.min, row["min"])
+            cur.max = max(cur.max, row["max"])
+    dbs.flush()
+    return len(rows)
+
+
+def rebuild_rollups(dbs, participant_id=None, chunk_rows=10000, resolutions=RESOLUTIONS):
+    """Recompute rollups from the raw logs (backfill, or after a schema change)."""
+    q = dbs.query(MetricRollup)
+    if participant_id is not None:
+        q = q.filter(MetricRollup.participant_id == participant_id)
+    q.delete(synchronize_session=False)
+
+    sources = (
+        ("stress", StressLog, (StressLog.participant_id, StressLog.timestamp, StressLog.ema_high)),
+        ("task", TaskLog, (TaskLog.participant_id, TaskLog.timestamp, TaskLog.correct,
+                           TaskLog.reaction_time_ms)),
+    )
+    total = 0
+    for source, model, cols in sources:
+        q = dbs.query(*cols)
+        if participant_id is not None:
+            q = q.filter(model.participant_id == participant_id)
+        chunk = []
+        for r in q.order_by(model.id).yield_per(chunk_rows):
+            chunk.append(r._asdict())
+            if len(chunk) >= chunk_rows:
+                total += apply_rollups(dbs, **{f"{source}_rows": chunk}, resolutions=resolutions)
+                chunk = []
+        if chunk:
+            total += apply_rollups(dbs, **{f"{source}_rows": chunk}, resolutions=resolutions)
+    return total
+
+
+###############################################################
+# QUERIES
+###############################################################
+
+def bucket_count(start, end, width):
+    # epoch-aligned buckets of `width` seconds that [start, end) touches; an
+    # unaligned range touches one more than its length divided by the width
+    w = timedelta(seconds=width)
+    return -((EPOCH - end) // w) - (start - EPOCH) // w
+
+
+def pick_resolution(start, end, max_points, resolutions=RESOLUTIONS):
+    # finest bucket width that still fits the budget; coarser ones would
+    # waste pixels, finer ones would send more points than can be drawn
+    for res in sorted(resolutions):
+        if bucket_count(start, end, res) <= max_points:
+            return res
+    return max(resolutions)
+
+
+def series_extent(dbs, series, participant_id, resolutions=RESOLUTIONS):
+    # first and last bucket of the finest rollup: two index seeks, exact to
+    # the second
+    res = min(resolutions)
+    q = dbs.query(MetricRollup.bucket_start).filter(
+        MetricRollup.series == series,
+        MetricRollup.participant_id == participant_id,
+        MetricRollup.resolution == res,
+    )
+    lo = q.order_by(MetricRollup.bucket_start).limit(1).scalar()
+    if lo is None:
+        return None, None
+    hi = q.order_by(MetricRollup.bucket_start.desc()).limit(1).scalar()
+    return lo, hi + timedelta(seconds=res)
+
+
+def query_series(dbs, series, participant_id, start=None, end=None, max_points=DEFAULT_POINTS,
+                 resolutions=RESOLUTIONS):
+    """Bucketed [start, end) series with at most `max_points` points."""
+    if series not in SERIES:
+        raise ValueError(f"unknown series {series!r}")
+    max_points = max(1, min(int(max_points), MAX_POINTS))
+
+    if start is None or end is None:
+        lo, hi = series_extent(dbs, series, participant_id, resolutions)
+        start = start or lo
+        end = end or hi
+    out = {"series": series, "participant_id": participant_id, "resolution": None,
+           "start": start.isoformat() if start else None,
+           "end": end.isoformat() if end else None, "points": []}
+    if start is None or end is None or end <= start:
+        return out
+
+    res = pick_resolution(start, end, max_points, resolutions)
+    rows = dbs.query(
+        MetricRollup.bucket_start, MetricRollup.count, MetricRollup.sum,
+        MetricRollup.min, MetricRollup.max
+    ).filter(
+        MetricRollup.series == series,
+        MetricRollup.participant_id == participant_id,
+        MetricRollup.resolution == res,
+        MetricRollup.bucket_start >= bucket_start(start, res),
+        MetricRollup.bucket_start < end,
+    ).order_by(MetricRollup.bucket_start).all()
+
+    # the range is wider than even the coarsest rollup allows: merge
+    # adjacent buckets until the budget fits. Merged buckets are aligned to
+    # their own width, so the first guess can still be one bucket over
+    width = res
+    n = bucket_count(start, end, res)
+    if n > max_points:
+        width = res * math.ceil(n / max_points)
+        while bucket_count(start, end, width) > max_points:
+            width += res
+
+    points = []
+    for r in rows:
+        b = bucket_start(r.bucket_start, width)
+        if points and points[-1][0] == b:
+            p = points[-1]
+            p[1] += r.count
+            p[2] += r.sum
+            p[3] = min(p[3], r.min)
+            p[4] = max(p[4], r.max)
+        else:
+            points.append([b, r.count, r.sum, r.min, r.max])
+
+    out["resolution"] = width
+    out["points"] = [
+        {"t": b.isoformat(), "count": c, "mean": total / c, "min": lo, "max": hi}
+        for b, c, total, lo, hi in points
+    ]
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backend.database.base import SessionLocal
+
+    ap = argparse.ArgumentParser(description="rebuild metric rollups from the raw logs")
+    ap.add_argument("--rebuild", action="store_true", required=True)
+    ap.add_argument("--participant")
+    args = ap.parse_args()
+
+    dbs = SessionLocal()
+    try:
+        n = rebuild_rollups(dbs, participant_id=args.participant)
+        dbs.commit()
+    finally:
+        dbs.close()
+    print(f"{n} rollup upserts")
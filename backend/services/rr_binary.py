@@ -0,0 +1,156 @@
+# backend/services/rr_binary.py
+#
+# Compact binary RR-interval packets, for wearables that post at high rate.
+#
+# Parsing a JSON number array builds one Python float per beat before NumPy
+# ever sees it. A packet instead carries the beats as packed little-endian
+# uint16 (whole milliseconds) or float32 values; decode_rr_packet() returns
+# an np.frombuffer view over the request bytes, and rr_features() in app.py
+# computes on that view directly, so no per-beat Python objects are created
+# and the payload is never copied.
+#
+#   header: b"RR", u8 version, u8 flags, u32 seq, u16 n_beats, u8 token_len, u8 pad
+#   token:  token_len bytes (ascii session token; 0 = use the Bearer header)
+#   pad:    zero bytes up to a multiple of 4
+#   beats:  n_beats x u16 (flags & FLAG_FLOAT32 == 0) or n_beats x f32
+#
+# flags: FLAG_FLOAT32, FLAG_STREAM (push into the rolling window, as the JSON
+# "stream" option). Sequence numbers are per session token and wrap at 2**32;
+# SequenceTracker classifies each packet as in order, after a gap, or a
+# duplicate / stale retransmission with one dict lookup; a packet rejected
+# after that (bad beats, scoring error) is reverted, so its retransmission
+# is not mistaken for a duplicate.
+#
+# frontend/src/lib/rrPacket.ts builds the same packets.
+
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+RR_MAGIC = b"RR"
+RR_VERSION = 1
+FLAG_FLOAT32 = 0x01
+FLAG_STREAM = 0x02
+CONTENT_TYPE = "application/x-rr-packet"
+
+MAX_BEATS = 4096
+_HEADER = struct.Struct("<2sBBIHBx")
+_DTYPES = {0: np.dtype("<u2"), FLAG_FLOAT32: np.dtype("<f4")}
+
+SEQ_OK = "ok"
+SEQ_GAP = "gap"
+SEQ_DUPLICATE = "duplicate"
+
+
+class RRPacketError(ValueError):
+    pass
+
+
+def _beats_offset(token_len):
+    return (_HEADER.size + token_len + 3) & ~3
+
+
+def encode_rr_packet(token, seq, rr, float32=False, stream=False):
+    raw = (token or "").encode("ascii")
+    if len(raw) > 255:
+        raise RRPacketError("token too long")
+    dtype = _DTYPES[FLAG_FLOAT32 if float32 else 0]
+    beats = np.asarray(rr).astype(dtype, copy=False)
+    if beats.size > MAX_BEATS:
+        raise RRPacketError(f"at most {MAX_BEATS} beats per packet")
+    flags = (FLAG_FLOAT32 if float32 else 0) | (FLAG_STREAM if stream else 0)
+    head = _HEADER.pack(RR_MAGIC, RR_VERSION, flags, seq & 0xFFFFFFFF, beats.size, len(raw)) + raw
+    return head.ljust(_beats_offset(len(raw)), b"\0") + beats.tobytes()
+
+
+def decode_rr_packet(data):
+    """Parse a packet; returns (token or None, seq, beats view, stream flag).
+
+    `beats` is a read-only np.frombuffer view over `data` (uint16 or
+    float32), not a copy.
+    """
+    if len(data) < _HEADER.size:
+        raise RRPacketError("truncated header")
+    magic, version, flags, seq, n, token_len = _HEADER.unpack_from(data, 0)
+    if magic != RR_MAGIC or version != RR_VERSION:
+        raise RRPacketError("not an RR packet")
+    if n == 0 or n > MAX_BEATS:
+        raise RRPacketError(f"packet must carry 1..{MAX_BEATS} beats")
+    dtype = _DTYPES.get(flags & FLAG_FLOAT32)
+    offset = _beats_offset(token_len)
+    if len(data) != offset + n * dtype.itemsize:
+        raise RRPacketError("packet length does not match its header")
+    try:
+        token = bytes(data[_HEADER.size:_HEADER.size + token_len]).decode("ascii") if token_len else None
+    except UnicodeDecodeError:
+        raise RRPacketError("token must be ascii") from None
+    beats = np.frombuffer(data, dtype=dtype, count=n, offset=offset)
+    if dtype.kind == "f" and not np.isfinite(beats).all():
+        raise RRPacketError("beats must be finite")
+    return token, seq, beats, bool(flags & FLAG_STREAM)
+
+
+class SequenceTracker:
+    """Last accepted sequence number per session token (LRU, `capacity` tokens)."""
+
+    def __init__(self, capacity=100_000):
+        self.capacity = int(capacity)
+        self._last = OrderedDict()
+        self._lock = threading.Lock()
+        self.gaps = 0
+        self.missing = 0
+        self.duplicates = 0
+
+    def check(self, token, seq):
+        """Record `seq` for `token`; returns (SEQ_OK | SEQ_GAP | SEQ_DUPLICATE, packets missed).
+
+        Duplicates and packets older than the last accepted one leave the
+        state alone; the caller should not score them again.
+        """
+        with self._lock:
+            entry = self._last.get(token)
+            last = None if entry is None else entry[0]
+            if last is None:
+                status, missed = SEQ_OK, 0
+            else:
+                delta = (seq - last) & 0xFFFFFFFF
+                if delta == 0 or delta >= 0x80000000:
+                    self.duplicates += 1
+                    return SEQ_DUPLICATE, 0
+                status, missed = (SEQ_OK, 0) if delta == 1 else (SEQ_GAP, delta - 1)
+                self._last.move_to_end(token)
+            # the previous seq is kept so a rejected packet can be reverted
+            self._last[token] = (seq, last)
+            if status == SEQ_GAP:
+                self.gaps += 1
+                self.missing += missed
+            while len(self._last) > self.capacity:
+                self._last.popitem(last=False)
+            return status, missed
+
+    def revert(self, token, seq):
+        """Undo check(token, seq) for a packet that was then rejected, so its
+        retransmission is accepted; a no-op once a later seq was recorded."""
+        with self._lock:
+            entry = self._last.get(token)
+            if entry is None or entry[0] != seq:
+                return False
+            prev = entry[1]
+            if prev is None:
+                del self._last[token]
+            else:
+                self._last[token] = (prev, None)
+                missed = ((seq - prev) & 0xFFFFFFFF) - 1
+                if missed:
+                    self.gaps -= 1
+                    self.missing -= missed
+            return True
+
+    def drop(self, token):
+        with self._lock:
+            self._last.pop(token, None)
+
+    def __len__(self):
+        return len(self._last)
@@ -0,0 +1,84 @@
+# backend/services/streaming.py
+#
+# Chunked writers for streamed downloads.
+#
+# Export routes hand Flask a generator instead of a fully built file. Rows
+# are written into a small buffer which is yielded whenever it grows past
+# `chunk_size`, so memory stays bounded by one chunk (plus whatever the
+# database cursor holds) no matter how many rows are exported.
+
+import csv
+import io
+import json
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Sink:
+    # write-only file object; ZipFile falls back to streaming mode (data
+    # descriptors, no seeking) when tell()/seek() are unavailable
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        self.size += len(b)
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        out = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return out
+
+
+def csv_stream(header, rows, chunk_size=CHUNK_SIZE):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    if header:
+        w.writerow(header)
+    for row in rows:
+        w.writerow(row)
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def ndjson_lines(records, chunk_size=CHUNK_SIZE):
+    parts, size = [], 0
+    for rec in records:
+        line = json.dumps(rec, default=str) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def zip_stream(entries, chunk_size=CHUNK_SIZE, compression=zipfile.ZIP_DEFLATED):
+    """Yield a ZIP archive built from (name, iterable of bytes) entries.
+
+    Each entry is compressed as its chunks arrive; nothing but the current
+    chunk and the central directory is held in memory.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=compression) as zf:
+        for name, chunks in entries:
+            with zf.open(name, "w", force_zip64=True) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    if sink.size >= chunk_size:
+                        yield sink.drain()
+            if sink.size:
+                yield sink.drain()
+    yield sink.drain()
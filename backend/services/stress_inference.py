@@ -0,0 +1,124 @@
+# backend/services/stress_inference.py
+#
+# Micro-batching front end for the stress classifier.
+#
+# Each request contributes a single feature row. Instead of calling
+# predict_proba once per row, callers park their row on a shared queue and a
+# worker thread drains it in batches of up to `max_batch` rows, waiting at
+# most `max_wait_ms` after the oldest row arrived. One predict_proba call on
+# the stacked matrix then answers the whole batch.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from backend.services import metrics
+
+FEATURE_ORDER = ("rmssd", "sdnn", "mean_rr", "mean_hr")
+
+
+def feature_row(feat):
+    # missing features (too few beats) are scored as 0, as before
+    return [feat[k] or 0 for k in FEATURE_ORDER]
+
+
+class StressBatcher:
+    def __init__(self, model, max_batch=32, max_wait_ms=2.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.model = model
+        self.max_batch = int(max_batch)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopped = False
+
+        # simple counters, handy when tuning batch size / wait
+        self.batches = 0
+        self.rows = 0
+
+    # ---------------------------------------------------------
+    # public API
+    # ---------------------------------------------------------
+
+    def submit(self, row):
+        fut = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("stress batcher is stopped")
+            self._ensure_worker()
+            self._pending.append((time.monotonic(), row, fut))
+            self._cond.notify()
+        return fut
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout=timeout)
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    # ---------------------------------------------------------
+    # worker
+    # ---------------------------------------------------------
+
+    def _ensure_worker(self):
+        # caller holds self._cond
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="stress-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            deadline = self._pending[0][0] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            n = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            futures = [fut for _, _, fut in batch]
+            try:
+                X = np.asarray([row for _, row, _ in batch], dtype=float)
+                t0 = time.perf_counter()
+                proba = self.model.predict_proba(X)
+                metrics.inference_seconds.observe(time.perf_counter() - t0)
+            except Exception as e:
+                for fut in futures:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            metrics.inference_rows.observe(len(batch))
+            for fut, p in zip(futures, proba):
+                fut.set_result(p.tolist())
@@ -0,0 +1,256 @@
+# backend/services/stress_state.py
+#
+# Write-behind cache for live per-session stress state.
+#
+# The stress endpoint used to read Session.ema_high and insert a StressLog row
+# synchronously for every sample. StressStateCache keeps the live EMA,
+# smoothed label and difficulty for each active session in memory and hands
+# the database work to a background thread, which flushes Session.ema_high
+# updates and batched StressLog inserts every `flush_interval` seconds or as
+# soon as `max_pending` rows are queued (folding them into the dashboard
+# rollups, services/rollups.py, in the same transaction). close() drains everything; state for
+# a session not in memory is recovered from its last persisted StressLog row
+# (or the Session row when nothing was logged yet).
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from backend.database import models as db
+from backend.services.rollups import apply_rollups
+from backend.services.write_retry import RetryLedger, ping
+
+logger = logging.getLogger("backend")
+
+
+class SessionState:
+    __slots__ = ("session_id", "participant_id", "ema_high", "smoothed_label",
+                 "difficulty", "dirty", "last_seen")
+
+    def __init__(self, session_id, participant_id, ema_high=0.0,
+                 smoothed_label=None, difficulty=None):
+        self.session_id = session_id
+        self.participant_id = participant_id
+        self.ema_high = ema_high
+        self.smoothed_label = smoothed_label
+        self.difficulty = difficulty
+        self.dirty = False
+        self.last_seen = time.monotonic()
+
+
+class StressStateCache:
+    def __init__(self, session_factory, alpha, label_fn, flush_interval=1.0,
+                 max_pending=256, idle_seconds=900):
+        self.session_factory = session_factory
+        self.alpha = float(alpha)
+        self.label_fn = label_fn
+        self.flush_interval = float(flush_interval)
+        self.max_pending = int(max_pending)
+        self.idle_seconds = float(idle_seconds)
+
+        self._states = {}     # session token -> SessionState
+        self._pending = []    # StressLog rows not yet written
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._worker = None
+        self._retry = RetryLedger("stress state", probe=lambda: ping(self.session_factory))
+
+    # ---------------------------------------------------------
+    # public API
+    # ---------------------------------------------------------
+
+    def get(self, token):
+        """Return the live state for `token`, loading it on a miss.
+
+        Returns None for unknown tokens.
+        """
+        with self._lock:
+            state = self._states.get(token)
+        if state is not None:
+            return state
+
+        state = self._load(token)
+        if state is None:
+            return None
+        with self._lock:
+            # another request may have loaded it meanwhile; keep the first
+            return self._states.setdefault(token, state)
+
+    def observe(self, token, proba, features, model_version=None):
+        """Fold one classifier output into the session EMA and queue its log row.
+
+        Returns a snapshot dict of the updated state, or None for an unknown
+        session token.
+        """
+        state = self.get(token)
+        if state is None:
+            return None
+
+        p_high = float(proba[-1])
+        with self._lock:
+            # re-attach in case an idle sweep dropped it since get()
+            state = self._states.setdefault(token, state)
+            state.ema_high = self.alpha * p_high + (1 - self.alpha) * (state.ema_high or 0.0)
+            state.smoothed_label = self.label_fn(state.ema_high)
+            state.dirty = True
+            state.last_seen = time.monotonic()
+
+            self._pending.append({
+                "participant_id": state.participant_id,
+                "session_token": token,
+                "raw_proba": list(proba),
+                "ema_high": state.ema_high,
+                "smoothed_label": state.smoothed_label,
+                "difficulty": state.difficulty,
+                "features": features,
+                "model_version": model_version,
+                "timestamp": datetime.utcnow(),
+            })
+            snapshot = {
+                "ema_high": state.ema_high,
+                "smoothed_label": state.smoothed_label,
+                "difficulty": state.difficulty,
+            }
+            stopped = self._stopped
+            self._ensure_worker()
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+        if stopped:
+            # no background writer after close(); write through
+            self.flush()
+        return snapshot
+
+    def set_difficulty(self, decisions):
+        """Apply (token, level) decisions; the next StressLog row records them."""
+        with self._lock:
+            for token, level in decisions:
+                state = self._states.get(token)
+                if state is not None:
+                    state.difficulty = level
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write queued rows and dirty EMA values in one transaction.
+
+        If that fails the rows are retried one by one (services/write_retry.py):
+        rows that keep failing are eventually dropped, the rest requeued, and
+        the error re-raised while anything is still pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+                dirty = [s for s in self._states.values() if s.dirty]
+                updates = [{"id": s.session_id, "ema_high": s.ema_high} for s in dirty]
+                for s in dirty:
+                    s.dirty = False
+            if not rows and not dirty:
+                return 0
+
+            try:
+                self._write(rows, updates)
+            except Exception:
+                logger.exception("stress state flush failed (%d rows); retrying row by row", len(rows))
+                with self._lock:
+                    queued = len(self._pending)
+                dropped = self._retry.dropped
+                keep = self._retry.after_failure(self._write, rows, queued) if rows else []
+                try:
+                    if updates:
+                        self._write([], updates)
+                    updated = True
+                except Exception:
+                    updated = False
+                with self._lock:
+                    self._pending[:0] = keep
+                    if not updated:
+                        for s in dirty:
+                            s.dirty = True
+                if keep or not updated:
+                    raise
+                written = len(rows) - (self._retry.dropped - dropped)
+            else:
+                self._retry.written(rows)
+                written = len(rows)
+
+            self._evict_idle()
+            return written
+
+    def close(self, timeout=None):
+        """Stop the background writer and drain everything still queued."""
+        with self._lock:
+            self._stopped = True
+            worker = self._worker
+        self._wake.set()
+        if worker is not None:
+            worker.join(timeout)
+        self.flush()
+
+    # ---------------------------------------------------------
+    # internals
+    # ---------------------------------------------------------
+
+    def _write(self, rows, updates=()):
+        dbs = self.session_factory()
+        try:
+            if rows:
+                dbs.execute(insert(db.StressLog), rows)
+                apply_rollups(dbs, stress_rows=rows)
+            if updates:
+                dbs.execute(update(db.Session), updates)
+            dbs.commit()
+        except Exception:
+            dbs.rollback()
+            raise
+        finally:
+            dbs.close()
+
+    def _load(self, token):
+        dbs = self.session_factory()
+        try:
+            sess = dbs.query(db.Session).filter_by(token=token).first()
+            if not sess:
+                return None
+            last = (
+                dbs.query(db.StressLog)
+                .filter_by(session_token=token)
+                .order_by(db.StressLog.timestamp.desc(), db.StressLog.id.desc())
+                .first()
+            )
+            if last is not None:
+                return SessionState(sess.id, sess.participant_id, last.ema_high or 0.0,
+                                    last.smoothed_label, last.difficulty)
+            return SessionState(sess.id, sess.participant_id, sess.ema_high or 0.0)
+        finally:
+            dbs.close()
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for token in [t for t, s in self._states.items()
+                          if not s.dirty and s.last_seen < cutoff]:
+                del self._states[token]
+
+    def _ensure_worker(self):
+        # caller holds self._lock
+        if self._stopped or (self._worker is not None and self._worker.is_alive()):
+            return
+        self._worker = threading.Thread(target=self._run, name="stress-state-writer", daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # already logged; whatever is left was requeued for the next tick
+                time.sleep(self.flush_interval)
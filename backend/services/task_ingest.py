@@ -0,0 +1,134 @@
+# backend/services/task_ingest.py
+#
+# Group-commit queue for task trial events.
+#
+# Single /api/task/event calls arrive every few hundred ms per participant.
+# Rather than one INSERT + COMMIT per call, each request hands its rows to
+# TaskEventWriter and waits on a future; a writer thread collects everything
+# queued within `max_wait_ms` (up to `max_batch` events) and persists it with
+# one bulk insert into TaskTrial and TaskLog inside one transaction, then
+# resolves every waiting future with the outcome. The dashboard rollups
+# (services/rollups.py) and per-session summaries (services/task_summary.py)
+# are updated in the same transaction.
+# If a batch fails, its events are retried one transaction each, so only the
+# request that sent the bad event sees the error.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from sqlalchemy import insert
+
+from backend.database import models as db
+from backend.services.rollups import apply_rollups
+from backend.services.task_summary import apply_trials
+
+
+def write_events(dbs, trials, logs):
+    # shared by the queue and the synchronous batch endpoint
+    if trials:
+        dbs.execute(insert(db.TaskTrial), trials)
+        apply_trials(dbs, trials)
+    if logs:
+        dbs.execute(insert(db.TaskLog), logs)
+        apply_rollups(dbs, task_rows=logs)
+
+
+class TaskEventWriter:
+    def __init__(self, session_factory, max_batch=500, max_wait_ms=20.0):
+        self.session_factory = session_factory
+        self.max_batch = int(max_batch)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+
+        self._pending = deque()   # (enqueued_at, trial_row, log_row, future)
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopped = False
+
+        self.commits = 0
+        self.events = 0
+
+    def submit(self, trial, log):
+        fut = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("task event writer is stopped")
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="task-event-writer", daemon=True)
+                self._worker.start()
+            self._pending.append((time.monotonic(), trial, log, fut))
+            self._cond.notify()
+        return fut
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            deadline = self._pending[0][0] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            n = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                self._commit(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][3].set_exception(e)
+                    continue
+                # one bad event must not fail everyone else's: retry each
+                # event in its own transaction
+                for item in batch:
+                    try:
+                        self._commit([item])
+                    except Exception as e:
+                        item[3].set_exception(e)
+                    else:
+                        item[3].set_result(True)
+                continue
+
+            for *_, fut in batch:
+                fut.set_result(True)
+
+    def _commit(self, batch):
+        dbs = self.session_factory()
+        try:
+            write_events(
+                dbs,
+                [trial for _, trial, _, _ in batch if trial is not None],
+                [log for _, _, log, _ in batch if log is not None],
+            )
+            dbs.commit()
+        except Exception:
+            dbs.rollback()
+            raise
+        finally:
+            dbs.close()
+        self.commits += 1
+        self.events += len(batch)
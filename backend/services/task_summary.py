@@ -0,0 +1,280 @@
+# backend/services/task_summary.py
+#
+# Incrementally maintained per-session task summaries.
+#
+# /api/task/summary/<id> is polled by the adaptive controller and the
+# end-of-session screen. Instead of scanning TaskTrial on every call, each
+# TaskSession has one TaskSummary row that write_events() folds new trials
+# into, in the same transaction as the trial insert:
+#
+#   - trial / scored / correct counts (running accuracy),
+#   - reaction time count, mean and Welford M2 (variance), min and max,
+#   - a t-digest of reaction times for streaming quantiles,
+#   - the same counts and RT moments per difficulty level.
+#
+# Sessions that predate the table get their row rebuilt from their trials
+# the first time they are touched.
+
+import bisect
+import math
+from datetime import datetime
+
+from backend.database.models import TaskSession, TaskSummary, TaskTrial
+
+DIGEST_COMPRESSION = 100
+QUANTILES = (0.5, 0.9, 0.95)
+
+
+###############################################################
+# T-DIGEST
+###############################################################
+
+class TDigest:
+    """Merging t-digest (Dunning); centroids are [mean, weight] sorted by mean.
+
+    Small inputs stay exact: points are only merged once there are more
+    than `compression` of them, and the k1 scale function keeps centroids
+    near the tails small, so extreme quantiles stay accurate.
+    """
+
+    def __init__(self, centroids=None, compression=DIGEST_COMPRESSION):
+        self.compression = compression
+        self.centroids = [[float(m), float(w)] for m, w in (centroids or [])]
+        self.count = sum(w for _, w in self.centroids)
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def update(self, values):
+        points = sorted(self.centroids + [[float(v), 1.0] for v in values])
+        self.count = sum(w for _, w in points)
+        if len(points) <= self.compression:
+            self.centroids = points
+            return
+
+        merged = [points[0]]
+        before = 0.0    # weight left of the centroid being filled
+        limit = self._k(0.0) + 1
+        for m, w in points[1:]:
+            cur = merged[-1]
+            if self._k((before + cur[1] + w) / self.count) <= limit:
+                cur[1] += w
+                cur[0] += (m - cur[0]) * w / cur[1]
+            else:
+                before += cur[1]
+                limit = self._k(before / self.count) + 1
+                merged.append([m, w])
+        self.centroids = merged
+
+    def quantile(self, q, lo=None, hi=None):
+        """Interpolated q-quantile; lo / hi are the exact min and max, if known."""
+        c = self.centroids
+        if not c:
+            return None
+        lo = c[0][0] if lo is None else lo
+        hi = c[-1][0] if hi is None else hi
+
+        # cumulative weight at each centroid's midpoint
+        mids, cum = [], 0.0
+        for _, w in c:
+            mids.append(cum + w / 2)
+            cum += w
+        target = q * self.count
+        i = bisect.bisect_left(mids, target)
+        if i == 0:
+            x0, y0, x1, y1 = 0.0, lo, mids[0], c[0][0]
+        elif i == len(c):
+            x0, y0, x1, y1 = mids[-1], c[-1][0], self.count, hi
+        else:
+            x0, y0, x1, y1 = mids[i - 1], c[i - 1][0], mids[i], c[i][0]
+        if x1 <= x0:
+            return y1
+        return y0 + (y1 - y0) * (target - x0) / (x1 - x0)
+
+    def to_json(self):
+        return [[m, w] for m, w in self.centroids]
+
+
+###############################################################
+# FOLDING TRIALS INTO A SUMMARY
+###############################################################
+
+def _rt(v):
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def _level(v):
+    return "none" if v is None else str(v)
+
+
+def _welford(stats, n_key, mean_key, m2_key, x):
+    stats[n_key] += 1
+    d = x - stats[mean_key]
+    stats[mean_key] += d / stats[n_key]
+    stats[m2_key] += d * (x - stats[mean_key])
+
+
+def new_summary(ts):
+    return TaskSummary(
+        session_id=ts.id, participant_id=ts.participant_id, task_name=ts.task_name,
+        trials=0, scored=0, correct=0, rt_count=0, rt_mean=0.0, rt_m2=0.0,
+        rt_digest=[], by_difficulty={}
+    )
+
+
+def fold(summary, trials):
+    """Add trial dicts (TaskTrial columns) to `summary` in place."""
+    totals = {k: getattr(summary, k) or 0 for k in
+              ("trials", "scored", "correct", "rt_count", "rt_mean", "rt_m2")}
+    # copied, so the JSON column is seen as changed when reassigned
+    levels = {k: dict(v) for k, v in (summary.by_difficulty or {}).items()}
+    rts = []
+    last = summary.last_trial_at
+
+    for t in trials:
+        level = levels.setdefault(_level(t.get("difficulty_level")), {
+            "trials": 0, "scored": 0, "correct": 0, "rt_count": 0, "rt_mean": 0.0, "rt_m2": 0.0
+        })
+        for stats in (totals, level):
+            stats["trials"] += 1
+        c = t.get("correct")
+        if c is not None:
+            for stats in (totals, level):
+                stats["scored"] += 1
+                stats["correct"] += 1 if c else 0
+        rt = _rt(t.get("reaction_time_ms"))
+        if rt is not None:
+            rts.append(rt)
+            for stats in (totals, level):
+                _welford(stats, "rt_count", "rt_mean", "rt_m2", rt)
+        ts = t.get("timestamp")
+        if ts is not None and (last is None or ts > last):
+            last = ts
+
+    for k, v in totals.items():
+        setattr(summary, k, v)
+    summary.by_difficulty = levels
+    if rts:
+        summary.rt_min = min(rts) if summary.rt_min is None else min(summary.rt_min, min(rts))
+        summary.rt_max = max(rts) if summary.rt_max is None else max(summary.rt_max, max(rts))
+        digest = TDigest(summary.rt_digest)
+        digest.update(rts)
+        summary.rt_digest = digest.to_json()
+    summary.last_trial_at = last
+    summary.updated_at = datetime.utcnow()
+    return summary
+
+
+def _trial_dicts(rows):
+    return [{"correct": r.correct, "reaction_time_ms": r.reaction_time_ms,
+             "difficulty_level": r.difficulty_level, "timestamp": r.timestamp} for r in rows]
+
+
+def rebuild_summary(dbs, session_id):
+    """Recompute one session's summary from its trials; None for an unknown session."""
+    ts = dbs.get(TaskSession, session_id)
+    if ts is None:
+        return None
+    summary = dbs.get(TaskSummary, session_id)
+    if summary is None:
+        summary = new_summary(ts)
+        dbs.add(summary)
+    else:
+        for k in ("trials", "scored", "correct", "rt_count"):
+            setattr(summary, k, 0)
+        summary.rt_mean = summary.rt_m2 = 0.0
+        summary.rt_min = summary.rt_max = summary.last_trial_at = None
+        summary.rt_digest, summary.by_difficulty = [], {}
+    rows = dbs.query(
+        TaskTrial.correct, TaskTrial.reaction_time_ms, TaskTrial.difficulty_level, TaskTrial.timestamp
+    ).filter(TaskTrial.session_id == session_id).order_by(TaskTrial.trial_index, TaskTrial.id)
+    return fold(summary, _trial_dicts(rows))
+
+
+def apply_trials(dbs, trials):
+    """Fold freshly inserted trial rows into their sessions' summaries; caller commits.
+
+    Call after the trials are inserted: the insert takes the write lock
+    first, so concurrent writers serialise on it before reading a summary.
+    """
+    by_session = {}
+    for t in trials:
+        by_session.setdefault(t["session_id"], []).append(t)
+
+    summaries = {
+        s.session_id: s for s in
+        dbs.query(TaskSummary).filter(TaskSummary.session_id.in_(list(by_session))).with_for_update()
+    }
+    for sid, rows in by_session.items():
+        summary = summaries.get(sid)
+        if summary is None:
+            # no summary yet (session created before the table existed); the
+            # rebuild already sees the rows inserted above
+            rebuild_summary(dbs, sid)
+        else:
+            fold(summary, rows)
+
+
+def get_summary(dbs, session_id):
+    """The session's TaskSummary (built on first access for old sessions), or None."""
+    summary = dbs.get(TaskSummary, session_id)
+    if summary is None:
+        summary = rebuild_summary(dbs, session_id)
+        if summary is not None:
+            dbs.commit()
+    return summary
+
+
+###############################################################
+# SERIALISATION
+###############################################################
+
+def _variance(n, m2):
+    # sample variance; 0 for a single value
+    if not n:
+        return None
+    return m2 / (n - 1) if n > 1 else 0.0
+
+
+def _std(n, m2):
+    var = _variance(n, m2)
+    return None if var is None else math.sqrt(var)
+
+
+def summary_dict(s):
+    digest = TDigest(s.rt_digest)
+    rt = {
+        "count": s.rt_count,
+        "mean": s.rt_mean if s.rt_count else None,
+        "variance": _variance(s.rt_count, s.rt_m2),
+        "std": _std(s.rt_count, s.rt_m2),
+        "min": s.rt_min,
+        "max": s.rt_max,
+    }
+    for q in QUANTILES:
+        rt[f"p{round(q * 100)}"] = digest.quantile(q, s.rt_min, s.rt_max)
+
+    return {
+        "session_id": s.session_id,
+        "participant_id": s.participant_id,
+        "task_name": s.task_name,
+        "trials": s.trials,
+        "scored": s.scored,
+        "correct": s.correct,
+        "accuracy": s.correct / s.scored if s.scored else None,
+        "rt": rt,
+        "by_difficulty": {
+            level: {
+                "trials": v["trials"],
+                "accuracy": v["correct"] / v["scored"] if v["scored"] else None,
+                "rt_mean": v["rt_mean"] if v["rt_count"] else None,
+                "rt_std": _std(v["rt_count"], v["rt_m2"]),
+            }
+            for level, v in sorted((s.by_difficulty or {}).items())
+        },
+        "last_trial_at": s.last_trial_at.isoformat() if s.last_trial_at else None,
+    }
@@ -0,0 +1,106 @@
+# backend/services/timeline.py
+#
+# Merged TaskLog + StressLog timeline reader.
+#
+# Both tables are read once, ordered by (participant_id, timestamp, id) --
+# which the composite ix_*_participant_ts indexes serve directly -- and merged
+# with a streaming k-way merge. The result is a lazy iterator of
+# TimelineRecord, so a whole cohort can be walked in one pass over each table
+# instead of two queries per participant.
+
+import heapq
+from collections import namedtuple
+from itertools import groupby
+
+from backend.database.models import TaskLog, StressLog
+
+TimelineRecord = namedtuple(
+    "TimelineRecord", ["participant_id", "timestamp", "task", "trial", "event", "extra"]
+)
+
+CHUNK_ROWS = 1000
+
+
+def timeline_row(r):
+    # export shape of one record
+    return {
+        "timestamp": r.timestamp.isoformat(),
+        "task": r.task,
+        "trial": r.trial,
+        "event": r.event,
+        "extra": r.extra
+    }
+
+
+def pid_order(db, column):
+    # the merge compares participant ids in Python, so the database has to
+    # sort them bytewise too; SQLite does by default, PostgreSQL needs "C"
+    if db.get_bind().dialect.name == "postgresql":
+        return column.collate("C")
+    return column
+
+
+def _ordered(db, q, model, participant_id, first, last):
+    col = model.participant_id
+    if participant_id is not None:
+        q = q.filter(col == participant_id)
+    else:
+        q = q.filter(col.isnot(None))
+        # bounds use the same ordering as the sort below
+        if first is not None:
+            q = q.filter(pid_order(db, col) >= first)
+        if last is not None:
+            q = q.filter(pid_order(db, col) <= last)
+    return q.order_by(pid_order(db, col), model.timestamp, model.id)
+
+
+def _task_records(db, participant_id, first, last, chunk_rows):
+    q = db.query(
+        TaskLog.participant_id, TaskLog.timestamp, TaskLog.task_name,
+        TaskLog.trial_index, TaskLog.event, TaskLog.extra,
+    )
+    q = _ordered(db, q, TaskLog, participant_id, first, last)
+    for r in q.yield_per(chunk_rows):
+        yield TimelineRecord(r.participant_id, r.timestamp, r.task_name, r.trial_index, r.event, r.extra)
+
+
+def _stress_records(db, participant_id, first, last, chunk_rows):
+    q = db.query(StressLog.participant_id, StressLog.timestamp, StressLog.features)
+    q = _ordered(db, q, StressLog, participant_id, first, last)
+    for r in q.yield_per(chunk_rows):
+        yield TimelineRecord(r.participant_id, r.timestamp, "stress", None, "stress", r.features)
+
+
+def iter_timeline(db, participant_id=None, first=None, last=None, chunk_rows=CHUNK_ROWS):
+    """Yield TimelineRecords ordered by (participant_id, timestamp).
+
+    Restrict to one participant with `participant_id`, or to the inclusive
+    id range [first, last]. Task rows come before stress rows with the same
+    timestamp.
+    """
+    return heapq.merge(
+        _task_records(db, participant_id, first, last, chunk_rows),
+        _stress_records(db, participant_id, first, last, chunk_rows),
+        key=lambda r: (r.participant_id, r.timestamp),
+    )
+
+
+def iter_participant_timelines(db, participant_ids, first=None, last=None, chunk_rows=CHUNK_ROWS):
+    """Yield (participant_id, records) for each id in `participant_ids`.
+
+    `participant_ids` must be sorted (see pid_order); ids without any logs
+    get an empty iterator. Each `records` iterator must be consumed before
+    advancing. `first`/`last` narrow the underlying scan to an id range.
+    """
+    timeline = iter_timeline(db, first=first, last=last, chunk_rows=chunk_rows)
+    groups = groupby(timeline, key=lambda r: r.participant_id)
+    current = next(groups, None)
+    for pid in participant_ids:
+        # skip log rows that belong to no listed participant
+        while current is not None and current[0] < pid:
+            current = next(groups, None)
+        if current is not None and current[0] == pid:
+            yield pid, current[1]
+            current = next(groups, None)
+        else:
+            yield pid, iter(())
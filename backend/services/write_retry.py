@@ -0,0 +1,110 @@
+# backend/services/write_retry.py
+#
+# Failure handling for the write-behind queues (stress_state.py,
+# difficulty_controller.py).
+#
+# Those queues write their rows in one batch. If a batch fails they used to
+# put every row back, so a single row the database will never accept made
+# each later flush fail too, and the queue grew without bound. RetryLedger
+# decides what goes back after a failed batch:
+#
+#   - the rows are retried one per transaction, so good rows are written and
+#     only the bad ones remain;
+#   - a row that has failed `max_attempts` flushes is dropped and logged;
+#   - when the first single-row writes all fail, `probe` (ping(): SELECT 1)
+#     tells a database outage from bad rows at the head of the queue. In an
+#     outage nothing is counted against the rows, but the queue is capped at
+#     `max_backlog` rows, oldest dropped first; otherwise every row tried
+#     counts an attempt, so bad rows cannot hold the queue up forever.
+
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger("backend")
+
+MAX_ATTEMPTS = 5
+MAX_BACKLOG = 100_000
+# this many single-row failures before any success: probe the database
+OUTAGE_AFTER = 3
+
+
+def ping(session_factory):
+    """Run SELECT 1 on a fresh session; raises when the database is unreachable."""
+    dbs = session_factory()
+    try:
+        dbs.execute(text("SELECT 1"))
+    finally:
+        dbs.close()
+
+
+class RetryLedger:
+    def __init__(self, name, probe=None, max_attempts=MAX_ATTEMPTS, max_backlog=MAX_BACKLOG):
+        # without a probe every failed row counts an attempt, outage or not
+        self.name = name
+        self.probe = probe
+        self.max_attempts = int(max_attempts)
+        self.max_backlog = int(max_backlog)
+        self._attempts = {}     # id(row) -> failed flushes (rows stay referenced while queued)
+        self.dropped = 0
+
+    def after_failure(self, write, rows, queued=0):
+        """Call after write(rows) raised; returns the rows to put back in the queue.
+
+        `queued` is the number of rows queued since the batch was taken, so
+        the backlog cap covers the whole queue.
+        """
+        ok, failed = 0, []
+        probed = self.probe is None
+        for i, row in enumerate(rows):
+            if not ok and not probed and len(failed) >= OUTAGE_AFTER:
+                # nothing goes through: either the database is down or the
+                # queue starts with bad rows; only the first is an outage
+                probed = True
+                if not self._reachable():
+                    return self._cap(failed + rows[i:], queued)
+            try:
+                write([row])
+                self._attempts.pop(id(row), None)
+                ok += 1
+            except Exception:
+                failed.append(row)
+
+        keep = []
+        for row in failed:
+            n = self._attempts.pop(id(row), 0) + 1
+            if n >= self.max_attempts:
+                self.dropped += 1
+                logger.error("%s: dropping a row after %d failed writes: %r", self.name, n, row)
+            else:
+                self._attempts[id(row)] = n
+                keep.append(row)
+        if ok or failed:
+            logger.warning("%s: %d of %d rows written one by one after a failed batch",
+                           self.name, ok, len(rows))
+        return self._cap(keep, queued)
+
+    def _reachable(self):
+        try:
+            self.probe()
+        except Exception:
+            logger.warning("%s: database unreachable; rows requeued without counting an attempt", self.name)
+            return False
+        return True
+
+    def written(self, rows):
+        # forget attempt counts of rows that made it
+        if self._attempts:
+            for row in rows:
+                self._attempts.pop(id(row), None)
+
+    def _cap(self, rows, queued):
+        over = len(rows) + queued - self.max_backlog
+        if over > 0:
+            drop, rows = rows[:over], rows[over:]
+            for row in drop:
+                self._attempts.pop(id(row), None)
+            self.dropped += len(drop)
+            logger.error("%s: backlog over %d rows; dropped the %d oldest",
+                         self.name, self.max_backlog, len(drop))
+        return rows
@@ -1,6 +1,9 @@
 from backend.database.base import SessionLocal
 from backend.database.models import AdminUser
 from werkzeug.security import generate_password_hash
+from backend.app import init_db
+
+init_db()
 db = SessionLocal()
 if not db.query(AdminUser).filter_by(username="admin").first():
     db.add(AdminUser(username="admin", password_hash=generate_password_hash("admin123")))
@@ -160,7 +160,7 @@ EOF
 
 
 # Modify app.py to mount Swagger UI IF NOT ALREADY MOUNTED
-if ! grep -q "from flasgger import Swagger" backend/app.py; then
+if ! grep -q "from flasgger import Swagger\|LazyDocs" backend/app.py; then
 cat >> backend/app.py << 'EOF'
 
 ###############################################
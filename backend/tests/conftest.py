@@ -0,0 +1,61 @@
+# backend/tests/conftest.py
+#
+# Shared fixtures. The tests run against a throwaway SQLite file: DATABASE_URL
+# is read when backend.database.base is first imported, so it is set here,
+# before any test module imports the app.
+
+import os
+import tempfile
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+_TMP = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ.setdefault("JWT_SECRET", "test-secret-" + "x" * 32)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from backend.app import create_app
+
+    os.makedirs(f"{_TMP}/models", exist_ok=True)
+    app = create_app({
+        "INIT_DB": True,
+        "TESTING": True,
+        "LOG_FILE": None,
+        "SWAGGER": False,
+        "STATIC_FOLDER": f"{_TMP}/static",
+        "MODELS_DIR": f"{_TMP}/models",      # no model: scores come back as [1, 0, 0]
+        "DIFFICULTY_TICK_SECONDS": 0,        # tick by hand
+        "MONITOR_TICK_HZ": 0,                # flush monitor frames by hand
+        "SOCKETIO_ASYNC_MODE": "threading",
+    })
+    yield app
+    app.extensions["stress"].close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def session_token(client):
+    pid = f"P_{uuid.uuid4().hex[:8]}"
+    client.post("/api/register", json={"participant_id": pid})
+    return client.post("/api/session", json={"participant_id": pid}).get_json()["data"]["token"]
+
+
+@pytest.fixture
+def memory_db():
+    """sessionmaker over a fresh in-memory SQLite schema (one shared connection)."""
+    from backend.database import models as db
+
+    eng = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    db.Base.metadata.create_all(eng)
+    yield sessionmaker(bind=eng)
+    eng.dispose()
@@ -0,0 +1,68 @@
+# backend/tests/test_app_factory.py
+#
+# Importing backend.app must stay cheap -- no schema, no log files, none of
+# the heavy subsystems -- and create_app() builds independent apps that load
+# the model and the Swagger UI only when first used. Import checks run in a
+# fresh interpreter, since this test session has already imported the app.
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY = ("flasgger", "joblib", "sklearn", "matplotlib", "flask_socketio", "backend.routes.task")
+
+
+def run_fresh(tmp_path, code):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path}/fresh.db", PYTHONPATH=ROOT)
+    prelude = "import json, os, sys\n"
+    out = subprocess.run([sys.executable, "-c", prelude + code], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_is_cheap(tmp_path):
+    got = run_fresh(tmp_path, f"""
+import backend.app
+from backend.services.log_pipeline import pipelines
+print(json.dumps({{
+    "heavy": [m for m in {HEAVY!r} if m in sys.modules],
+    "db": os.path.exists("fresh.db"),
+    "pipelines": len(pipelines()),
+}}))
+""")
+    assert got == {"heavy": [], "db": False, "pipelines": 0}
+
+
+def test_create_app_defers_model_and_docs(tmp_path):
+    got = run_fresh(tmp_path, f"""
+from backend.app import create_app
+app = create_app({{"INIT_DB": True, "LOG_FILE": None, "SOCKETIO": False,
+                  "MODELS_DIR": os.getcwd(), "STATIC_FOLDER": os.path.join(os.getcwd(), "static")}})
+c = app.test_client()
+health = c.get("/healthz").status_code
+before = [m for m in ("flasgger", "joblib") if m in sys.modules]
+docs = c.get("/apispec_1.json").status_code
+print(json.dumps({{"health": health, "before": before, "docs": docs,
+                  "flasgger": "flasgger" in sys.modules, "db": os.path.exists("fresh.db")}}))
+""")
+    assert got == {"health": 200, "before": [], "docs": 200, "flasgger": True, "db": True}
+
+
+def test_apps_do_not_share_services(tmp_path):
+    from backend.app import create_app
+
+    cfg = {"LOG_FILE": None, "SWAGGER": False, "SOCKETIO": False, "DIFFICULTY_TICK_SECONDS": 0,
+           "MODELS_DIR": str(tmp_path), "STATIC_FOLDER": str(tmp_path / "static"), "EMA_ALPHA": 0.9}
+    a = create_app(cfg)
+    b = create_app({**cfg, "EMA_ALPHA": 0.1})
+    try:
+        sa, sb = a.extensions["stress"], b.extensions["stress"]
+        assert sa is not sb
+        assert (sa.state.alpha, sb.state.alpha) == (0.9, 0.1)
+        assert sa.models is not sb.models
+    finally:
+        a.extensions["stress"].close()
+        b.extensions["stress"].close()
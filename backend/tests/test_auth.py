@@ -0,0 +1,120 @@
+# backend/tests/test_auth.py
+#
+# Verified-token cache (core/auth.py): entries expire at their own deadline,
+# session entries are re-checked after SESSION_CACHE_TTL, and revocation
+# takes effect immediately for both admin JWTs and session tokens.
+
+import time
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from backend.core import auth
+from backend.core.auth import AuthError, TokenCache
+from backend.database import models as db
+from backend.database.base import SessionLocal
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = time.time()
+        monkeypatch.setattr(auth.time, "time", lambda: self.now)
+
+
+def test_cache_entries_expire_and_evict():
+    cache = TokenCache(maxsize=2)
+    cache.put("a", 1, expires_at=100)
+    assert cache.get("a", now=99) == 1
+    assert cache.get("a", now=100) is None
+    assert len(cache) == 0
+
+    cache.put("a", 1, 1e18)
+    cache.put("b", 2, 1e18)
+    cache.get("a")                 # b is now least recently used
+    cache.put("c", 3, 1e18)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    cache.discard("a")
+    assert cache.get("a") is None
+
+
+def test_admin_token_is_verified_once(monkeypatch):
+    token = auth.create_admin_jwt("alice")
+    calls = []
+    decode = auth.decode_jwt
+    monkeypatch.setattr(auth, "decode_jwt", lambda t: calls.append(t) or decode(t))
+
+    for _ in range(5):
+        assert auth.verify_admin_token(token)["sub"] == "alice"
+    assert calls == [token]
+
+
+def test_admin_revoke_beats_the_cache():
+    token = auth.create_admin_jwt("bob")
+    auth.verify_admin_token(token)
+    auth.revoke_admin_token(token)
+    with pytest.raises(AuthError) as e:
+        auth.verify_admin_token(token)
+    assert e.value.status == 401
+
+
+def test_admin_token_checks():
+    expired = jwt.encode({"sub": "x", "role": "admin", "exp": datetime.utcnow() - timedelta(seconds=1)},
+                         auth.JWT_SECRET, algorithm=auth.JWT_ALGO)
+    with pytest.raises(AuthError):
+        auth.verify_admin_token(expired)
+    user = jwt.encode({"sub": "x", "role": "participant", "exp": datetime.utcnow() + timedelta(hours=1)},
+                      auth.JWT_SECRET, algorithm=auth.JWT_ALGO)
+    with pytest.raises(AuthError) as e:
+        auth.verify_admin_token(user)
+    assert e.value.status == 403
+
+
+def test_logout_endpoint_revokes(client):
+    headers = {"Authorization": f"Bearer {auth.create_admin_jwt('carol')}"}
+    assert client.get("/api/admin/participants/count", headers=headers).status_code == 200
+    assert client.post("/api/admin/logout", headers=headers).status_code == 200
+    assert client.get("/api/admin/participants/count", headers=headers).status_code == 401
+
+
+def delete_session_row(token):
+    dbs = SessionLocal()
+    dbs.query(db.Session).filter_by(token=token).delete()
+    dbs.commit()
+    dbs.close()
+
+
+def test_session_cache_ttl(monkeypatch, session_token):
+    clock = Clock(monkeypatch)
+    info = auth.resolve_session(session_token)
+    assert info is not None and info.token == session_token
+
+    # served from the cache: the row is not read again within the TTL
+    delete_session_row(session_token)
+    clock.now += auth.SESSION_CACHE_TTL - 1
+    assert auth.resolve_session(session_token) == info
+    clock.now += 2
+    assert auth.resolve_session(session_token) is None
+
+
+def test_session_entry_never_outlives_expires_at(monkeypatch, session_token):
+    clock = Clock(monkeypatch)
+    dbs = SessionLocal()
+    sess = dbs.query(db.Session).filter_by(token=session_token).one()
+    sess.expires_at = datetime(1970, 1, 1) + timedelta(seconds=clock.now + 5)   # naive UTC
+    dbs.commit()
+    dbs.close()
+    auth.session_tokens.discard(session_token)
+
+    assert auth.resolve_session(session_token) is not None
+    clock.now += 6
+    assert auth.resolve_session(session_token) is None
+
+
+def test_session_revoke_is_immediate(client, session_token):
+    headers = {"Authorization": f"Bearer {session_token}"}
+    assert client.post("/api/task/start", json={"task": "t"}, headers=headers).status_code == 200
+    assert client.post("/api/session/revoke", headers=headers).status_code == 200
+    assert auth.resolve_session(session_token) is None
+    assert client.post("/api/task/start", json={"task": "t"}, headers=headers).status_code == 401
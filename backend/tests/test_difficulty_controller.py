@@ -0,0 +1,153 @@
+# backend/tests/test_difficulty_controller.py
+#
+# DifficultyController: the PID step moves each session's level the right
+# way, bound sessions get their decisions in TaskSessionHistory, and a
+# failed history flush behaves like the other write-behind queues -- bad rows
+# are dropped after MAX_ATTEMPTS, an outage costs no attempts.
+
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.database import models as db
+from backend.services.difficulty_controller import DifficultyController
+from backend.services.write_retry import MAX_ATTEMPTS
+
+
+class Switch:
+    """Session factory that can be turned off to simulate an outage."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.down = False
+
+    def __call__(self):
+        if self.down:
+            raise RuntimeError("database unreachable")
+        return self.factory()
+
+
+@pytest.fixture
+def factory(memory_db):
+    dbs = memory_db()
+    dbs.add(db.TaskSession(participant_id="P1", task_name="nback"))
+    dbs.commit()
+    dbs.close()
+    return Switch(memory_db)
+
+
+def history(factory, kind=None):
+    dbs = factory()
+    try:
+        q = select(func.count()).select_from(db.TaskSessionHistory)
+        if kind is not None:
+            q = q.where(db.TaskSessionHistory.kind == kind)
+        return dbs.scalar(q)
+    finally:
+        dbs.close()
+
+
+def controller(factory=None, **kwargs):
+    return DifficultyController(factory, tick_seconds=0, **kwargs)
+
+
+def test_stress_above_setpoint_lowers_the_level():
+    c = controller()
+    c.observe("hi", 0.9)
+    c.observe("lo", 0.1)
+    c.observe("even", 0.5)
+    decisions = dict(c.tick(now=c.last_tick.max() + 1))
+    assert decisions["hi"] < 5 < decisions["lo"]
+    assert decisions["even"] == 5
+    assert c.level_of("hi") == decisions["hi"]
+
+
+def test_levels_stay_in_range_and_only_fresh_sessions_tick():
+    c = controller(levels=(1, 10))
+    now = time.monotonic()
+    for step in range(1, 30):
+        c.observe("a", 1.0)
+        c.tick(now=now + step)
+    assert c.level_of("a") == 1
+
+    # no new sample since the last tick: nothing to decide
+    assert c.tick(now=now + 31) == []
+    assert c.ticks == 30
+
+
+def test_tick_reports_decisions():
+    seen = []
+    c = controller(on_decisions=seen.extend)
+    c.observe("a", 0.9)
+    c.tick()
+    assert seen == [("a", c.level_of("a"))]
+
+
+def test_bound_sessions_write_history(factory):
+    c = controller(factory)
+    c.observe("a", 0.8)
+    c.observe("b", 0.2)
+    c.bind("a", 1)
+    c.tick()
+    assert c.pending_count == 2
+    assert c.flush() == 2
+    assert history(factory, db.HISTORY_DIFFICULTY) == 1
+    assert history(factory, db.HISTORY_STRESS) == 1
+
+    c.unbind(1)
+    c.observe("a", 0.8)
+    c.tick()
+    assert c.flush() == 0
+
+
+def test_bind_config_overrides_gains_and_ignores_bad_values():
+    c = controller()
+    c.bind("a", 1, {"setpoint": 0.9, "kp": "fast", "ki": True, "kd": float("nan")})
+    slot = c._slots["a"]
+    assert c.setpoint[slot] == 0.9
+    assert (c.kp[slot], c.ki[slot], c.kd[slot]) == (4.0, 0.5, 1.0)
+
+    c.bind("b", 2, ["not", "a", "dict"])
+    assert c.setpoint[c._slots["b"]] == 0.5
+    assert c.task_session[c._slots["b"]] == 2
+
+
+def test_bad_history_rows_at_the_head_are_dropped(factory):
+    c = controller(factory)
+    c.observe("a", 0.7)
+    c.bind("a", 1)
+    c.tick()
+    # value is NOT NULL: these rows can never be written
+    c._pending[:0] = [{"session_id": 1, "kind": db.HISTORY_STRESS, "value": None} for _ in range(4)]
+
+    failures = 0
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            c.flush()
+        except Exception:
+            failures += 1
+        assert history(factory) == 2
+    assert failures == MAX_ATTEMPTS - 1
+    assert c.pending_count == 0
+    assert c._retry.dropped == 4
+
+
+def test_outage_keeps_history_rows(factory):
+    c = controller(factory)
+    c.observe("a", 0.7)
+    c.bind("a", 1)
+    c.tick()
+
+    factory.down = True
+    for _ in range(2 * MAX_ATTEMPTS):
+        c.observe("a", 0.7)
+        c.tick()
+        with pytest.raises(RuntimeError):
+            c.flush()
+    assert c._retry.dropped == 0
+    assert c.pending_count == 2 * (2 * MAX_ATTEMPTS + 1)
+
+    factory.down = False
+    assert c.flush() == 2 * (2 * MAX_ATTEMPTS + 1)
+    assert history(factory) == 2 * (2 * MAX_ATTEMPTS + 1)
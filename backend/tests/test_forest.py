@@ -0,0 +1,65 @@
+# backend/tests/test_forest.py
+#
+# CompiledForest must reproduce sklearn's predict_proba: random forests of
+# different shapes, each scored on random rows (including rows sitting
+# exactly on split thresholds).
+#
+#   python -m pytest backend/tests
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.services.forest import check_parity, compile_forest, random_rows
+
+
+def fit_random_forest(seed):
+    rng = np.random.default_rng(seed)
+    n_features = int(rng.integers(2, 8))
+    n_classes = int(rng.integers(2, 5))
+    X = rng.normal(size=(400, n_features)) * rng.uniform(1, 500, n_features)
+    y = rng.integers(0, n_classes, 400)
+    model = RandomForestClassifier(
+        n_estimators=int(rng.integers(1, 40)),
+        max_depth=[None, 3, 8][seed % 3],
+        min_samples_leaf=int(rng.integers(1, 5)),
+        random_state=seed,
+    )
+    return model.fit(X, y)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_forest_matches_sklearn(seed):
+    model = fit_random_forest(seed)
+    compiled = compile_forest(model)
+    X = random_rows(compiled, 5000, seed=seed)
+
+    expected = model.predict_proba(X)
+    got = compiled.predict_proba(X)
+    assert got.shape == expected.shape
+    assert np.allclose(got, expected, rtol=0, atol=1e-12)
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_single_tree_matches_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, 4))
+    y = rng.integers(0, 3, 300)
+    model = DecisionTreeClassifier(random_state=seed).fit(X, y)
+    assert check_parity(model, compile_forest(model), n=5000, seed=seed) <= 1e-12
+
+
+def test_single_row_matches_sklearn():
+    # the stress route scores one row at a time
+    model = fit_random_forest(100)
+    compiled = compile_forest(model)
+    for row in random_rows(compiled, 200, seed=1):
+        assert np.allclose(compiled.predict_proba(row[None, :]), model.predict_proba(row[None, :]),
+                           rtol=0, atol=1e-12)
+
+
+def test_rejects_unfitted_model():
+    with pytest.raises(TypeError):
+        compile_forest(RandomForestClassifier())
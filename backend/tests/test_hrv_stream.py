@@ -0,0 +1,116 @@
+# backend/tests/test_hrv_stream.py
+#
+# The streamed window (HRVWindow / HRVStreamStore) must give the same
+# features as rr_features() on the same beats: one beat or a chunk at a
+# time, across evictions and running-sum resyncs, and after a gap drop().
+
+import numpy as np
+import pytest
+
+from backend.app import rr_features
+from backend.services import hrv_stream
+from backend.services.hrv_stream import HRVStreamStore, HRVWindow
+
+KEYS = ("rmssd", "sdnn", "mean_rr", "mean_hr")
+
+
+def random_rr(seed, n):
+    rng = np.random.default_rng(seed)
+    # mostly sinus rhythm with the odd ectopic beat, some sub-ms values
+    rr = rng.normal(rng.uniform(600, 1100), rng.uniform(5, 80), n)
+    rr[rng.random(n) < 0.02] *= rng.uniform(0.6, 1.5)
+    return np.clip(rr, 250, 2500)
+
+
+def assert_matches(got, rr):
+    want = rr_features(np.asarray(rr, dtype=float))
+    for k in KEYS:
+        if want[k] is None:
+            assert got[k] is None
+        else:
+            assert got[k] == pytest.approx(want[k], rel=1e-9, abs=1e-9), k
+
+
+@pytest.mark.parametrize("seed,capacity", [(0, 2), (1, 5), (2, 64), (3, 300)])
+def test_window_matches_rr_features(seed, capacity):
+    rr = random_rr(seed, 1000)
+    win = HRVWindow(capacity)
+    for i, v in enumerate(rr):
+        win.push(v)
+        assert_matches(win.features(), rr[max(0, i + 1 - capacity):i + 1])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_store_chunks_match_rr_features(seed):
+    rng = np.random.default_rng(100 + seed)
+    rr = random_rr(seed, 2000)
+    store = HRVStreamStore(capacity=int(rng.integers(2, 200)))
+    pos = 0
+    while pos < len(rr):
+        k = int(rng.integers(1, 50))
+        got = store.push("t", rr[pos:pos + k].tolist())
+        pos += k
+        assert_matches(got, rr[max(0, min(pos, len(rr)) - store.capacity):pos])
+
+
+def test_resync_after_many_evictions(monkeypatch):
+    monkeypatch.setattr(hrv_stream, "RESYNC_EVERY", 50)
+    rr = random_rr(7, 5000)
+    win = HRVWindow(16)
+    resyncs = 0
+    for i, v in enumerate(rr):
+        before = win._evictions
+        win.push(v)
+        resyncs += win._evictions < before
+        assert win._evictions < 50
+        assert_matches(win.features(), rr[max(0, i - 15):i + 1])
+    assert resyncs >= 90
+
+
+def test_default_resync_bounds_drift():
+    # large, then tiny values: without the periodic resync the running sums
+    # would keep the cancellation error from the large ones
+    rr = np.concatenate([random_rr(8, 3000) * 1000, random_rr(9, 3 * hrv_stream.RESYNC_EVERY)])
+    win = HRVWindow(8)
+    win.extend(rr)
+    assert_matches(win.features(), rr[-8:])
+
+
+def test_drop_after_gap_starts_a_new_window():
+    rr = random_rr(10, 40)
+    store = HRVStreamStore(capacity=64)
+    store.push("t", rr[:20].tolist())
+    store.drop("t")
+    assert store.features("t") is None
+    assert_matches(store.push("t", rr[20:].tolist()), rr[20:])
+    assert_matches(store.push("other", rr[:3].tolist()), rr[:3])
+
+
+def test_binary_views_are_read_in_place():
+    rr = np.rint(random_rr(11, 30)).astype("<u2")
+    view = np.frombuffer(rr.tobytes(), dtype="<u2")
+    assert not view.flags.writeable
+    store = HRVStreamStore(capacity=64)
+    assert_matches(store.push("u16", view), rr)
+    f32 = np.frombuffer(random_rr(12, 30).astype("<f4").tobytes(), dtype="<f4")
+    assert_matches(store.push("f32", f32), f32)
+
+
+@pytest.mark.parametrize("bad", [[800, float("nan")], [800, 0], [800, -1], [float("inf")]])
+def test_invalid_beats_leave_the_window_alone(bad):
+    store = HRVStreamStore(capacity=8)
+    before = store.push("t", [800, 820, 790])
+    with pytest.raises(ValueError):
+        store.push("t", bad)
+    assert store.features("t") == before
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hrv_stream.time, "monotonic", lambda: now[0])
+    store = HRVStreamStore(capacity=8, idle_seconds=60)
+    store.push("old", [800, 810])
+    now[0] += 61
+    store.push("new", [800, 810])
+    assert store.features("old") is None
+    assert len(store) == 1
@@ -0,0 +1,120 @@
+# backend/tests/test_monitor.py
+#
+# Monitor broadcasts (services/realtime_events.py): updates published within
+# one tick are coalesced into a single frame per room carrying each
+# participant's latest state, and POST /api/stress feeds the broadcaster of
+# the app's Socket.IO server.
+
+import math
+
+import pytest
+
+from backend.core.auth import create_admin_jwt
+from backend.services.realtime_events import (
+    FRAME_EVENT, MONITOR_ROOM, MonitorBroadcaster, broadcaster_for, decode_binary_frame,
+)
+
+
+class FakeSocketIO:
+    def __init__(self, fail=False):
+        self.emits = []
+        self.fail = fail
+
+    def emit(self, event, data, room=None):
+        if self.fail:
+            raise RuntimeError("emit failed")
+        self.emits.append((event, data, room))
+
+
+def test_one_frame_per_room_per_tick():
+    sio = FakeSocketIO()
+    b = MonitorBroadcaster(sio, tick_hz=0)
+    for i in range(10):
+        b.publish("P1", {"ema_high": i / 10})
+        b.publish("P2", {"ema_high": 1 - i / 10})
+    b.publish("P3", {"ema_high": 0.5}, room="other")
+
+    assert b.flush(now=math.inf) == 2
+    rooms = sorted(room for _, _, room in sio.emits)
+    assert rooms == [MONITOR_ROOM, "other"]
+    frame = next(data for _, data, room in sio.emits if room == MONITOR_ROOM)
+    latest = {u["participant_id"]: u["ema_high"] for u in frame["updates"]}
+    assert latest == {"P1": 0.9, "P2": pytest.approx(0.1)}
+    assert b.merged == 18 and b.frames == 2 and b.sent == 3
+
+
+def test_unchanged_states_are_not_resent():
+    sio = FakeSocketIO()
+    b = MonitorBroadcaster(sio, tick_hz=0)
+    b.publish("P1", {"ema_high": 0.4})
+    b.flush(now=math.inf)
+    b.publish("P1", {"ema_high": 0.4})
+    assert b.flush(now=math.inf) == 0
+    assert len(sio.emits) == 1 and b.unchanged == 1
+
+
+def test_rate_limit_holds_updates_until_the_next_tick():
+    sio = FakeSocketIO()
+    b = MonitorBroadcaster(sio, tick_hz=0)
+    b.interval = 0.25
+    b.publish("P1", {"ema_high": 0.1})
+    b.flush(now=100.0)
+    b.publish("P1", {"ema_high": 0.2})
+    assert b.flush(now=100.1) == 0        # still inside the room's interval
+    assert b.flush(now=100.3) == 1
+    assert sio.emits[-1][1]["updates"][0]["ema_high"] == 0.2
+
+
+def test_failed_emit_keeps_the_states():
+    sio = FakeSocketIO(fail=True)
+    b = MonitorBroadcaster(sio, tick_hz=0)
+    b.publish("P1", {"ema_high": 0.3})
+    b.flush(now=0.0)
+    assert b.emit_errors == 1 and b.stats()["pending"] == 1
+    sio.fail = False
+    b.flush(now=math.inf)
+    assert sio.emits[0][1]["updates"][0]["ema_high"] == 0.3
+
+
+def test_pending_cap_drops_least_recent():
+    b = MonitorBroadcaster(FakeSocketIO(), tick_hz=0, max_pending=3)
+    for i in range(5):
+        b.publish(f"P{i}", {"ema_high": 0.1})
+    assert b.dropped == 2 and b.stats()["pending"] == 3
+
+
+def test_binary_frames_round_trip():
+    sio = FakeSocketIO()
+    b = MonitorBroadcaster(sio, tick_hz=0, encoding="binary")
+    b.publish("P1", {"ema_high": 0.5, "label": 2, "difficulty": None})
+    b.flush(now=math.inf)
+    frame = decode_binary_frame(sio.emits[0][1])
+    (u,) = frame["updates"]
+    assert u["participant_id"] == "P1" and u["ema_high"] == 0.5 and u["label"] == 2
+    assert "difficulty" not in u
+
+
+def test_stress_posts_reach_the_monitor_room(app, client, session_token):
+    socketio = app.extensions["socketio"]
+    monitor = broadcaster_for(socketio)
+    monitor.flush(now=math.inf)
+
+    admin = socketio.test_client(app, flask_test_client=client)
+    assert admin.emit("join_monitor", {"token": create_admin_jwt("root")}, callback=True) == {"ok": True}
+    outsider = socketio.test_client(app, flask_test_client=client)
+    assert outsider.emit("join_monitor", {"token": "nope"}, callback=True)["ok"] is False
+    admin.get_received()
+
+    headers = {"Authorization": f"Bearer {session_token}"}
+    for rr in ([800, 810], [700, 720], [900, 880, 870]):
+        assert client.post("/api/stress", json={"rr_intervals_ms": rr}, headers=headers).status_code == 200
+    ema = client.post("/api/stress", json={"rr_intervals_ms": [850, 860]}, headers=headers).get_json()["data"]["ema_high"]
+    monitor.flush(now=math.inf)
+
+    frames = [m for m in admin.get_received() if m["name"] == FRAME_EVENT]
+    assert len(frames) == 1
+    (update,) = frames[0]["args"][0]["updates"]
+    assert update["ema_high"] == pytest.approx(ema)
+    assert not [m for m in outsider.get_received() if m["name"] == FRAME_EVENT]
+    admin.disconnect()
+    outsider.disconnect()
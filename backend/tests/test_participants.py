@@ -0,0 +1,58 @@
+# backend/tests/test_participants.py
+#
+# Keyset-paginated participant listing and the cached count endpoint.
+
+import uuid
+
+import pytest
+
+from backend.core.auth import create_admin_jwt
+
+
+@pytest.fixture
+def admin(client):
+    return {"Authorization": f"Bearer {create_admin_jwt('tester')}"}
+
+
+def register(client, n):
+    tag = uuid.uuid4().hex[:6]
+    ids = [f"PG_{tag}_{i:03d}" for i in range(n)]
+    for pid in ids:
+        client.post("/api/register", json={"participant_id": pid})
+    return ids
+
+
+def test_pages_cover_every_participant_once(client, admin):
+    ids = set(register(client, 23))
+    total = client.get("/api/admin/participants/count", headers=admin).get_json()["total"]
+    assert total >= 23
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/admin/participants", query_string=params, headers=admin).get_json()
+        assert page["ok"] and len(page["data"]) <= 7
+        assert page["total"] == total
+        seen += [p["participant_id"] for p in page["data"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == total
+    assert ids <= set(seen)
+    assert pages == -(-total // 7)
+
+
+def test_count_follows_registrations(client, admin):
+    before = client.get("/api/admin/participants/count", headers=admin).get_json()["total"]
+    register(client, 2)
+    after = client.get("/api/admin/participants/count", headers=admin).get_json()["total"]
+    assert after == before + 2
+
+
+def test_bad_requests(client, admin):
+    assert client.get("/api/admin/participants/count").status_code == 401
+    r = client.get("/api/admin/participants", query_string={"cursor": "%%%"}, headers=admin)
+    assert r.status_code == 400
+    r = client.get("/api/admin/participants", query_string={"limit": "x"}, headers=admin)
+    assert r.status_code == 400
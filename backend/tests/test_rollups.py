@@ -0,0 +1,163 @@
+# backend/tests/test_rollups.py
+#
+# Dashboard rollups (services/rollups.py): incrementally maintained buckets
+# equal a rebuild from the raw logs, query_series() agrees with the raw rows
+# and never returns more than max_points points, even for ranges that don't
+# start on a bucket boundary.
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from backend.database import models as db
+from backend.services import rollups
+from backend.services.rollups import (
+    apply_rollups, bucket_count, bucket_start, query_series, rebuild_rollups,
+)
+
+T0 = datetime(2026, 3, 1, 9, 0, 0, 250000)
+
+
+def make_rows(seed, n=3000, span_s=4 * 3600):
+    rng = random.Random(seed)
+    stress, task = [], []
+    for _ in range(n):
+        ts = T0 + timedelta(seconds=rng.uniform(0, span_s))
+        stress.append({"participant_id": "P1", "session_token": "t", "ema_high": rng.random(), "timestamp": ts})
+        if rng.random() < 0.5:
+            task.append({"participant_id": "P1", "task_name": "nback", "correct": rng.random() < 0.7,
+                         "reaction_time_ms": rng.uniform(200, 900), "timestamp": ts})
+    stress.append({"participant_id": "P2", "session_token": "u", "ema_high": None, "timestamp": T0})
+    return stress, task
+
+
+def snapshot(factory):
+    dbs = factory()
+    try:
+        return {
+            (r.series, r.participant_id, r.resolution, r.bucket_start): (r.count, r.sum, r.min, r.max)
+            for r in dbs.query(db.MetricRollup)
+        }
+    finally:
+        dbs.close()
+
+
+def assert_same(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        assert a[k][0] == b[k][0]
+        assert a[k][1:] == pytest.approx(b[k][1:], rel=1e-9)
+
+
+def load(factory, stress, task):
+    # as the write-behind flushes do: insert a chunk and fold it in
+    dbs = factory()
+    for i in range(0, len(stress), 256):
+        chunk = stress[i:i + 256]
+        dbs.execute(insert(db.StressLog), chunk)
+        apply_rollups(dbs, stress_rows=chunk)
+        dbs.commit()
+    for i in range(0, len(task), 100):
+        chunk = task[i:i + 100]
+        dbs.execute(insert(db.TaskLog), chunk)
+        apply_rollups(dbs, task_rows=chunk)
+        dbs.commit()
+    dbs.close()
+
+
+@pytest.fixture
+def loaded(memory_db):
+    stress, task = make_rows(1)
+    load(memory_db, stress, task)
+    return memory_db, stress, task
+
+
+def test_incremental_equals_rebuild(loaded):
+    factory, _, _ = loaded
+    incremental = snapshot(factory)
+    dbs = factory()
+    rebuild_rollups(dbs, chunk_rows=333)
+    dbs.commit()
+    dbs.close()
+    assert_same(snapshot(factory), incremental)
+
+
+def test_read_modify_write_fallback(memory_db, monkeypatch):
+    # dialects without ON CONFLICT; one query per bucket, so a smaller data set
+    factory = memory_db
+    load(factory, *make_rows(2, n=300, span_s=1800))
+    upserted = snapshot(factory)
+    monkeypatch.setattr(rollups, "_upsert_stmt", lambda dialect: None)
+    dbs = factory()
+    rebuild_rollups(dbs, chunk_rows=500)
+    dbs.commit()
+    dbs.close()
+    assert_same(snapshot(factory), upserted)
+
+
+def test_series_matches_raw_rows(loaded):
+    factory, stress, _ = loaded
+    start, end = datetime(2026, 3, 1, 10), datetime(2026, 3, 1, 11)
+    dbs = factory()
+    out = query_series(dbs, "ema_high", "P1", start, end, max_points=60)
+    dbs.close()
+    assert out["resolution"] == 60
+
+    raw = {}
+    for r in stress:
+        if r["participant_id"] == "P1" and start <= r["timestamp"] < end:
+            raw.setdefault(bucket_start(r["timestamp"], 60), []).append(r["ema_high"])
+    assert len(out["points"]) == len(raw)
+    for p in out["points"]:
+        vals = raw[datetime.fromisoformat(p["t"])]
+        assert p["count"] == len(vals)
+        assert p["mean"] == pytest.approx(np.mean(vals))
+        assert (p["min"], p["max"]) == (pytest.approx(min(vals)), pytest.approx(max(vals)))
+
+
+def test_series_never_exceeds_the_budget(loaded):
+    factory, _, _ = loaded
+    rng = random.Random(5)
+    dbs = factory()
+    try:
+        for _ in range(300):
+            start = T0 + timedelta(seconds=rng.uniform(-600, 4 * 3600))
+            end = start + timedelta(seconds=rng.choice([rng.uniform(1, 120), rng.uniform(60, 6 * 3600)]))
+            max_points = rng.randint(1, 120)
+            series = rng.choice(list(rollups.SERIES))
+            out = query_series(dbs, series, "P1", start, end, max_points=max_points)
+            assert len(out["points"]) <= max_points
+            assert bucket_count(start, end, out["resolution"]) <= max_points
+    finally:
+        dbs.close()
+
+
+def test_extent_defaults_cover_all_rows(loaded):
+    factory, stress, task = loaded
+    dbs = factory()
+    out = query_series(dbs, "accuracy", "P1", max_points=rollups.MAX_POINTS)
+    dbs.close()
+    # 4 hours do not fit MAX_POINTS one-second buckets
+    assert out["resolution"] == 10
+    assert sum(p["count"] for p in out["points"]) == len(task)
+
+
+def test_bucket_count_matches_a_walk():
+    rng = random.Random(9)
+    for _ in range(2000):
+        start = T0 + timedelta(seconds=rng.uniform(0, 10_000))
+        end = start + timedelta(seconds=rng.uniform(0.001, 5000))
+        width = rng.choice([1, 10, 60, 600, 70, 1800])
+        b, n = bucket_start(start, width), 0
+        while b < end:
+            n += 1
+            b += timedelta(seconds=width)
+        assert bucket_count(start, end, width) == n
+
+
+def test_unknown_series():
+    with pytest.raises(ValueError):
+        query_series(None, "nope", "P1")
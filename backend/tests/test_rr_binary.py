@@ -0,0 +1,185 @@
+# backend/tests/test_rr_binary.py
+#
+# Binary RR packets (services/rr_binary.py): round trips, the beats stay a
+# view over the request bytes, malformed packets are rejected, and sequence
+# numbers are tracked per session -- a packet rejected after its seq was
+# recorded can be resent, a real duplicate gets 409. Covers both the HTTP
+# body and the Socket.IO "rr" event.
+
+import struct
+
+import numpy as np
+import pytest
+
+from backend.services.rr_binary import (
+    CONTENT_TYPE, MAX_BEATS, SEQ_DUPLICATE, SEQ_GAP, SEQ_OK, RRPacketError, SequenceTracker,
+    decode_rr_packet, encode_rr_packet,
+)
+
+
+@pytest.mark.parametrize("float32", [False, True])
+@pytest.mark.parametrize("stream", [False, True])
+def test_round_trip(float32, stream):
+    rr = [800, 812.5, 790, 1023.25] if float32 else [800, 812, 790, 1023]
+    data = encode_rr_packet("tok-1", 7, rr, float32=float32, stream=stream)
+    assert len(data) % 4 == 0
+    token, seq, beats, is_stream = decode_rr_packet(data)
+    assert (token, seq, is_stream) == ("tok-1", 7, stream)
+    assert beats.dtype == (np.float32 if float32 else np.uint16)
+    assert beats.tolist() == rr
+
+
+def test_beats_are_a_view_over_the_packet():
+    data = encode_rr_packet("tok", 1, [800, 810, 820])
+    _, _, beats, _ = decode_rr_packet(data)
+    assert beats.base is data
+    assert not beats.flags.writeable
+
+    buf = bytearray(data)
+    _, _, beats, _ = decode_rr_packet(buf)
+    assert np.shares_memory(beats, np.frombuffer(buf, dtype=np.uint8))
+
+
+def test_empty_token_and_seq_wrap():
+    token, seq, _, _ = decode_rr_packet(encode_rr_packet(None, 2**32 + 5, [800]))
+    assert token is None and seq == 5
+
+
+def corrupt(data, offset, fmt, value):
+    buf = bytearray(data)
+    struct.pack_into(fmt, buf, offset, value)
+    return bytes(buf)
+
+
+@pytest.mark.parametrize("make", [
+    lambda: b"RR\x01",                                                      # truncated header
+    lambda: b"XX" + encode_rr_packet("t", 1, [800, 810])[2:],               # bad magic
+    lambda: corrupt(encode_rr_packet("t", 1, [800, 810]), 2, "<B", 9),      # unknown version
+    lambda: encode_rr_packet("t", 1, [800, 810]) + b"\0\0",                 # length mismatch
+    lambda: encode_rr_packet("t", 1, [800, 810])[:-1],
+    lambda: corrupt(encode_rr_packet("t", 1, [800]), 8, "<H", 0),           # no beats
+    lambda: corrupt(encode_rr_packet("t", 1, [800]), 8, "<H", MAX_BEATS + 1),
+    lambda: encode_rr_packet("t", 1, [800, float("nan")], float32=True),    # not finite
+    lambda: corrupt(encode_rr_packet("t", 1, [800]), 12, "<B", 0xE9),       # non-ascii token
+])
+def test_malformed_packets_are_rejected(make):
+    with pytest.raises(RRPacketError):
+        decode_rr_packet(make())
+
+
+def test_encoder_limits():
+    with pytest.raises(RRPacketError):
+        encode_rr_packet("t" * 256, 1, [800])
+    with pytest.raises(RRPacketError):
+        encode_rr_packet("t", 1, [800] * (MAX_BEATS + 1))
+
+
+# ---------------------------------------------------------------
+# SequenceTracker
+# ---------------------------------------------------------------
+
+def test_sequence_ok_gap_and_duplicates():
+    t = SequenceTracker()
+    assert t.check("a", 10) == (SEQ_OK, 0)
+    assert t.check("a", 11) == (SEQ_OK, 0)
+    assert t.check("a", 15) == (SEQ_GAP, 3)
+    assert t.check("a", 15) == (SEQ_DUPLICATE, 0)
+    assert t.check("a", 12) == (SEQ_DUPLICATE, 0)   # stale retransmission
+    assert t.check("b", 12) == (SEQ_OK, 0)           # per token
+    assert (t.gaps, t.missing, t.duplicates) == (1, 3, 2)
+
+
+def test_sequence_wraps():
+    t = SequenceTracker()
+    t.check("a", 2**32 - 1)
+    assert t.check("a", 0) == (SEQ_OK, 0)
+    assert t.check("a", 2**32 - 1) == (SEQ_DUPLICATE, 0)
+
+
+def test_sequence_capacity_evicts_least_recent():
+    t = SequenceTracker(capacity=2)
+    t.check("a", 1)
+    t.check("b", 1)
+    t.check("a", 2)
+    t.check("c", 1)
+    # "b" was the least recently seen
+    assert len(t) == 2
+    assert t.check("a", 2) == (SEQ_DUPLICATE, 0)
+    assert t.check("b", 1) == (SEQ_OK, 0)    # forgotten, so accepted again
+
+
+def test_revert_restores_the_previous_seq():
+    t = SequenceTracker()
+    t.check("a", 1)
+    assert t.check("a", 5) == (SEQ_GAP, 3)
+    assert t.revert("a", 5)
+    assert (t.gaps, t.missing) == (0, 0)
+    assert t.check("a", 2) == (SEQ_OK, 0)
+
+    # a first packet reverted leaves the token unknown
+    assert t.check("b", 9) == (SEQ_OK, 0)
+    assert t.revert("b", 9) and len(t) == 1
+
+    # too late once a newer packet was accepted
+    t.check("a", 3)
+    assert not t.revert("a", 2)
+    assert t.check("a", 3) == (SEQ_DUPLICATE, 0)
+
+
+# ---------------------------------------------------------------
+# POST /api/stress and the Socket.IO "rr" event
+# ---------------------------------------------------------------
+
+def post(client, data, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return client.post("/api/stress", data=data, content_type=CONTENT_TYPE, headers=headers)
+
+
+def test_binary_post_is_scored(client, session_token):
+    r = post(client, encode_rr_packet(session_token, 1, [800, 810, 790, 805]))
+    assert r.status_code == 200
+    data = r.get_json()["data"]
+    assert (data["seq"], data["missed"]) == (1, 0)
+    assert data["features"]["mean_rr"] == pytest.approx(801.25)
+
+    # token from the Bearer header
+    r = post(client, encode_rr_packet(None, 3, [800, 810]), token=session_token)
+    assert r.status_code == 200 and r.get_json()["data"]["missed"] == 1
+
+
+def test_rejected_packet_can_be_resent(client, session_token):
+    assert post(client, encode_rr_packet(session_token, 1, [800, 810])).status_code == 200
+
+    # invalid beats and a too-short window are rejected without using up the seq
+    assert post(client, encode_rr_packet(session_token, 2, [800, 0])).status_code == 400
+    assert post(client, encode_rr_packet(session_token, 2, [800])).status_code == 400
+    r = post(client, encode_rr_packet(session_token, 2, [800, 820]))
+    assert r.status_code == 200 and r.get_json()["data"]["missed"] == 0
+
+    r = post(client, encode_rr_packet(session_token, 2, [800, 820]))
+    assert r.status_code == 409 and r.get_json()["seq"] == 2
+
+
+def test_malformed_binary_post(client, session_token):
+    r = post(client, b"RR\x01")
+    assert r.status_code == 400 and r.get_json()["error"] == "truncated header"
+    assert post(client, encode_rr_packet("no-such-session", 1, [800, 810])).status_code == 401
+
+
+def test_socket_rr_event(app, client, session_token):
+    sio = app.extensions["socketio"].test_client(app, flask_test_client=client)
+    try:
+        ack = sio.emit("rr", encode_rr_packet(session_token, 1, [800, 810, 820]), callback=True)
+        assert ack["ok"] is True and ack["data"]["seq"] == 1
+        assert ack["data"]["features"]["mean_rr"] == pytest.approx(810)
+
+        ack = sio.emit("rr", encode_rr_packet(session_token, 2, [800, 0]), callback=True)
+        assert ack["ok"] is False
+        assert sio.emit("rr", encode_rr_packet(session_token, 2, [800, 805]), callback=True)["ok"] is True
+        assert sio.emit("rr", encode_rr_packet(session_token, 2, [800, 805]), callback=True)["error"] == \
+            "duplicate sequence"
+
+        assert sio.emit("rr", b"junk", callback=True) == {"ok": False, "error": "truncated header"}
+        assert sio.emit("rr", {"not": "bytes"}, callback=True)["ok"] is False
+    finally:
+        sio.disconnect()
@@ -0,0 +1,54 @@
+# backend/tests/test_stress_api.py
+#
+# POST /api/stress input validation (JSON bodies).
+
+import pytest
+
+
+def post(client, token, body):
+    return client.post("/api/stress", json=body, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.mark.parametrize("rr", [
+    ["800", "900"],
+    [True, 900],
+    [[1, 2], [3, 4]],
+    [800, None],
+    [800, {"ms": 900}],
+    [800, -900],
+    [800, 0],
+    "800,900",
+    {"0": 800},
+])
+def test_rejects_malformed_rr(client, session_token, rr):
+    r = post(client, session_token, {"rr_intervals_ms": rr})
+    assert r.status_code == 400
+    assert r.get_json()["ok"] is False
+
+
+def test_single_beat_window_is_rejected(client, session_token):
+    r = post(client, session_token, {"rr_intervals_ms": [800]})
+    assert r.status_code == 400
+
+
+def test_valid_window_is_scored(client, session_token):
+    r = post(client, session_token, {"rr_intervals_ms": [800, 810, 790.5, 805]})
+    assert r.status_code == 200
+    feat = r.get_json()["data"]["features"]
+    assert feat["mean_rr"] == pytest.approx(801.375)
+    assert feat["rmssd"] is not None
+
+
+def test_stream_waits_for_two_beats(client, session_token):
+    r = post(client, session_token, {"rr_intervals_ms": [800], "stream": True})
+    assert r.status_code == 202
+    assert r.get_json()["data"]["scored"] is False
+
+    r = post(client, session_token, {"rr_intervals_ms": [820], "stream": True})
+    assert r.status_code == 200
+    assert r.get_json()["data"]["features"]["mean_rr"] == pytest.approx(810)
+
+
+def test_unknown_session(client):
+    r = post(client, "nope", {"rr_intervals_ms": [800, 900]})
+    assert r.status_code == 401
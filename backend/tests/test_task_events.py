@@ -0,0 +1,160 @@
+# backend/tests/test_task_events.py
+#
+# Task event ingestion: concurrent single events share one commit
+# (TaskEventWriter), a bad event only fails its own request, and the
+# /api/task routes validate every field before anything is queued.
+
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.database import models as db
+from backend.services.task_ingest import TaskEventWriter
+from backend.services.task_summary import new_summary
+
+
+@pytest.fixture
+def task_session(memory_db):
+    dbs = memory_db()
+    ts = db.TaskSession(participant_id="P1", task_name="nback")
+    dbs.add(ts)
+    dbs.flush()
+    dbs.add(new_summary(ts))
+    dbs.commit()
+    sid = ts.id
+    dbs.close()
+    return sid
+
+
+def rows(sid, i, **trial_extra):
+    now = datetime.utcnow()
+    trial = {"session_id": sid, "trial_index": i, "correct": i % 2 == 0,
+             "reaction_time_ms": 400 + i, "timestamp": now, **trial_extra}
+    log = {"participant_id": "P1", "task_name": "nback", "trial_index": i, "event": "trial",
+           "correct": i % 2 == 0, "reaction_time_ms": 400.0 + i, "extra": {}, "timestamp": now}
+    return trial, log
+
+
+def count(factory, model):
+    dbs = factory()
+    try:
+        return dbs.scalar(select(func.count()).select_from(model))
+    finally:
+        dbs.close()
+
+
+def submit_all(writer, items):
+    futures = [None] * len(items)
+    start = threading.Barrier(len(items))
+
+    def send(k):
+        start.wait()
+        futures[k] = writer.submit(*items[k])
+
+    threads = [threading.Thread(target=send, args=(k,)) for k in range(len(items))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return futures
+
+
+def test_concurrent_events_share_a_commit(memory_db, task_session):
+    writer = TaskEventWriter(memory_db, max_batch=500, max_wait_ms=200)
+    futures = submit_all(writer, [rows(task_session, i) for i in range(40)])
+    assert all(f.result(timeout=10) is True for f in futures)
+    writer.close()
+
+    assert writer.events == 40
+    assert writer.commits < 5
+    assert count(memory_db, db.TaskTrial) == 40
+    assert count(memory_db, db.TaskLog) == 40
+    dbs = memory_db()
+    summary = dbs.get(db.TaskSummary, task_session)
+    assert (summary.trials, summary.correct) == (40, 20)
+    dbs.close()
+
+
+def test_max_batch_splits_commits(memory_db, task_session):
+    writer = TaskEventWriter(memory_db, max_batch=8, max_wait_ms=200)
+    futures = submit_all(writer, [rows(task_session, i) for i in range(32)])
+    for f in futures:
+        f.result(timeout=10)
+    writer.close()
+    assert writer.commits >= 4
+    assert count(memory_db, db.TaskTrial) == 32
+
+
+def test_a_bad_event_only_fails_its_own_future(memory_db, task_session):
+    writer = TaskEventWriter(memory_db, max_batch=500, max_wait_ms=200)
+    items = [rows(task_session, i) for i in range(10)]
+    items[3] = rows(task_session, 3, trial_index=None)    # NOT NULL column
+    futures = submit_all(writer, items)
+    for k, f in enumerate(futures):
+        if k == 3:
+            with pytest.raises(Exception):
+                f.result(timeout=10)
+        else:
+            assert f.result(timeout=10) is True
+    writer.close()
+    assert count(memory_db, db.TaskTrial) == 9
+
+
+def test_submit_after_close_raises(memory_db):
+    writer = TaskEventWriter(memory_db)
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(None, None)
+
+
+# ---------------------------------------------------------------
+# /api/task routes
+# ---------------------------------------------------------------
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def started(client, session_token):
+    r = client.post("/api/task/start", json={"task": "nback"}, headers=auth(session_token))
+    assert r.status_code == 200
+    return session_token, r.get_json()["session_id"]
+
+
+@pytest.mark.parametrize("field,value", [
+    ("correct", "yes"),
+    ("reaction_time_ms", "fast"),
+    ("reaction_time_ms", True),
+    ("stress_level", [1]),
+    ("difficulty_level", 2.5),
+    ("response", {"key": "a"}),
+    ("event", "x" * 129),
+    ("trial_index", True),
+])
+def test_event_fields_are_type_checked(client, started, field, value):
+    token, sid = started
+    ev = {"session_id": sid, "trial_index": 0, field: value}
+    assert client.post("/api/task/event", json=ev, headers=auth(token)).status_code == 400
+    r = client.post("/api/task/events", json={"session_id": sid, "events": [{"trial_index": 1}, ev]},
+                    headers=auth(token))
+    assert r.status_code == 400
+
+
+def test_events_reach_the_summary(client, started):
+    token, sid = started
+    for i in range(3):
+        r = client.post("/api/task/event", json={"session_id": sid, "trial_index": i, "correct": True,
+                                                 "reaction_time_ms": 500}, headers=auth(token))
+        assert r.status_code == 200
+    r = client.post("/api/task/events", json={"session_id": sid, "events": [
+        {"trial_index": 3, "correct": False, "reaction_time_ms": 700},
+        {"trial_index": 4, "correct": True, "reaction_time_ms": 600.4},
+    ]}, headers=auth(token))
+    assert r.get_json() == {"ok": True, "count": 2}
+
+    s = client.get(f"/api/task/summary/{sid}", headers=auth(token)).get_json()["summary"]
+    assert (s["trials"], s["correct"], s["scored"]) == (5, 4, 5)
+    assert s["rt"]["max"] == 700
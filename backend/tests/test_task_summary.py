@@ -0,0 +1,190 @@
+# backend/tests/test_task_summary.py
+#
+# Incremental task summaries: the t-digest tracks numpy's quantiles, and
+# folding trials batch by batch (apply_trials) ends up where a rebuild from
+# the stored trials and a direct numpy computation do.
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.database import models as db
+from backend.services.task_summary import (
+    QUANTILES, TDigest, apply_trials, get_summary, new_summary, rebuild_summary, summary_dict
+)
+
+
+def make_trials(sid, n, seed=0):
+    rnd = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    trials = []
+    for i in range(n):
+        trials.append({
+            "session_id": sid,
+            "trial_index": i,
+            # some unscored trials and some without a reaction time
+            "correct": None if i % 7 == 0 else rnd.random() < 0.7,
+            "reaction_time_ms": None if i % 11 == 0 else int(rnd.lognormvariate(6, 0.4)),
+            "difficulty_level": None if i % 13 == 0 else rnd.randint(1, 4),
+            "timestamp": start + timedelta(seconds=i),
+        })
+    return trials
+
+
+@pytest.fixture
+def session_factory(memory_db):
+    dbs = memory_db()
+    ts = db.TaskSession(participant_id="P1", task_name="stroop")
+    dbs.add(ts)
+    dbs.flush()
+    dbs.add(new_summary(ts))
+    dbs.commit()
+    sid = ts.id
+    dbs.close()
+    return memory_db, sid
+
+
+def insert_and_fold(factory, trials):
+    dbs = factory()
+    try:
+        dbs.add_all(db.TaskTrial(**t) for t in trials)
+        dbs.flush()
+        apply_trials(dbs, trials)
+        dbs.commit()
+    finally:
+        dbs.close()
+
+
+def test_digest_is_exact_for_small_inputs():
+    values = [random.Random(1).uniform(100, 900) for _ in range(80)]
+    d = TDigest()
+    d.update(values)
+    assert len(d.centroids) == len(values)
+    assert d.count == len(values)
+    for q in (0.1, 0.5, 0.9):
+        assert d.quantile(q) == pytest.approx(np.quantile(values, q, method="hazen"))
+
+
+def test_digest_tracks_numpy_quantiles():
+    rnd = np.random.default_rng(7)
+    values = rnd.lognormal(6, 0.5, 20_000)
+    d = TDigest()
+    # fed in batches, as fold() does, and round-tripped through JSON
+    for chunk in np.array_split(values, 40):
+        d = TDigest(d.to_json())
+        d.update(chunk)
+
+    assert d.count == len(values)
+    assert len(d.centroids) < 200
+    for q in (0.01, 0.1, 0.5, 0.9, 0.95, 0.99):
+        # compared in rank: the estimate lands within half a percent of q
+        rank = np.mean(values <= d.quantile(q, values.min(), values.max()))
+        assert rank == pytest.approx(q, abs=0.005)
+
+
+def test_digest_empty_and_bounds():
+    assert TDigest().quantile(0.5) is None
+    d = TDigest()
+    d.update([5.0])
+    assert d.quantile(0.5) == 5.0
+    d.update(range(1000))
+    assert d.quantile(0.0, 0.0, 999.0) == 0.0
+    assert d.quantile(1.0, 0.0, 999.0) == 999.0
+
+
+def test_incremental_summary_matches_rebuild_and_numpy(session_factory):
+    factory, sid = session_factory
+    trials = make_trials(sid, 600)
+    for k in range(0, len(trials), 37):
+        insert_and_fold(factory, trials[k:k + 37])
+
+    dbs = factory()
+    incremental = summary_dict(dbs.get(db.TaskSummary, sid))
+    rebuilt = summary_dict(rebuild_summary(dbs, sid))
+    dbs.close()
+
+    assert incremental["trials"] == rebuilt["trials"] == len(trials)
+    assert incremental["scored"] == rebuilt["scored"]
+    assert incremental["correct"] == rebuilt["correct"]
+    assert incremental["by_difficulty"].keys() == rebuilt["by_difficulty"].keys()
+    for key in ("count", "mean", "variance", "min", "max"):
+        assert incremental["rt"][key] == pytest.approx(rebuilt["rt"][key])
+
+    scored = [t["correct"] for t in trials if t["correct"] is not None]
+    rts = np.array([t["reaction_time_ms"] for t in trials if t["reaction_time_ms"] is not None], float)
+    assert incremental["scored"] == len(scored)
+    assert incremental["accuracy"] == pytest.approx(sum(scored) / len(scored))
+    assert incremental["rt"]["count"] == len(rts)
+    assert incremental["rt"]["mean"] == pytest.approx(rts.mean())
+    assert incremental["rt"]["variance"] == pytest.approx(rts.var(ddof=1))
+    assert incremental["rt"]["min"] == rts.min()
+    assert incremental["rt"]["max"] == rts.max()
+    for q in QUANTILES:
+        est = incremental["rt"][f"p{round(q * 100)}"]
+        assert np.mean(rts <= est) == pytest.approx(q, abs=0.02)
+    assert incremental["last_trial_at"] == trials[-1]["timestamp"].isoformat()
+
+    for level, stats in incremental["by_difficulty"].items():
+        rows = [t for t in trials if str(t["difficulty_level"]) == level
+                or (level == "none" and t["difficulty_level"] is None)]
+        level_rts = np.array([t["reaction_time_ms"] for t in rows if t["reaction_time_ms"] is not None], float)
+        assert stats["trials"] == len(rows)
+        assert stats["rt_mean"] == pytest.approx(level_rts.mean())
+        assert stats["rt_std"] == pytest.approx(level_rts.std(ddof=1))
+        assert stats == pytest.approx(rebuilt["by_difficulty"][level])
+
+
+def test_apply_trials_rebuilds_missing_summary(memory_db):
+    dbs = memory_db()
+    ts = db.TaskSession(participant_id="P2", task_name="nback")
+    dbs.add(ts)
+    dbs.commit()
+    sid = ts.id
+    dbs.close()
+
+    # a session from before the summary table: the first fold rebuilds it
+    trials = make_trials(sid, 30, seed=3)
+    insert_and_fold(memory_db, trials[:20])
+    insert_and_fold(memory_db, trials[20:])
+
+    dbs = memory_db()
+    s = summary_dict(dbs.get(db.TaskSummary, sid))
+    dbs.close()
+    assert s["trials"] == 30
+    assert s["rt"]["count"] == sum(t["reaction_time_ms"] is not None for t in trials)
+
+
+def test_get_summary_builds_on_first_access_and_handles_unknown(memory_db):
+    dbs = memory_db()
+    ts = db.TaskSession(participant_id="P3", task_name="nback")
+    dbs.add(ts)
+    dbs.flush()
+    dbs.add_all(db.TaskTrial(**t) for t in make_trials(ts.id, 12, seed=5))
+    dbs.commit()
+    sid = ts.id
+    dbs.close()
+
+    dbs = memory_db()
+    try:
+        assert get_summary(dbs, sid + 100) is None
+        s = get_summary(dbs, sid)
+        assert s.trials == 12
+    finally:
+        dbs.close()
+    dbs = memory_db()
+    assert dbs.get(db.TaskSummary, sid) is not None
+    dbs.close()
+
+
+def test_empty_summary_dict(session_factory):
+    factory, sid = session_factory
+    dbs = factory()
+    s = summary_dict(dbs.get(db.TaskSummary, sid))
+    dbs.close()
+    assert s["trials"] == 0
+    assert s["accuracy"] is None
+    assert s["rt"]["mean"] is None and s["rt"]["variance"] is None
+    assert all(s["rt"][f"p{round(q * 100)}"] is None for q in QUANTILES)
+    assert s["by_difficulty"] == {} and s["last_trial_at"] is None
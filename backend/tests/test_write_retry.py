@@ -0,0 +1,148 @@
+# backend/tests/test_write_retry.py
+#
+# Failed write-behind batches (services/write_retry.py): good rows get
+# written, bad rows are dropped after MAX_ATTEMPTS flushes even when they sit
+# at the head of the queue, and an outage neither counts attempts nor lets
+# the queue grow without bound.
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.database import models as db
+from backend.services.stress_state import StressStateCache
+from backend.services.write_retry import MAX_ATTEMPTS, RetryLedger
+
+
+class FakeTable:
+    def __init__(self):
+        self.rows = []
+        self.down = False
+
+    def write(self, rows):
+        if self.down or any(r.get("bad") for r in rows):
+            raise RuntimeError("rejected")
+        self.rows.extend(rows)
+
+    def probe(self):
+        if self.down:
+            raise RuntimeError("down")
+
+
+def flush(ledger, table, queue):
+    try:
+        table.write(queue)
+    except RuntimeError:
+        return ledger.after_failure(table.write, queue)
+    ledger.written(queue)
+    return []
+
+
+def test_bad_rows_at_the_head_are_dropped():
+    table = FakeTable()
+    ledger = RetryLedger("t", probe=table.probe)
+    queue = [{"i": i, "bad": i < 4} for i in range(10)]
+
+    for n in range(1, MAX_ATTEMPTS):
+        queue = flush(ledger, table, queue)
+        assert [r["i"] for r in queue] == [0, 1, 2, 3]
+        assert [r["i"] for r in table.rows] == list(range(4, 10))
+    queue = flush(ledger, table, queue)
+    assert queue == []
+    assert ledger.dropped == 4
+
+
+def test_outage_does_not_count_attempts():
+    table = FakeTable()
+    table.down = True
+    ledger = RetryLedger("t", probe=table.probe)
+    queue = [{"i": i} for i in range(10)]
+    for _ in range(3 * MAX_ATTEMPTS):
+        queue = flush(ledger, table, queue)
+    assert len(queue) == 10 and ledger.dropped == 0
+
+    table.down = False
+    assert flush(ledger, table, queue) == []
+    assert len(table.rows) == 10
+
+
+def test_without_probe_every_failure_counts():
+    table = FakeTable()
+    table.down = True
+    ledger = RetryLedger("t")
+    queue = [{"i": i} for i in range(5)]
+    for _ in range(MAX_ATTEMPTS):
+        queue = flush(ledger, table, queue)
+    assert queue == [] and ledger.dropped == 5
+
+
+def test_outage_backlog_is_capped_oldest_first():
+    table = FakeTable()
+    table.down = True
+    ledger = RetryLedger("t", probe=table.probe, max_backlog=10)
+    queue = [{"i": i} for i in range(8)]
+    queue = ledger.after_failure(table.write, queue, queued=5)
+    assert [r["i"] for r in queue] == [3, 4, 5, 6, 7]
+    assert ledger.dropped == 3
+
+
+def test_attempts_reset_once_a_row_is_written():
+    table = FakeTable()
+    ledger = RetryLedger("t", probe=table.probe)
+    row = {"i": 0}
+    table.down = True
+    ledger.probe = None         # count this failure
+    assert flush(ledger, table, [row]) == [row]
+    table.down = False
+    assert flush(ledger, table, [row]) == []
+    assert ledger._attempts == {}
+
+
+# ---------------------------------------------------------------
+# StressStateCache
+# ---------------------------------------------------------------
+
+@pytest.fixture
+def session_factory(memory_db):
+    dbs = memory_db()
+    dbs.add(db.Session(participant_id="P1", token="tok", ema_high=0.0))
+    dbs.commit()
+    dbs.close()
+    return memory_db
+
+
+def count(factory, model):
+    dbs = factory()
+    try:
+        return dbs.scalar(select(func.count()).select_from(model))
+    finally:
+        dbs.close()
+
+
+def test_stress_cache_drops_a_poison_row(session_factory):
+    cache = StressStateCache(session_factory, 0.5, lambda e: int(e > 0.5), flush_interval=3600)
+    cache._ensure_worker = lambda: None    # flush by hand
+    for i in range(6):
+        cache.observe("tok", [0.2, 0.8], {"i": i})
+    for i in range(3):
+        cache._pending[i]["ema_high"] = "not a number"
+
+    failures = 0
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            cache.flush()
+        except Exception:
+            failures += 1
+        assert count(session_factory, db.StressLog) == 3
+    assert failures == MAX_ATTEMPTS - 1
+    assert cache.pending_count == 0
+    assert cache._retry.dropped == 3
+
+    dbs = session_factory()
+    ema = dbs.query(db.Session.ema_high).filter_by(token="tok").scalar()
+    dbs.close()
+    assert ema == pytest.approx(cache.get("tok").ema_high)
+
+    # the queue keeps working afterwards
+    cache.observe("tok", [0.5, 0.5], {})
+    assert cache.flush() == 1
+    assert count(session_factory, db.StressLog) == 4
@@ -36,8 +36,72 @@ export async function adminLogin(
 
 /* -------------------- PARTICIPANTS -------------------- */
 
-export async function getParticipants(): Promise<ApiResponse<Participant[]>> {
-  const res = await http.get("/api/admin/participants");
+export interface ParticipantPage extends ApiResponse<Participant[]> {
+  next_cursor: string | null;
+  total: number;
+}
+
+export interface ParticipantQuery {
+  limit?: number;
+  cursor?: string | null;
+  group?: string;
+}
+
+// Keyset-paginated: pass the previous page's next_cursor to continue.
+export async function getParticipants(query: ParticipantQuery = {}): Promise<ParticipantPage> {
+  const params: Record<string, string | number> = {};
+  if (query.limit) params.limit = query.limit;
+  if (query.cursor) params.cursor = query.cursor;
+  if (query.group) params.group = query.group;
+  const res = await http.get("/api/admin/participants", { params });
+  return res.data;
+}
+
+// Cached participant total (optionally per assignment group); no rows are read.
+export async function getParticipantCount(group?: string): Promise<{ ok: boolean; total: number; error?: string }> {
+  const res = await http.get("/api/admin/participants/count", { params: group ? { group } : {} });
+  return res.data;
+}
+
+/* -------------------- CHART SERIES -------------------- */
+
+export type SeriesName = "ema_high" | "accuracy" | "reaction_time_ms";
+
+export interface SeriesPoint {
+  t: string;
+  count: number;
+  mean: number;
+  min: number;
+  max: number;
+}
+
+export interface Series {
+  series: SeriesName;
+  participant_id: string;
+  resolution: number | null; // bucket width in seconds
+  start: string | null;
+  end: string | null;
+  points: SeriesPoint[];
+}
+
+export interface SeriesQuery {
+  series?: SeriesName[];
+  start?: string;
+  end?: string;
+  points?: number; // usually the chart width in pixels
+}
+
+// Time-bucketed series from the server-side rollups; at most `points` per series.
+export async function getSeries(
+  participant_id: string,
+  query: SeriesQuery = {}
+): Promise<ApiResponse<Record<SeriesName, Series>>> {
+  const params: Record<string, string | number> = { participant_id };
+  if (query.series?.length) params.series = query.series.join(",");
+  if (query.start) params.start = query.start;
+  if (query.end) params.end = query.end;
+  if (query.points) params.points = query.points;
+  const res = await http.get("/api/admin/series", { params });
   return res.data;
 }
 
@@ -13,9 +13,32 @@ export interface FinishTaskResponse {
   ok: boolean;
 }
 
+export interface TaskSummary {
+  session_id: number;
+  participant_id: string;
+  task_name: string;
+  trials: number;
+  scored: number;
+  correct: number;
+  accuracy: number | null;
+  rt: {
+    count: number;
+    mean: number | null;
+    variance: number | null;
+    std: number | null;
+    min: number | null;
+    max: number | null;
+    p50: number | null;
+    p90: number | null;
+    p95: number | null;
+  };
+  by_difficulty: Record<string, { trials: number; accuracy: number | null; rt_mean: number | null; rt_std: number | null }>;
+  last_trial_at: string | null;
+}
+
 export interface SummaryResponse {
   ok: boolean;
-  summary: any;
+  summary: TaskSummary;
 }
 
 export async function startTaskSession(token: string, task: string, config: any = {}): Promise<StartTaskResponse> {
@@ -38,6 +61,17 @@ export async function sendTaskEvent(token: string, payload: any): Promise<EventR
   return res.data as EventResponse;
 }
 
+// Sends several trial events for one task session in a single request.
+export async function sendTaskEvents(token: string, session_id: number, events: any[]): Promise<EventResponse> {
+  const res = await http.post(
+    "/api/task/events",
+    { session_id, events },
+    { headers: { Authorization: `Bearer ${token}` } }
+  );
+
+  return res.data as EventResponse;
+}
+
 export async function finishTaskSession(token: string, session_id: number): Promise<FinishTaskResponse> {
   const res = await http.post(
     "/api/task/finish",
@@ -48,7 +82,11 @@ export async function finishTaskSession(token: string, session_id: number): Prom
   return res.data as FinishTaskResponse;
 }
 
-export async function getTaskSummary(session_id: number): Promise<any> {
-  const res = await http.get(`/api/task/summary/${session_id}`);
+// Participant session token, or none to use the admin token from the interceptor.
+export async function getTaskSummary(session_id: number, token?: string): Promise<TaskSummary> {
+  const res = await http.get(
+    `/api/task/summary/${session_id}`,
+    token ? { headers: { Authorization: `Bearer ${token}` } } : {}
+  );
   return (res.data as SummaryResponse).summary;
 }
@@ -0,0 +1,55 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+import { getParticipants, Participant } from "@/api/admin";
+
+/**
+ * useParticipantPages hook
+ * - Loads the first page of participants on mount
+ * - loadMore() fetches the next page via next_cursor and appends it
+ * - total is the server's cached count, not the number loaded
+ */
+export default function useParticipantPages(pageSize = 100, group?: string) {
+  const [participants, setParticipants] = useState<Participant[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [hasMore, setHasMore] = useState(false);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+  const busy = useRef(false);
+
+  const load = useCallback(
+    async (from: string | null) => {
+      if (busy.current) return;
+      busy.current = true;
+      setLoading(true);
+      try {
+        const page = await getParticipants({ limit: pageSize, cursor: from, group });
+        if (!page.ok) {
+          setError(page.error || "failed to load participants");
+          return;
+        }
+        setParticipants((prev) => (from ? [...prev, ...page.data] : page.data));
+        setTotal(page.total);
+        setCursor(page.next_cursor);
+        setHasMore(page.next_cursor !== null);
+        setError(null);
+      } catch (err) {
+        console.error("Participant fetch error", err);
+        setError("failed to load participants");
+      } finally {
+        busy.current = false;
+        setLoading(false);
+      }
+    },
+    [pageSize, group]
+  );
+
+  useEffect(() => {
+    load(null);
+  }, [load]);
+
+  const loadMore = useCallback(() => {
+    if (cursor) load(cursor);
+  }, [cursor, load]);
+
+  return { participants, total, hasMore, loading, error, loadMore };
+}
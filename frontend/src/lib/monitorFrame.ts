@@ -0,0 +1,55 @@
+// Decoder for "monitor_frame" Socket.IO events
+// (see backend/services/realtime_events.py).
+//
+// Frames are JSON objects, or ArrayBuffers when the server runs with
+// MONITOR_ENCODING=binary.
+
+export const BINARY_FIELDS = ["proba_high", "ema_high", "label", "smoothed_label", "difficulty"] as const;
+
+export type MonitorUpdate = {
+  participant_id: string;
+  ts: number;
+  proba_high?: number;
+  ema_high?: number;
+  label?: number;
+  smoothed_label?: number;
+  difficulty?: number;
+  [key: string]: unknown;
+};
+
+export type MonitorFrame = {
+  t: number;
+  updates: MonitorUpdate[];
+};
+
+const utf8 = new TextDecoder();
+
+export function decodeMonitorFrame(data: MonitorFrame | ArrayBuffer | Uint8Array): MonitorFrame {
+  if (!(data instanceof ArrayBuffer) && !(data instanceof Uint8Array)) return data;
+
+  const bytes = data instanceof Uint8Array ? data : new Uint8Array(data);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  if (bytes[0] !== 0x4d || bytes[1] !== 0x46 || bytes[2] !== 1) {
+    throw new Error("not a monitor frame");
+  }
+  const nFields = bytes[3];
+  const t = view.getFloat64(4, true);
+  const n = view.getUint16(12, true);
+
+  let pos = 14;
+  const updates: MonitorUpdate[] = [];
+  for (let i = 0; i < n; i++) {
+    const len = bytes[pos];
+    const participant_id = utf8.decode(bytes.subarray(pos + 1, pos + 1 + len));
+    pos += 1 + len;
+    const update: MonitorUpdate = { participant_id, ts: view.getFloat64(pos, true) };
+    pos += 8;
+    for (let f = 0; f < nFields; f++) {
+      const v = view.getFloat32(pos, true);
+      pos += 4;
+      if (!Number.isNaN(v) && f < BINARY_FIELDS.length) update[BINARY_FIELDS[f]] = v;
+    }
+    updates.push(update);
+  }
+  return { t, updates };
+}
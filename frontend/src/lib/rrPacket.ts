@@ -0,0 +1,47 @@
+// Encoder for binary RR-interval packets
+// (see backend/services/rr_binary.py).
+//
+// POST the result to /api/stress with Content-Type application/x-rr-packet,
+// or emit it as the Socket.IO "rr" event. `seq` increases by one per packet
+// and session; the server reports gaps and rejects duplicates.
+
+export const RR_PACKET_TYPE = "application/x-rr-packet";
+
+const FLAG_FLOAT32 = 0x01;
+const FLAG_STREAM = 0x02;
+const HEADER_SIZE = 12;
+
+export type RRPacketOptions = {
+  float32?: boolean; // sub-millisecond beats; default whole-ms uint16
+  stream?: boolean; // push into the server's rolling window
+};
+
+export function encodeRRPacket(
+  token: string,
+  seq: number,
+  rr: ArrayLike<number>,
+  { float32 = false, stream = false }: RRPacketOptions = {}
+): ArrayBuffer {
+  const tok = new TextEncoder().encode(token);
+  if (tok.length > 255) throw new Error("token too long");
+  const offset = (HEADER_SIZE + tok.length + 3) & ~3;
+  const width = float32 ? 4 : 2;
+  const buf = new ArrayBuffer(offset + rr.length * width);
+  const view = new DataView(buf);
+  const bytes = new Uint8Array(buf);
+
+  bytes[0] = 0x52; // "R"
+  bytes[1] = 0x52; // "R"
+  bytes[2] = 1;
+  bytes[3] = (float32 ? FLAG_FLOAT32 : 0) | (stream ? FLAG_STREAM : 0);
+  view.setUint32(4, seq >>> 0, true);
+  view.setUint16(8, rr.length, true);
+  bytes[10] = tok.length;
+  bytes.set(tok, HEADER_SIZE);
+
+  for (let i = 0; i < rr.length; i++) {
+    if (float32) view.setFloat32(offset + 4 * i, rr[i], true);
+    else view.setUint16(offset + 2 * i, Math.round(rr[i]), true);
+  }
+  return buf;
+}
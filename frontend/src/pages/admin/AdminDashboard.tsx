@@ -7,9 +7,11 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@
 import { format } from "date-fns";
 import { LineChart, Line, XAxis, YAxis, Tooltip, CartesianGrid, ResponsiveContainer, BarChart, Bar } from "recharts";
 import io from "socket.io-client";
+import useParticipantPages from "@/hooks/useParticipantPages";
+import { decodeMonitorFrame, MonitorFrame } from "@/lib/monitorFrame";
 
 import {
-  getParticipants,
+  getParticipantCount,
   queryLogs,
   exportAllParticipantsZip,
   exportParticipantCSV,
@@ -17,12 +19,6 @@ import {
   exportExcel,
 } from "@/api/admin";
 
-interface ParticipantOpt {
-  participant_id: string;
-  assignment_group?: string;
-  created_at?: string;
-}
-
 interface LogRow {
   id: number;
   participant_id: string;
@@ -40,7 +36,9 @@ interface LogRow {
 const socket = io(); // uses same origin; if backend runs on other port, use URL
 
 export default function AdminDashboard() {
-  const [participants, setParticipants] = useState<ParticipantOpt[]>([]);
+  // the selector starts with one page; "Load more" fetches the next via next_cursor
+  const { participants, hasMore, loading: loadingParticipants, loadMore } = useParticipantPages();
+  const [participantTotal, setParticipantTotal] = useState<number | null>(null);
   const [selectedPid, setSelectedPid] = useState<string>("");
   const [taskFilter, setTaskFilter] = useState<string>("");
   const [fromDate, setFromDate] = useState<string>("");
@@ -56,34 +54,35 @@ export default function AdminDashboard() {
   }, [dark]);
 
   useEffect(() => {
-    async function load() {
-      try {
-        const res = await getParticipants();
-        if (res.ok) {
-          setParticipants(res.data);
-          if (res.data.length > 0 && !selectedPid) setSelectedPid(res.data[0].participant_id);
-        } else {
-          console.error("Failed load participants", res.error);
-        }
-      } catch (err) {
-        console.error("Participant fetch error", err);
-      }
-    }
-    load();
+    if (participants.length > 0 && !selectedPid) setSelectedPid(participants[0].participant_id);
+  }, [participants]);
+
+  // dashboard total from the cached count endpoint, not from loaded rows
+  useEffect(() => {
+    getParticipantCount()
+      .then((res) => {
+        if (res.ok) setParticipantTotal(res.total);
+        else console.error("Failed to load participant count", res.error);
+      })
+      .catch((err) => console.error("Participant count error", err));
   }, []);
 
-  // Real-time updates: when stress updates come from backend, refresh logs for selected pid
+  // Real-time updates: the server sends coalesced monitor frames (at most a
+  // few per second) to admins in the monitor room; refresh logs when the
+  // selected participant is in one
   useEffect(() => {
-    socket.on("connect", () => {});
-    socket.on("admin_update", (payload: any) => {
-      // simple heuristic: if payload includes participant_id equal selectedPid -> refresh
-      if (payload?.participant_id && payload.participant_id === selectedPid) {
+    const join = () => socket.emit("join_monitor", { token: localStorage.getItem("admin_token") });
+    socket.on("connect", join);
+    if (socket.connected) join();
+    socket.on("monitor_frame", (data: MonitorFrame | ArrayBuffer) => {
+      const frame = decodeMonitorFrame(data);
+      if (selectedPid && frame.updates.some((u) => u.participant_id === selectedPid)) {
         handleApplyFilter();
       }
     });
     return () => {
-    <button onClick={logout}>Logout</button>
-      socket.off("admin_update");
+      socket.off("connect", join);
+      socket.off("monitor_frame");
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [selectedPid]);
@@ -198,6 +197,11 @@ export default function AdminDashboard() {
               ))}
             </SelectContent>
           </Select>
+          {hasMore && (
+            <Button variant="ghost" size="sm" onClick={loadMore} disabled={loadingParticipants}>
+              {loadingParticipants ? "Loading..." : "Load more participants"}
+            </Button>
+          )}
         </div>
 
         <div className="space-y-2">
@@ -230,7 +234,11 @@ export default function AdminDashboard() {
       </div>
 
       {/* Summary */}
-      <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
+      <div className="grid grid-cols-1 md:grid-cols-4 gap-4">
+        <div className="p-4 bg-white dark:bg-slate-800 rounded-lg shadow-sm">
+          <div className="text-sm text-muted-foreground">Participants</div>
+          <div className="text-2xl font-bold">{participantTotal ?? "-"}</div>
+        </div>
         <div className="p-4 bg-white dark:bg-slate-800 rounded-lg shadow-sm">
           <div className="text-sm text-muted-foreground">Total Logs</div>
           <div className="text-2xl font-bold">{summary.total}</div>
@@ -1,36 +1,29 @@
-import { useEffect, useState } from "react";
-import { getParticipants } from "@/api/admin";
+import useParticipantPages from "@/hooks/useParticipantPages";
+import { Button } from "@/components/ui/button";
 
 export default function AdminParticipants() {
-  const [participants, setParticipants] = useState<any[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    async function load() {
-      const res = await getParticipants();
-      if (res.ok) {
-        setParticipants(res.data);
-      }
-      setLoading(false);
-    }
-
-    load();
-  }, []);
+  // one page per request; "Load more" fetches the next via next_cursor
+  const { participants, total, hasMore, loading, loadMore } = useParticipantPages();
 
   return (
     <div className="p-6">
       <h1 className="text-xl font-bold mb-4">Participants</h1>
+      {total !== null && <p className="mb-2">Showing {participants.length} of {total}</p>}
 
-      {loading && <p>Loading...</p>}
+      {participants.map((p) => (
+        <div key={p.participant_id} className="border p-3 rounded mb-2">
+          <p>ID: {p.participant_id}</p>
+          <p>Group: {p.assignment_group}</p>
+          <p>Created: {p.created_at}</p>
+        </div>
+      ))}
 
-      {!loading &&
-        participants.map((p) => (
-          <div key={p.participant_id} className="border p-3 rounded mb-2">
-            <p>ID: {p.participant_id}</p>
-            <p>Group: {p.assignment_group}</p>
-            <p>Created: {p.created_at}</p>
-          </div>
-        ))}
+      {loading && <p>Loading...</p>}
+      {hasMore && !loading && (
+        <Button variant="outline" onClick={loadMore}>
+          Load more
+        </Button>
+      )}
     </div>
   );
 }
@@ -1,31 +1,19 @@
-import { useEffect, useState } from "react";
-import { getParticipants } from "@/api/admin";
+import useParticipantPages from "@/hooks/useParticipantPages";
+import { Button } from "@/components/ui/button";
 import { Link } from "react-router-dom";
 
 export default function ParticipantsList() {
-  const [participants, setParticipants] = useState<any[]>([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    async function load() {
-      setLoading(true);
-      try {
-        const res = await getParticipants();
-        if (res?.ok) setParticipants(res.data || []);
-      } catch (e) {
-        console.error("Error fetching participants", e);
-      } finally {
-        setLoading(false);
-      }
-    }
-    load();
-  }, []);
+  // one page per request; "Load more" fetches the next via next_cursor
+  const { participants, total, hasMore, loading, loadMore } = useParticipantPages();
 
   return (
     <div className="p-6">
       <h1 className="text-lg font-bold mb-4">Participants</h1>
-
-      {loading && <p>Loading...</p>}
+      {total !== null && (
+        <p className="text-sm text-muted-foreground mb-2">
+          Showing {participants.length} of {total}
+        </p>
+      )}
 
       <div className="space-y-3">
         {participants.map(p => (
@@ -42,6 +30,13 @@ export default function ParticipantsList() {
           </div>
         ))}
       </div>
+
+      {loading && <p>Loading...</p>}
+      {hasMore && !loading && (
+        <Button variant="outline" className="mt-4" onClick={loadMore}>
+          Load more
+        </Button>
+      )}
     </div>
   );
 }